@@ -2,13 +2,21 @@ from __future__ import annotations
 
 import os
 from typing import Iterable
+from uuid import uuid4
 
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_ollama import ChatOllama, OllamaEmbeddings
 from qdrant_client import QdrantClient
-from qdrant_client.http import models as qmodels
+from qdrant_client.http.models import PointStruct
 from langchain_community.vectorstores import Qdrant as LCQdrant
 
+from app.config import settings
+from app.infra.embedding_cache import embedding_cache
+from app.infra.embedding_models import check_vector, embedding_dimension, observe_vectors
+from app.infra.qdrant_client import ensure_collection, has_sparse_vectors, hybrid_search
+from app.infra.sparse_vectors import hybrid_vector
+
 
 def llm_general() -> ChatOllama:
     """Return the general-purpose LLM used by most crew roles."""
@@ -32,21 +40,35 @@ def llm_code() -> ChatOllama:
     )
 
 
-def embedder() -> OllamaEmbeddings:
-    return OllamaEmbeddings(
-        base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-        model=os.getenv("CREW7_EMBED_MODEL", "nomic-embed-text"),
-    )
+class CachedEmbeddings(Embeddings):
+    """LangChain embeddings served from the shared content-addressed cache first."""
+
+    def __init__(self, inner: OllamaEmbeddings) -> None:
+        self.inner = inner
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        model = self.inner.model
+        found = embedding_cache.get_many(model, texts)
+        pending = list(dict.fromkeys(text for text, vector in zip(texts, found) if vector is None))
+        if not pending:
+            return found
+        vectors = self.inner.embed_documents(pending)
+        observe_vectors(model, vectors)
+        embedding_cache.put_many(model, pending, vectors)
+        embedded = dict(zip(pending, vectors))
+        return [vector if vector is not None else embedded[text] for text, vector in zip(texts, found)]
 
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
 
-def _ensure_collection(client: QdrantClient, name: str) -> None:
-    try:
-        client.get_collection(name)
-    except Exception:
-        client.recreate_collection(
-            collection_name=name,
-            vectors_config=qmodels.VectorParams(size=768, distance=qmodels.Distance.COSINE),
+
+def embedder() -> Embeddings:
+    return CachedEmbeddings(
+        OllamaEmbeddings(
+            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            model=settings.MODEL_EMBED,
         )
+    )
 
 
 def crew_vector_store(crew_id: str) -> LCQdrant:
@@ -56,18 +78,46 @@ def crew_vector_store(crew_id: str) -> LCQdrant:
         api_key=os.getenv("QDRANT_API_KEY") or None,
     )
     coll = f"crew7_{crew_id}"
-    _ensure_collection(client, coll)
+    ensure_collection(coll, client=client)
     return LCQdrant(client=client, collection_name=coll, embeddings=embedder())
 
 
 def upsert_memory(crew_id: str, texts: Iterable[str], metadatas: dict | None = None) -> None:
+    texts = list(texts)
     if not texts:
         return
     store = crew_vector_store(crew_id)
-    docs = [Document(page_content=text, metadata=metadatas or {}) for text in texts]
-    store.add_documents(docs)
+    vectors = store.embeddings.embed_documents(texts)
+    # Same guard as memory_service.vec_upsert: nothing is written if any vector is unusable
+    dimension = embedding_dimension()
+    for vector in vectors:
+        check_vector(vector, dimension)
+    sparse = has_sparse_vectors(store.collection_name, store.client)
+    store.client.upsert(
+        collection_name=store.collection_name,
+        points=[
+            # Same payload layout as LangChain's Qdrant store, plus the lexical vector
+            PointStruct(
+                id=str(uuid4()),
+                vector=hybrid_vector(vector, text) if sparse else vector,
+                payload={"page_content": text, "metadata": metadatas or {}},
+            )
+            for text, vector in zip(texts, vectors)
+        ],
+    )
 
 
-def recall_memory(crew_id: str, query: str, k: int = 5):
+def recall_memory(crew_id: str, query: str, k: int = 5) -> list[Document]:
+    """Top ``k`` crew memories for ``query``, fusing dense and BM25 matches (see ``hybrid_search``)."""
     store = crew_vector_store(crew_id)
-    return store.similarity_search(query, k=k)
+    hits = hybrid_search(
+        store.collection_name,
+        store.embeddings.embed_query(query),
+        query,
+        limit=k,
+        client=store.client,
+    )
+    return [
+        Document(page_content=(hit.payload or {}).get("page_content", ""), metadata=(hit.payload or {}).get("metadata") or {})
+        for hit in hits
+    ]
@@ -0,0 +1,151 @@
+"""
+Per-run CrewAI callbacks that stream real task progress out of a running crew.
+
+CrewAI invokes task callbacks and event-bus handlers on the thread that
+executes the task, so ``RunCallbacks`` only records timings/token counts and
+hands compact event dicts to a thread-safe ``emit`` sink supplied by the
+orchestrator.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from functools import partial
+from typing import Any, Callable
+
+from crewai import Agent, Crew, Task
+from crewai.events import crewai_event_bus
+from crewai.events.types.task_events import TaskStartedEvent
+from crewai.tasks.task_output import TaskOutput
+
+EventSink = Callable[[str, dict[str, Any]], None]
+
+STEP_TEXT_LIMIT = 500
+
+# Tasks of all in-flight runs in this process, keyed by id(task). The crewai
+# event bus is a process-wide singleton, so one handler dispatches for all runs.
+_active: dict[int, "RunCallbacks"] = {}
+_active_lock = threading.Lock()
+_handler_registered = False
+
+
+def agent_key(role: str) -> str:
+    """Stable graph node id for an agent role, e.g. ``Orchestrator / Tech Lead`` -> ``orchestrator``."""
+    head = role.split("/")[0]
+    return re.sub(r"[^a-z0-9]+", "_", head.lower()).strip("_") or "agent"
+
+
+def _on_task_started(source: Any, event: TaskStartedEvent) -> None:
+    task = event.task if event.task is not None else source
+    with _active_lock:
+        callbacks = _active.get(id(task))
+    if callbacks is not None:
+        callbacks.task_started(task)
+
+
+def _ensure_handler() -> None:
+    global _handler_registered
+    with _active_lock:
+        if _handler_registered:
+            return
+        crewai_event_bus.register_handler(TaskStartedEvent, _on_task_started)
+        _handler_registered = True
+
+
+def _task_name(task: Task) -> str:
+    if task.name:
+        return task.name
+    first_line = (task.description or "").strip().splitlines()
+    return first_line[0][:80] if first_line else "task"
+
+
+def _agent_tokens(agent: Agent | None) -> int:
+    process = getattr(agent, "_token_process", None)
+    if process is None or not hasattr(process, "get_summary"):
+        return 0
+    try:
+        return int(process.get_summary().total_tokens or 0)
+    except Exception:  # noqa: BLE001 - token accounting is best-effort
+        return 0
+
+
+class RunCallbacks:
+    """
+    Translate CrewAI task and step callbacks into run events.
+
+    Emitted kinds:
+      - ``task_start``: ``{agent, role, task, after}`` where ``after`` lists the
+        agents whose output feeds this task (graph edges)
+      - ``step``: ``{agent, role, tool, text}`` for each agent reasoning step
+      - ``task_end``: ``{agent, role, task, output, tokens, duration_s}``
+    """
+
+    def __init__(self, emit: EventSink) -> None:
+        self._emit = emit
+        self._lock = threading.Lock()
+        self._tasks: list[Task] = []
+        self._started: dict[int, tuple[float, int]] = {}
+        self._last_agent: str | None = None
+
+    def attach(self, crew: Crew) -> Crew:
+        """Install callbacks on every agent and task of ``crew``."""
+        _ensure_handler()
+        for agent in crew.agents:
+            agent.step_callback = partial(self._on_step, agent)
+        for task in crew.tasks:
+            task.callback = partial(self._on_task_done, task)
+        self._tasks = list(crew.tasks)
+        with _active_lock:
+            for task in self._tasks:
+                _active[id(task)] = self
+        return crew
+
+    def detach(self) -> None:
+        """Stop dispatching event-bus notifications for this run's tasks."""
+        with _active_lock:
+            for task in self._tasks:
+                if _active.get(id(task)) is self:
+                    del _active[id(task)]
+
+    def task_started(self, task: Task) -> None:
+        role = task.agent.role if task.agent else "agent"
+        with self._lock:
+            if id(task) in self._started:
+                return
+            self._started[id(task)] = (time.perf_counter(), _agent_tokens(task.agent))
+            if task.context and isinstance(task.context, list):
+                after = [agent_key(ctx.agent.role) for ctx in task.context if ctx.agent]
+            else:
+                after = [self._last_agent] if self._last_agent else []
+        self._emit("task_start", {
+            "agent": agent_key(role),
+            "role": role,
+            "task": _task_name(task),
+            "after": [key for key in dict.fromkeys(after) if key != agent_key(role)],
+        })
+
+    def _on_step(self, agent: Agent, step: Any) -> None:
+        text = getattr(step, "thought", None) or getattr(step, "text", None) or ""
+        self._emit("step", {
+            "agent": agent_key(agent.role),
+            "role": agent.role,
+            "tool": getattr(step, "tool", None),
+            "text": str(text)[:STEP_TEXT_LIMIT],
+        })
+
+    def _on_task_done(self, task: Task, output: TaskOutput) -> None:
+        # Without a start notification (older crewai) fall back to "now"
+        self.task_started(task)
+        role = task.agent.role if task.agent else output.agent or "agent"
+        with self._lock:
+            started_at, tokens_before = self._started[id(task)]
+            self._last_agent = agent_key(role)
+        self._emit("task_end", {
+            "agent": agent_key(role),
+            "role": role,
+            "task": _task_name(task),
+            "output": output.raw,
+            "tokens": max(_agent_tokens(task.agent) - tokens_before, 0),
+            "duration_s": round(time.perf_counter() - started_at, 3),
+        })
@@ -0,0 +1,115 @@
+"""
+Dependency-driven (DAG) task execution for crews.
+
+CrewAI's sequential process runs ``async_execution`` tasks concurrently but
+joins *all* of them at the next synchronous task, so it cannot express
+"start each specialist as soon as its inputs exist" or cap how many run at
+once. ``DagCrew`` keeps the sequential process (callbacks, replay logs, crew
+output) and only replaces the scheduling loop.
+"""
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from crewai import Crew, Process, Task
+from crewai.tasks.conditional_task import ConditionalTask
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.constants import NOT_SPECIFIED
+from pydantic import Field
+
+from app.config import settings
+
+EXECUTION_MODES = ("sequential", "dag")
+
+
+def resolve_execution_mode(mode: str | None) -> str:
+    resolved = (mode or settings.CREW_EXECUTION_MODE).strip().lower()
+    if resolved not in EXECUTION_MODES:
+        raise ValueError(f"Unknown crew execution mode '{resolved}', expected one of {EXECUTION_MODES}")
+    return resolved
+
+
+def depends_on(execution_mode: str, *tasks: Task) -> Any:
+    """
+    ``context=`` for a task: only ``tasks`` in dag mode, CrewAI's default
+    (every earlier output) in sequential mode so existing prompts don't change.
+    """
+    return list(tasks) if execution_mode == "dag" else NOT_SPECIFIED
+
+
+def task_dependencies(tasks: list[Task]) -> list[set[int]]:
+    """
+    Indices each task waits for: its explicit ``context`` tasks, or every
+    earlier task when no context is declared (sequential semantics).
+    """
+    index = {id(task): i for i, task in enumerate(tasks)}
+    deps: list[set[int]] = []
+    for i, task in enumerate(tasks):
+        if isinstance(task.context, list):
+            deps.append({index[id(ctx)] for ctx in task.context if id(ctx) in index})
+        else:
+            deps.append(set(range(i)))
+    return deps
+
+
+class DagCrew(Crew):
+    """
+    Crew that starts each task once its dependencies have finished.
+
+    At most ``max_parallel`` tasks run at the same time. Replays and
+    conditional tasks fall back to CrewAI's sequential loop.
+    """
+
+    max_parallel: int = Field(default=4, ge=1)
+
+    def _execute_tasks(
+        self,
+        tasks: list[Task],
+        start_index: int | None = 0,
+        was_replayed: bool = False,
+    ) -> Any:
+        if start_index or self.process != Process.sequential or any(
+            isinstance(task, ConditionalTask) for task in tasks
+        ):
+            return super()._execute_tasks(tasks, start_index, was_replayed)
+
+        deps = task_dependencies(tasks)
+        outputs: dict[int, TaskOutput] = {}
+        pending = list(range(len(tasks)))
+        running: dict[Future[TaskOutput], int] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="crew-dag") as pool:
+            while pending or running:
+                ready = [i for i in pending if deps[i] <= outputs.keys()]
+                if not ready and not running:
+                    raise ValueError("Crew task dependencies contain a cycle")
+                for i in ready[: self.max_parallel - len(running)]:
+                    pending.remove(i)
+                    prior = [outputs[j] for j in sorted(deps[i])]
+                    running[pool.submit(self._run_dag_task, tasks[i], prior)] = i
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    output = future.result()
+                    outputs[i] = output
+                    self._process_task_result(tasks[i], output)
+                    self._store_execution_log(tasks[i], output, i, was_replayed)
+
+        return self._create_crew_output([outputs[i] for i in range(len(tasks))])
+
+    def _run_dag_task(self, task: Task, prior: list[TaskOutput]) -> TaskOutput:
+        agent = self._get_agent_to_use(task)
+        if agent is None:
+            raise ValueError(f"No agent available for task: {task.description}")
+        tools = self._prepare_tools(agent, task, task.tools or agent.tools or [])
+        self._log_task_start(task, agent.role)
+        return task.execute_sync(agent=agent, context=self._get_context(task, prior), tools=tools)
+
+
+def build_crew(*, execution_mode: str | None = None, **crew_kwargs: Any) -> Crew:
+    """Create a ``Crew`` (sequential) or ``DagCrew`` (dag) from the same arguments."""
+    if resolve_execution_mode(execution_mode) == "dag":
+        return DagCrew(max_parallel=settings.CREW_DAG_MAX_PARALLEL, **crew_kwargs)
+    return Crew(**crew_kwargs)
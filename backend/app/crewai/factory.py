@@ -4,8 +4,13 @@ from typing import Dict, List
 
 from crewai import Agent, Crew, Process, Task
 
+from app.config import settings
 from app.crewai.adapters import recall_memory
+from app.crewai.callbacks import RunCallbacks
+from app.crewai.dag import build_crew, depends_on, resolve_execution_mode
+from app.crewai.llm_cache import LLMCache
 from app.crewai.models import get_llm_for_agent
+from app.crewai.templates import agents_from_templates, register_agent_templates
 
 SYSTEM_PREAMBLE = (
     "You are part of the 7-member Crew-7 team.\n"
@@ -37,57 +42,79 @@ def make_agent(role: str, goal: str, tools: List | None, *, use_code_model: bool
 
 
 def memory_context(crew_id: str, user_prompt: str) -> str:
-    hits = recall_memory(crew_id, user_prompt, k=5)
+    hits = recall_memory(crew_id, user_prompt, k=settings.MEMORY_RECALL_K)
     if not hits:
         return ""
     rows = "\n".join(f"- {hit.page_content[:300]}" for hit in hits)
     return f"Relevant prior memory:\n{rows}\n"
 
 
-def make_crew(crew_id: str, user_prompt: str, tools: Dict[str, List]) -> Crew:
+def _default_agents() -> Dict[str, Agent]:
+    """Template agents for the default crew; tools are attached per run."""
+    return {
+        "orchestrator": make_agent(
+            role="Orchestrator / Tech Lead",
+            goal="Plan the sequence of tasks, assign to specialists, integrate the final answer.",
+            tools=None,
+        ),
+        "backend": make_agent(
+            role="Backend Engineer",
+            goal="Design scalable APIs and services.",
+            tools=None,
+            use_code_model=True,
+        ),
+        "frontend": make_agent(
+            role="Frontend Engineer",
+            goal="Build responsive, accessible UI.",
+            tools=None,
+            use_code_model=True,
+        ),
+        "qa": make_agent(role="QA Engineer", goal="Design and run tests, report defects.", tools=None),
+        "devops": make_agent(role="DevOps Engineer", goal="Provision containers, CI/CD and IaC.", tools=None),
+        "data": make_agent(role="Data Engineer", goal="Design schemas, ETL, and analytics layers.", tools=None),
+        "security": make_agent(role="Security Analyst", goal="Assess risks and propose mitigations.", tools=None),
+    }
+
+
+register_agent_templates("default", _default_agents)
+
+
+def make_crew(
+    crew_id: str,
+    user_prompt: str,
+    tools: Dict[str, List],
+    *,
+    callbacks: RunCallbacks | None = None,
+    execution_mode: str | None = None,
+    llm_cache: LLMCache | None = None,
+    memory: str | None = None,
+) -> Crew:
     """
     Create a 7-agent CrewAI crew with Gemini Orchestrator and aimalapi specialists.
+
+    When ``callbacks`` is given, task starts/completions and agent steps are
+    reported through it while the crew runs. ``execution_mode="dag"`` runs the
+    specialists that only need the plan concurrently (see ``app.crewai.dag``).
+    ``llm_cache`` serves repeated agent LLM and tool calls across runs.
+    ``memory`` is an already recalled ``memory_context``; recalled here if omitted.
+    Agents are copied from process-wide templates, so warm workers skip LLM
+    client setup.
     """
-    orchestrator = make_agent(
-        role="Orchestrator / Tech Lead",
-        goal="Plan the sequence of tasks, assign to specialists, integrate the final answer.",
-        tools=tools.get("orchestrator"),
-    )
-    backend = make_agent(
-        role="Backend Engineer", 
-        goal="Design scalable APIs and services.", 
-        tools=tools.get("backend"),
-        use_code_model=True
-    )
-    frontend = make_agent(
-        role="Frontend Engineer", 
-        goal="Build responsive, accessible UI.", 
-        tools=tools.get("frontend"),
-        use_code_model=True
-    )
-    qa = make_agent(
-        role="QA Engineer", 
-        goal="Design and run tests, report defects.", 
-        tools=tools.get("qa")
-    )
-    devops = make_agent(
-        role="DevOps Engineer", 
-        goal="Provision containers, CI/CD and IaC.", 
-        tools=tools.get("devops")
-    )
-    data = make_agent(
-        role="Data Engineer", 
-        goal="Design schemas, ETL, and analytics layers.", 
-        tools=tools.get("data")
-    )
-    security = make_agent(
-        role="Security Analyst", 
-        goal="Assess risks and propose mitigations.", 
-        tools=tools.get("security")
-    )
+    agents = agents_from_templates("default", _default_agents, tools)
+    orchestrator = agents["orchestrator"]
+    backend = agents["backend"]
+    frontend = agents["frontend"]
+    qa = agents["qa"]
+    devops = agents["devops"]
+    data = agents["data"]
+    security = agents["security"]
 
-    context = memory_context(crew_id, user_prompt)
+    context = memory if memory is not None else memory_context(crew_id, user_prompt)
+    mode = resolve_execution_mode(execution_mode)
 
+    # depends_on declares the task graph for dag mode: every specialist that
+    # only needs the plan runs concurrently, then t_integrate joins them.
+    # Sequential crews keep CrewAI's default context (all earlier outputs).
     t_plan = Task(
         description=f"Create a short execution plan for the prompt. Prompt:\n{user_prompt}\n{context}",
         agent=orchestrator,
@@ -96,42 +123,55 @@ def make_crew(crew_id: str, user_prompt: str, tools: Dict[str, List]) -> Crew:
     t_backend = Task(
         description="Implement backend/API pieces from the plan; include endpoint specs and data models.",
         agent=backend,
+        context=depends_on(mode, t_plan),
         expected_output="Endpoints, models, and pseudocode or code stubs.",
     )
     t_frontend = Task(
         description="Propose UI states and component contracts; align with API.",
         agent=frontend,
+        context=depends_on(mode, t_plan),
         expected_output="Wireframe-level components + prop contracts.",
     )
     t_qa = Task(
         description="Derive acceptance tests from plan and specialist outputs.",
         agent=qa,
+        context=depends_on(mode, t_plan, t_backend, t_frontend),
         expected_output="Test matrix and edge cases.",
     )
     t_devops = Task(
         description="Provide docker-compose or k8s notes; resource limits and secrets.",
         agent=devops,
+        context=depends_on(mode, t_plan, t_backend),
         expected_output="Infra steps + YAML snippets.",
     )
     t_data = Task(
         description="Define DB schema, indexes, analytics tables.",
         agent=data,
+        context=depends_on(mode, t_plan),
         expected_output="DDL + data contracts.",
     )
     t_security = Task(
         description="List security risks, auth model, rate limiting, and mitigations.",
         agent=security,
+        context=depends_on(mode, t_plan),
         expected_output="Controls and checks.",
     )
     t_integrate = Task(
         description="Integrate all outputs into a single concise deliverable for the user.",
         agent=orchestrator,
+        context=depends_on(mode, t_plan, t_backend, t_frontend, t_qa, t_devops, t_data, t_security),
         expected_output="Final integrated answer with bullets and next actions.",
     )
 
-    return Crew(
+    crew = build_crew(
         agents=[orchestrator, backend, frontend, qa, devops, data, security],
         tasks=[t_plan, t_backend, t_frontend, t_qa, t_devops, t_data, t_security, t_integrate],
         process=Process.sequential,
         verbose=True,
+        execution_mode=mode,
     )
+    if llm_cache is not None:
+        llm_cache.attach(crew)
+    if callbacks is not None:
+        callbacks.attach(crew)
+    return crew
@@ -8,11 +8,25 @@ from typing import Dict, List
 
 from crewai import Agent, Crew, Process, Task
 
+from app.config import settings
 from app.crewai.adapters import recall_memory
+from app.crewai.callbacks import RunCallbacks
+from app.crewai.dag import build_crew, depends_on, resolve_execution_mode
+from app.crewai.llm_cache import LLMCache
 from app.crewai.models import get_llm_for_agent
+from app.crewai.templates import agents_from_templates, register_agent_templates
 
 
-def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, List]) -> Crew:
+def make_fullstack_saas_crew(
+    crew_id: str,
+    user_mission: str,
+    tools: Dict[str, List],
+    *,
+    callbacks: RunCallbacks | None = None,
+    execution_mode: str | None = None,
+    llm_cache: LLMCache | None = None,
+    memory: str | None = None,
+) -> Crew:
     """
     Create the Full-Stack SaaS Crew optimized for complete application development.
     
@@ -28,150 +42,44 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
         crew_id: Unique identifier for the crew
         user_mission: User's mission description (e.g., "Build a subscription management SaaS")
         tools: Dictionary of tools available to each agent role
+        callbacks: Optional per-run callbacks reporting task progress while the crew runs
+        execution_mode: "sequential" or "dag"; defaults to settings.CREW_EXECUTION_MODE
+        llm_cache: Optional cross-run cache for agent LLM and tool calls (from models_json)
+        memory: Crew memory already recalled for the mission; recalled here when None
     
     Returns:
         Configured CrewAI Crew instance
     """
     
     # Retrieve relevant memories for context
-    memory_context = _get_memory_context(crew_id, user_mission)
+    if memory is None:
+        memory_context = _get_memory_context(crew_id, user_mission)
+    else:
+        memory_context = memory or "No prior mission context found."
+    # Declared dependencies only apply in dag mode (see depends_on)
+    mode = resolve_execution_mode(execution_mode)
     
-    # === ORCHESTRATOR ===
-    orchestrator = Agent(
-        role="Orchestrator / Tech Lead",
-        goal=(
-            "Break down the user mission into clear, actionable tasks. "
-            "Coordinate between specialists. Ensure coherent final deliverable. "
-            "Use Qdrant memory to maintain context across iterations."
-        ),
-        backstory=(
-            "You are the technical leader of a 7-person engineering team. "
-            "Your job is strategic planning, task delegation, and integration. "
-            "You have deep knowledge of full-stack architecture patterns and can "
-            "make quick, pragmatic decisions for MVP development. "
-            "You store and recall important context using vector memory."
-        ),
-        tools=tools.get("orchestrator", []),
-        llm=get_llm_for_agent("Orchestrator"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
-    )
-    
-    # === BACKEND TEAM ===
-    backend_architect = Agent(
-        role="Backend Architect",
-        goal=(
-            "Design the backend architecture including API endpoints, "
-            "data models, authentication strategy, and service boundaries."
-        ),
-        backstory=(
-            "You are an experienced backend architect who designs scalable APIs. "
-            "You think about data flow, authentication, authorization, error handling, "
-            "and API contracts. You create clear specifications for implementers."
-        ),
-        tools=tools.get("backend", []),
-        llm=get_llm_for_agent("Backend Architect"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
-    )
-    
-    backend_implementer = Agent(
-        role="Backend Implementer",
-        goal=(
-            "Implement FastAPI endpoints, database models, business logic, "
-            "and data validation based on the architect's design."
-        ),
-        backstory=(
-            "You are a skilled backend developer who writes clean, maintainable code. "
-            "You implement APIs following REST/GraphQL best practices, handle errors "
-            "gracefully, and write clear documentation. You use FastAPI, SQLAlchemy, "
-            "and Pydantic for type safety."
-        ),
-        tools=tools.get("backend", []),
-        llm=get_llm_for_agent("Backend Implementer"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
-    )
-    
-    # === FRONTEND TEAM ===
-    frontend_architect = Agent(
-        role="Frontend Architect",
-        goal=(
-            "Design the UI/UX structure, component hierarchy, state management, "
-            "and navigation flow for the SaaS application."
-        ),
-        backstory=(
-            "You are a frontend architect who designs intuitive, accessible interfaces. "
-            "You think about component composition, state flow, routing, forms, and "
-            "user feedback. You create wireframes and component specifications."
-        ),
-        tools=tools.get("frontend", []),
-        llm=get_llm_for_agent("Frontend Architect"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
-    )
-    
-    frontend_implementer = Agent(
-        role="Frontend Implementer",
-        goal=(
-            "Build React components, wire up API calls, implement forms and "
-            "validation, and apply styling based on the architect's design."
-        ),
-        backstory=(
-            "You are a frontend developer who builds modern React applications. "
-            "You use TypeScript, React hooks, and CSS/TailwindCSS. You create "
-            "responsive, accessible components with proper error handling and loading states."
-        ),
-        tools=tools.get("frontend", []),
-        llm=get_llm_for_agent("Frontend Implementer"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
-    )
-    
-    # === QA ENGINEER ===
-    qa_engineer = Agent(
-        role="QA / Test Engineer",
-        goal=(
-            "Design test strategies, write unit and integration tests, "
-            "identify edge cases, and ensure quality across backend and frontend."
-        ),
-        backstory=(
-            "You are a quality assurance engineer who ensures software reliability. "
-            "You write pytest tests for backend APIs, React Testing Library tests "
-            "for components, and document test plans. You think about edge cases, "
-            "error scenarios, and user acceptance criteria."
-        ),
-        tools=tools.get("qa", []),
-        llm=get_llm_for_agent("QA Engineer"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
-    )
-    
-    # === DEVOPS ENGINEER ===
-    devops_engineer = Agent(
-        role="DevOps / Infrastructure Engineer",
-        goal=(
-            "Create Docker configuration, CI/CD pipelines, environment setup, "
-            "and deployment instructions for local dev and production."
-        ),
-        backstory=(
-            "You are a DevOps engineer who automates everything. You create "
-            "Dockerfiles, docker-compose files, CI/CD workflows (GitHub Actions), "
-            "and deployment guides. You think about secrets management, resource "
-            "limits, health checks, and monitoring."
-        ),
-        tools=tools.get("devops", []),
-        llm=get_llm_for_agent("DevOps Engineer"),
-        cache=False,
-        allow_delegation=False,
-        verbose=True,
+    # === AGENTS (copied from per-process templates) ===
+    agents = agents_from_templates(
+        "fullstack_saas",
+        _fullstack_agents,
+        {
+            "orchestrator": tools.get("orchestrator"),
+            "backend_architect": tools.get("backend"),
+            "backend_implementer": tools.get("backend"),
+            "frontend_architect": tools.get("frontend"),
+            "frontend_implementer": tools.get("frontend"),
+            "qa_engineer": tools.get("qa"),
+            "devops_engineer": tools.get("devops"),
+        },
     )
+    orchestrator = agents["orchestrator"]
+    backend_architect = agents["backend_architect"]
+    backend_implementer = agents["backend_implementer"]
+    frontend_architect = agents["frontend_architect"]
+    frontend_implementer = agents["frontend_implementer"]
+    qa_engineer = agents["qa_engineer"]
+    devops_engineer = agents["devops_engineer"]
     
     # === TASK DEFINITIONS ===
     
@@ -209,6 +117,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. Error handling approach"
         ),
         agent=backend_architect,
+        context=depends_on(mode, task_plan),
         expected_output=(
             "Backend architecture document with:\n"
             "- API endpoint specifications\n"
@@ -229,6 +138,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. Error handling and logging"
         ),
         agent=backend_implementer,
+        context=depends_on(mode, task_plan, task_backend_arch),
         expected_output=(
             "Working backend code:\n"
             "- routes.py with all endpoints\n"
@@ -250,6 +160,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. Form validation strategy"
         ),
         agent=frontend_architect,
+        context=depends_on(mode, task_plan, task_backend_arch),
         expected_output=(
             "Frontend architecture document with:\n"
             "- Component tree diagram\n"
@@ -271,6 +182,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. Styling (TailwindCSS or CSS)"
         ),
         agent=frontend_implementer,
+        context=depends_on(mode, task_frontend_arch, task_backend_arch),
         expected_output=(
             "Working frontend code:\n"
             "- App.tsx with routing\n"
@@ -293,6 +205,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. Test documentation"
         ),
         agent=qa_engineer,
+        context=depends_on(mode, task_backend_impl, task_frontend_impl),
         expected_output=(
             "Complete test suite:\n"
             "- test_api.py (backend tests)\n"
@@ -314,6 +227,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. README with setup instructions"
         ),
         agent=devops_engineer,
+        context=depends_on(mode, task_backend_impl),
         expected_output=(
             "Complete DevOps setup:\n"
             "- Dockerfile\n"
@@ -336,6 +250,16 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
             "5. Store key decisions in memory for future iterations"
         ),
         agent=orchestrator,
+        context=depends_on(
+            mode,
+            task_plan,
+            task_backend_arch,
+            task_backend_impl,
+            task_frontend_arch,
+            task_frontend_impl,
+            task_qa,
+            task_devops,
+        ),
         expected_output=(
             "Final integrated deliverable with:\n"
             "- Complete project structure\n"
@@ -348,7 +272,7 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
     )
     
     # === CREATE CREW ===
-    return Crew(
+    crew = build_crew(
         agents=[
             orchestrator,
             backend_architect,
@@ -371,13 +295,165 @@ def make_fullstack_saas_crew(crew_id: str, user_mission: str, tools: Dict[str, L
         process=Process.sequential,
         verbose=True,
         memory=True,  # Enable CrewAI's built-in memory
+        execution_mode=mode,
+    )
+    if llm_cache is not None:
+        llm_cache.attach(crew)
+    if callbacks is not None:
+        callbacks.attach(crew)
+    return crew
+
+
+def _fullstack_agents() -> Dict[str, Agent]:
+    """Template agents for the Full-Stack SaaS Crew; tools are attached per run."""
+    # === ORCHESTRATOR ===
+    orchestrator = Agent(
+        role="Orchestrator / Tech Lead",
+        goal=(
+            "Break down the user mission into clear, actionable tasks. "
+            "Coordinate between specialists. Ensure coherent final deliverable. "
+            "Use Qdrant memory to maintain context across iterations."
+        ),
+        backstory=(
+            "You are the technical leader of a 7-person engineering team. "
+            "Your job is strategic planning, task delegation, and integration. "
+            "You have deep knowledge of full-stack architecture patterns and can "
+            "make quick, pragmatic decisions for MVP development. "
+            "You store and recall important context using vector memory."
+        ),
+        llm=get_llm_for_agent("Orchestrator"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
+    )
+    
+    # === BACKEND TEAM ===
+    backend_architect = Agent(
+        role="Backend Architect",
+        goal=(
+            "Design the backend architecture including API endpoints, "
+            "data models, authentication strategy, and service boundaries."
+        ),
+        backstory=(
+            "You are an experienced backend architect who designs scalable APIs. "
+            "You think about data flow, authentication, authorization, error handling, "
+            "and API contracts. You create clear specifications for implementers."
+        ),
+        llm=get_llm_for_agent("Backend Architect"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
+    )
+    
+    backend_implementer = Agent(
+        role="Backend Implementer",
+        goal=(
+            "Implement FastAPI endpoints, database models, business logic, "
+            "and data validation based on the architect's design."
+        ),
+        backstory=(
+            "You are a skilled backend developer who writes clean, maintainable code. "
+            "You implement APIs following REST/GraphQL best practices, handle errors "
+            "gracefully, and write clear documentation. You use FastAPI, SQLAlchemy, "
+            "and Pydantic for type safety."
+        ),
+        llm=get_llm_for_agent("Backend Implementer"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
     )
+    
+    # === FRONTEND TEAM ===
+    frontend_architect = Agent(
+        role="Frontend Architect",
+        goal=(
+            "Design the UI/UX structure, component hierarchy, state management, "
+            "and navigation flow for the SaaS application."
+        ),
+        backstory=(
+            "You are a frontend architect who designs intuitive, accessible interfaces. "
+            "You think about component composition, state flow, routing, forms, and "
+            "user feedback. You create wireframes and component specifications."
+        ),
+        llm=get_llm_for_agent("Frontend Architect"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
+    )
+    
+    frontend_implementer = Agent(
+        role="Frontend Implementer",
+        goal=(
+            "Build React components, wire up API calls, implement forms and "
+            "validation, and apply styling based on the architect's design."
+        ),
+        backstory=(
+            "You are a frontend developer who builds modern React applications. "
+            "You use TypeScript, React hooks, and CSS/TailwindCSS. You create "
+            "responsive, accessible components with proper error handling and loading states."
+        ),
+        llm=get_llm_for_agent("Frontend Implementer"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
+    )
+    
+    # === QA ENGINEER ===
+    qa_engineer = Agent(
+        role="QA / Test Engineer",
+        goal=(
+            "Design test strategies, write unit and integration tests, "
+            "identify edge cases, and ensure quality across backend and frontend."
+        ),
+        backstory=(
+            "You are a quality assurance engineer who ensures software reliability. "
+            "You write pytest tests for backend APIs, React Testing Library tests "
+            "for components, and document test plans. You think about edge cases, "
+            "error scenarios, and user acceptance criteria."
+        ),
+        llm=get_llm_for_agent("QA Engineer"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
+    )
+    
+    # === DEVOPS ENGINEER ===
+    devops_engineer = Agent(
+        role="DevOps / Infrastructure Engineer",
+        goal=(
+            "Create Docker configuration, CI/CD pipelines, environment setup, "
+            "and deployment instructions for local dev and production."
+        ),
+        backstory=(
+            "You are a DevOps engineer who automates everything. You create "
+            "Dockerfiles, docker-compose files, CI/CD workflows (GitHub Actions), "
+            "and deployment guides. You think about secrets management, resource "
+            "limits, health checks, and monitoring."
+        ),
+        llm=get_llm_for_agent("DevOps Engineer"),
+        cache=False,
+        allow_delegation=False,
+        verbose=True,
+    )
+
+    return {
+        "orchestrator": orchestrator,
+        "backend_architect": backend_architect,
+        "backend_implementer": backend_implementer,
+        "frontend_architect": frontend_architect,
+        "frontend_implementer": frontend_implementer,
+        "qa_engineer": qa_engineer,
+        "devops_engineer": devops_engineer,
+    }
+
+
+register_agent_templates("fullstack_saas", _fullstack_agents)
 
 
-def _get_memory_context(crew_id: str, user_mission: str, k: int = 5) -> str:
+def _get_memory_context(crew_id: str, user_mission: str, k: int | None = None) -> str:
     """Retrieve relevant memories from Qdrant for context."""
     try:
-        hits = recall_memory(crew_id, user_mission, k=k)
+        hits = recall_memory(crew_id, user_mission, k=k or settings.MEMORY_RECALL_K)
         if not hits:
             return "No prior mission context found."
         
@@ -0,0 +1,309 @@
+"""
+Cross-run cache for agent LLM calls and tool calls.
+
+Planning steps and tool lookups repeat across runs of the same crew, but
+agents are built with ``cache=False`` and CrewAI's own tool cache only lives
+for one crew object. ``LLMCache.attach`` wraps each agent's LLM in
+``CachedLLM`` (keyed on model, sampling settings, messages and tool schemas)
+and, for the read-only tools a crew lists, a ``ToolCallCache`` (keyed on the
+crew's org and id, tool name and arguments), both backed by a shared Redis or
+diskcache store with a TTL and a size bound. Tool caching is off unless tools
+are listed; tools with side effects (cloning, running tests or scripts) are
+never cached since a replay would skip the effect.
+
+Enabled per crew through ``models_json``::
+
+    {"llm_cache": true}
+    {"llm_cache": {"backend": "redis", "ttl_seconds": 3600, "max_entries": 5000, "tools": ["docs_search"]}}
+
+The disk backend is bounded by ``CREW7_LLM_CACHE_MAX_BYTES`` rather than an
+entry count, so it rejects ``max_entries``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Protocol
+
+from crewai import Crew
+from crewai.agents.cache import CacheHandler
+from crewai.llms.base_llm import BaseLLM
+from pydantic import PrivateAttr
+
+from app.config import settings
+from app.infra.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ("redis", "disk")
+STATS_KEY = "metrics:llm_cache"
+# Built-in tools that change state (app.crewai.tools); replaying them would skip the change
+SIDE_EFFECT_TOOLS = frozenset({"git_clone", "pytest_run", "script_run"})
+
+
+class CacheStore(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class RedisCacheStore:
+    """String values with a TTL; a sorted-set index evicts the oldest beyond ``max_entries``."""
+
+    def __init__(self, *, prefix: str, ttl_seconds: int, max_entries: int) -> None:
+        self.prefix = prefix
+        self.index_key = f"{prefix}index"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> str | None:
+        return get_redis().get(f"{self.prefix}{key}")
+
+    def set(self, key: str, value: str) -> None:
+        redis = get_redis()
+        pipe = redis.pipeline()
+        pipe.set(f"{self.prefix}{key}", value, ex=self.ttl_seconds)
+        pipe.zadd(self.index_key, {key: time.time()})
+        pipe.zcard(self.index_key)
+        overflow = pipe.execute()[-1] - self.max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in redis.zpopmin(self.index_key, overflow)]
+            if evicted:
+                redis.delete(*(f"{self.prefix}{member}" for member in evicted))
+
+
+class DiskCacheStore:
+    """Local ``diskcache`` store; entries expire after ``ttl_seconds`` and LRU-evict past ``max_bytes``."""
+
+    def __init__(self, *, directory: str, ttl_seconds: int, max_bytes: int) -> None:
+        import diskcache
+
+        self.ttl_seconds = ttl_seconds
+        self._cache = diskcache.Cache(
+            directory,
+            size_limit=max_bytes,
+            eviction_policy="least-recently-used",
+        )
+
+    def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value, expire=self.ttl_seconds)
+
+
+# One store per backend/limits per process; diskcache holds an SQLite handle
+_stores: dict[tuple[str, int, int | None], CacheStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _store_for(backend: str, ttl_seconds: int, max_entries: int | None) -> CacheStore:
+    key = (backend, ttl_seconds, max_entries)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "disk":
+                store = DiskCacheStore(
+                    directory=settings.LLM_CACHE_DIR,
+                    ttl_seconds=ttl_seconds,
+                    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+                )
+            else:
+                store = RedisCacheStore(
+                    prefix="llm_cache:",
+                    ttl_seconds=ttl_seconds,
+                    max_entries=max_entries or settings.LLM_CACHE_MAX_ENTRIES,
+                )
+            _stores[key] = store
+    return store
+
+
+def cache_key(kind: str, payload: dict[str, Any]) -> str:
+    fingerprint = json.dumps(payload, sort_keys=True, default=str)
+    return f"{kind}:{hashlib.sha256(fingerprint.encode()).hexdigest()}"
+
+
+def record(kind: str, result: str) -> None:
+    try:
+        get_redis().hincrby(STATS_KEY, f"{kind}:{result}", 1)
+    except Exception:  # noqa: BLE001 - metrics best effort
+        pass
+
+
+def _safe_get(store: CacheStore, key: str) -> str | None:
+    try:
+        return store.get(key)
+    except Exception as exc:  # noqa: BLE001 - a broken cache must not fail the run
+        logger.warning("LLM cache read failed: %r", exc)
+        return None
+
+
+def _safe_set(store: CacheStore, key: str, value: str) -> None:
+    try:
+        store.set(key, value)
+    except Exception as exc:  # noqa: BLE001 - caching is best effort
+        logger.warning("LLM cache write failed: %r", exc)
+
+
+class CachedLLM(BaseLLM):
+    """Serve repeated ``call``s of ``llm`` from ``store``; everything else is delegated."""
+
+    def __init__(self, llm: BaseLLM, store: CacheStore) -> None:
+        # BaseLLM.__init__ is skipped: model/temperature/stop live on the wrapped LLM
+        self.llm = llm
+        self.store = store
+
+    @property
+    def stop(self) -> list[str]:  # type: ignore[override]
+        return self.llm.stop
+
+    @stop.setter
+    def stop(self, value: list[str]) -> None:
+        # Agent executors set stop words on the LLM they were given
+        self.llm.stop = value
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("llm", "store"):
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def call(
+        self,
+        messages: str | list[dict[str, str]],
+        tools: list[dict] | None = None,
+        callbacks: list[Any] | None = None,
+        available_functions: dict[str, Any] | None = None,
+        from_task: Any | None = None,
+        from_agent: Any | None = None,
+    ) -> str | Any:
+        if available_functions:
+            # The LLM may execute a function here; replaying would skip its side effects
+            return self.llm.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+            )
+        key = cache_key("llm", {
+            "model": self.llm.model,
+            "temperature": getattr(self.llm, "temperature", None),
+            "max_tokens": getattr(self.llm, "max_tokens", None),
+            "stop": sorted(self.llm.stop or []),
+            "messages": messages,
+            "tools": tools,
+        })
+        cached = _safe_get(self.store, key)
+        if cached is not None:
+            record("llm", "hit")
+            return cached
+        record("llm", "miss")
+        answer = self.llm.call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+        )
+        if isinstance(answer, str) and answer:
+            _safe_set(self.store, key, answer)
+        return answer
+
+    def supports_function_calling(self) -> bool:
+        return self.llm.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.llm.get_context_window_size()
+
+
+class ToolCallCache(CacheHandler):
+    """CrewAI tool cache handler backed by a cross-run store, for ``tools`` in ``scope`` only."""
+
+    _store: Any = PrivateAttr(default=None)
+    _tools: frozenset[str] = PrivateAttr(default=frozenset())
+    _scope: str = PrivateAttr(default="")
+
+    def __init__(self, store: CacheStore, *, tools: frozenset[str], scope: str, **data: Any) -> None:
+        super().__init__(**data)
+        self._store = store
+        self._tools = tools
+        self._scope = scope
+
+    def _key(self, tool: str, tool_input: str) -> str:
+        return cache_key("tool", {"scope": self._scope, "tool": tool, "input": tool_input})
+
+    def add(self, tool: str, input: str, output: Any) -> None:  # noqa: A002 - CrewAI's signature
+        if tool in self._tools and isinstance(output, str):
+            _safe_set(self._store, self._key(tool, input), output)
+
+    def read(self, tool: str, input: str) -> Any | None:  # noqa: A002 - CrewAI's signature
+        if tool not in self._tools:
+            return None
+        cached = _safe_get(self._store, self._key(tool, input))
+        record("tool", "hit" if cached is not None else "miss")
+        return cached
+
+
+def _cacheable_tools(value: Any) -> frozenset[str]:
+    if value is None or value is False:
+        return frozenset()
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError("llm_cache tools must be a list of read-only tool names")
+    unsafe = SIDE_EFFECT_TOOLS.intersection(value)
+    if unsafe:
+        raise ValueError(f"llm_cache cannot cache tools with side effects: {', '.join(sorted(unsafe))}")
+    return frozenset(value)
+
+
+class LLMCache:
+    def __init__(self, store: CacheStore, *, tools: frozenset[str] = frozenset(), scope: str = "") -> None:
+        self.store = store
+        self.tools = tools
+        self.scope = scope
+
+    @classmethod
+    def from_models(cls, models: dict[str, Any] | None, *, scope: str = "") -> LLMCache | None:
+        """
+        Build the cache a crew's ``models_json`` asks for, or None when disabled.
+
+        ``scope`` (the crew's org and id) partitions tool results between crews.
+        """
+        config = (models or {}).get("llm_cache", settings.LLM_CACHE_ENABLED)
+        if isinstance(config, bool):
+            config = {"enabled": config}
+        if not isinstance(config, dict) or not config.get("enabled", True):
+            return None
+        backend = str(config.get("backend") or settings.LLM_CACHE_BACKEND)
+        if backend not in CACHE_BACKENDS:
+            raise ValueError(f"Unknown llm_cache backend {backend!r}; expected one of {', '.join(CACHE_BACKENDS)}")
+        max_entries = config.get("max_entries")
+        if backend == "disk" and max_entries:
+            raise ValueError(
+                "llm_cache max_entries is not supported by the disk backend; "
+                "it is bounded by CREW7_LLM_CACHE_MAX_BYTES"
+            )
+        store = _store_for(
+            backend,
+            int(config.get("ttl_seconds") or settings.LLM_CACHE_TTL_SECONDS),
+            int(max_entries) if max_entries else None,
+        )
+        return cls(store, tools=_cacheable_tools(config.get("tools")), scope=scope)
+
+    def attach(self, crew: Crew) -> None:
+        """Route ``crew``'s agent LLM calls (and its listed read-only tool calls) through the cache."""
+        # After Crew construction, which installs its own per-crew tool cache
+        handler = ToolCallCache(self.store, tools=self.tools, scope=self.scope) if self.tools else None
+        for agent in crew.agents:
+            if isinstance(agent.llm, BaseLLM) and not isinstance(agent.llm, CachedLLM):
+                agent.llm = CachedLLM(agent.llm, self.store)
+            if handler is not None:
+                agent.cache = True
+                agent.set_cache_handler(handler)
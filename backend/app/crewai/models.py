@@ -5,7 +5,9 @@ Supports Gemini (Orchestrator), aimalapi (Specialists), and Ollama (fallback)
 from __future__ import annotations
 
 import os
-from typing import Any
+import threading
+from functools import partial
+from typing import Any, Callable, TypeVar
 
 try:
     from langchain_google_genai import ChatGoogleGenerativeAI
@@ -18,6 +20,35 @@ from langchain_openai import ChatOpenAI
 
 from app.config import settings
 
+T = TypeVar("T")
+
+# Process-wide LLM clients keyed by (provider, model, temperature, max_tokens).
+# Each client owns an HTTP connection pool, so reusing them across runs keeps
+# keep-alive TLS connections to the providers warm in long-lived workers.
+_llm_clients: dict[tuple[str, str, float, int | None], Any] = {}
+_llm_clients_lock = threading.Lock()
+
+
+def _pooled_llm(
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int | None,
+    build: Callable[[], T],
+) -> T:
+    key = (provider, model, temperature, max_tokens)
+    with _llm_clients_lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            client = _llm_clients[key] = build()
+    return client
+
+
+def clear_llm_clients() -> None:
+    """Drop pooled clients (e.g. after rotating API keys)."""
+    with _llm_clients_lock:
+        _llm_clients.clear()
+
 
 def get_gemini_llm(**kwargs: Any):
     """
@@ -37,13 +68,17 @@ def get_gemini_llm(**kwargs: Any):
             max_tokens = int(os.getenv("GEMINI_MAX_TOKENS", "2048"))
             
             try:
-                return ChatGoogleGenerativeAI(
+                build = partial(
+                    ChatGoogleGenerativeAI,
                     model=model_name,
                     google_api_key=api_key,
                     temperature=temperature,
                     max_tokens=max_tokens,
                     **kwargs
                 )
+                if kwargs:
+                    return build()
+                return _pooled_llm("gemini", model_name, temperature, max_tokens, build)
             except Exception as e:
                 print(f"⚠️ Gemini API failed: {e}, trying AimlAPI...")
     
@@ -57,7 +92,8 @@ def get_gemini_llm(**kwargs: Any):
         max_tokens = int(os.getenv("AIMALAPI_MAX_TOKENS", "2048"))
         
         try:
-            return ChatOpenAI(
+            build = partial(
+                ChatOpenAI,
                 model=gemini_model,
                 openai_api_key=aimalapi_key,
                 openai_api_base=base_url,
@@ -65,6 +101,9 @@ def get_gemini_llm(**kwargs: Any):
                 max_tokens=max_tokens,
                 **kwargs
             )
+            if kwargs:
+                return build()
+            return _pooled_llm("aimalapi", gemini_model, temperature, max_tokens, build)
         except Exception as e:
             print(f"⚠️ AimlAPI with Gemini failed: {e}, falling back to Ollama...")
     
@@ -104,7 +143,8 @@ def get_aimalapi_llm(role: str = "general", **kwargs: Any) -> ChatOpenAI:
     temperature = float(os.getenv("AIMALAPI_TEMPERATURE", "0.7"))
     max_tokens = int(os.getenv("AIMALAPI_MAX_TOKENS", "2048"))
     
-    return ChatOpenAI(
+    build = partial(
+        ChatOpenAI,
         model=model_name,
         openai_api_key=api_key,
         openai_api_base=base_url,
@@ -112,6 +152,9 @@ def get_aimalapi_llm(role: str = "general", **kwargs: Any) -> ChatOpenAI:
         max_tokens=max_tokens,
         **kwargs
     )
+    if kwargs:
+        return build()
+    return _pooled_llm("aimalapi", model_name, temperature, max_tokens, build)
 
 
 def get_ollama_llm(model: str | None = None, **kwargs: Any) -> ChatOllama:
@@ -121,17 +164,24 @@ def get_ollama_llm(model: str | None = None, **kwargs: Any) -> ChatOllama:
     """
     model_name = model or settings.MODEL_GENERAL
     
-    return ChatOllama(
+    build = partial(
+        ChatOllama,
         model=model_name,
         base_url=settings.OLLAMA_BASE_URL,
         temperature=0.7,
         **kwargs
     )
+    if kwargs:
+        return build()
+    return _pooled_llm("ollama", model_name, 0.7, None, build)
 
 
 def get_llm_for_agent(agent_role: str, use_gemini_orchestrator: bool = True) -> Any:
     """
     Get appropriate LLM based on agent role.
+
+    Clients are pooled per process (see ``_pooled_llm``), so agents with the
+    same provider/model/sampling settings share one client.
     
     Args:
         agent_role: Role of the agent (orchestrator, backend, frontend, etc.)
@@ -180,3 +230,29 @@ def get_llm_for_agent(agent_role: str, use_gemini_orchestrator: bool = True) ->
         # Fallback to Ollama
         model = settings.MODEL_CODE if any(x in agent_role_lower for x in ["backend", "frontend", "code"]) else settings.MODEL_GENERAL
         return get_ollama_llm(model=model)
+
+
+def model_versions() -> dict[str, Any]:
+    """
+    Snapshot of the model configuration ``get_llm_for_agent`` resolves from.
+
+    Used to fingerprint cached run results: changing a provider key, model
+    name or sampling setting invalidates them.
+    """
+    return {
+        "gemini": bool(HAS_GEMINI and os.getenv("GEMINI_API_KEY")),
+        "aimalapi": bool(os.getenv("AIMALAPI_API_KEY")),
+        "gemini_model": os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash"),
+        "gemini_temperature": os.getenv("GEMINI_TEMPERATURE", "0.7"),
+        "gemini_max_tokens": os.getenv("GEMINI_MAX_TOKENS", "2048"),
+        "aimal_gemini_model": os.getenv("AIMAL_GEMINI_MODEL", "gemini-1.5-flash"),
+        "aimal_models": {
+            role: os.getenv(f"AIMAL_{role.upper()}_MODEL", "gpt-4o-mini")
+            for role in ("backend", "frontend", "qa", "devops", "data", "security")
+        },
+        "aimal_default_model": os.getenv("AIMALAPI_MODEL", "gpt-4o-mini"),
+        "aimal_temperature": os.getenv("AIMALAPI_TEMPERATURE", "0.7"),
+        "aimal_max_tokens": os.getenv("AIMALAPI_MAX_TOKENS", "2048"),
+        "ollama_general": settings.MODEL_GENERAL,
+        "ollama_code": settings.MODEL_CODE,
+    }
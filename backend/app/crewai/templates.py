@@ -0,0 +1,67 @@
+"""
+Reusable agent templates per crew type.
+
+Building an ``Agent`` resolves its LLM (provider client construction plus
+CrewAI's ``create_llm`` conversion). Templates are built once per process
+and every run gets ``Agent.copy()`` instances, which share the converted LLM
+but carry their own executor, token counters and callbacks.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Mapping
+
+from crewai import Agent
+
+AgentBuilder = Callable[[], dict[str, Agent]]
+
+_builders: dict[str, AgentBuilder] = {}
+_templates: dict[str, dict[str, Agent]] = {}
+_templates_lock = threading.Lock()
+
+
+def register_agent_templates(crew_type: str, build: AgentBuilder) -> None:
+    """Make ``crew_type`` known to ``warm_agent_templates``."""
+    _builders[crew_type] = build
+
+
+def _templates_for(crew_type: str, build: AgentBuilder) -> dict[str, Agent]:
+    with _templates_lock:
+        templates = _templates.get(crew_type)
+        if templates is None:
+            templates = _templates[crew_type] = build()
+    return templates
+
+
+def agents_from_templates(
+    crew_type: str,
+    build: AgentBuilder,
+    tools: Mapping[str, list | None] | None = None,
+) -> dict[str, Agent]:
+    """
+    Return fresh agents for ``crew_type``, building its templates on first use.
+
+    ``build`` returns template agents keyed by name (without tools); ``tools``
+    maps those names to this run's tool lists.
+    """
+    agents: dict[str, Agent] = {}
+    for name, template in _templates_for(crew_type, build).items():
+        agent = template.copy()
+        agent.tools = list((tools or {}).get(name) or [])
+        agents[name] = agent
+    return agents
+
+
+def warm_agent_templates() -> list[str]:
+    """Build templates for every registered crew type; returns the crew types built."""
+    warmed = []
+    for crew_type, build in list(_builders.items()):
+        _templates_for(crew_type, build)
+        warmed.append(crew_type)
+    return warmed
+
+
+def clear_agent_templates() -> None:
+    """Forget built templates (e.g. after changing model configuration)."""
+    with _templates_lock:
+        _templates.clear()
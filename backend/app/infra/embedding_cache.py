@@ -0,0 +1,150 @@
+"""
+Content-addressed embedding cache.
+
+The same text is embedded several times per run (run output persisted to
+crew memory, the LangChain store and recall prompts). Vectors are cached by
+``sha256(model, text)`` in two tiers: an in-process LRU of
+``EMBED_CACHE_SIZE`` entries, and Redis with a ``EMBED_CACHE_TTL_SECONDS``
+expiry so every worker shares them. Both tiers hold packed float32 blobs
+(4 bytes per dimension, against ~32 for a list of Python floats) that are
+decoded on a hit. Hit/miss counts are kept in process and flushed to Redis
+every ``STATS_FLUSH_LOOKUPS`` lookups or ``STATS_FLUSH_SECONDS``, so an LRU
+hit costs no network round trip.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from typing import Sequence
+
+from app.config import settings
+from app.infra.redis_client import get_binary_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "emb:"
+STATS_KEY = "metrics:embedding_cache"
+STATS_FLUSH_LOOKUPS = 100
+STATS_FLUSH_SECONDS = 10.0
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(raw: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(raw)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, max_items: int, ttl_seconds: int) -> None:
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._lru: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Counter[str] = Counter()
+        self._lookups = 0
+        self._flushed_at = time.monotonic()
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        return self.get_many(model, [text])[0]
+
+    def put(self, model: str, text: str, vector: Sequence[float]) -> None:
+        self.put_many(model, [text], [vector])
+
+    def get_many(self, model: str, texts: Sequence[str]) -> list[list[float] | None]:
+        """Cached vectors for ``texts`` (None where missing), checking the LRU before Redis."""
+        keys = [embedding_key(model, text) for text in texts]
+        found: list[list[float] | None] = [None] * len(keys)
+        with self._lock:
+            for index, key in enumerate(keys):
+                blob = self._lru.get(key)
+                if blob is not None:
+                    self._lru.move_to_end(key)
+                    found[index] = unpack_vector(blob)
+        lru_hits = sum(vector is not None for vector in found)
+
+        missing = [index for index, vector in enumerate(found) if vector is None]
+        redis_hits = 0
+        if missing and self.ttl_seconds > 0:
+            try:
+                blobs = get_binary_redis().mget([CACHE_PREFIX + keys[index] for index in missing])
+            except Exception as exc:  # noqa: BLE001 - the cache must never fail an embedding
+                logger.warning("Embedding cache read failed: %r", exc)
+                blobs = [None] * len(missing)
+            for index, blob in zip(missing, blobs):
+                if blob:
+                    found[index] = unpack_vector(blob)
+                    self._remember(keys[index], blob)
+                    redis_hits += 1
+
+        self._record(lru_hit=lru_hits, redis_hit=redis_hits, miss=len(keys) - lru_hits - redis_hits)
+        return found
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        keys = [embedding_key(model, text) for text in texts]
+        blobs = [pack_vector(vector) for vector in vectors]
+        for key, blob in zip(keys, blobs):
+            self._remember(key, blob)
+        if self.ttl_seconds <= 0:
+            return
+        try:
+            pipe = get_binary_redis().pipeline(transaction=False)
+            for key, blob in zip(keys, blobs):
+                pipe.set(CACHE_PREFIX + key, blob, ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception as exc:  # noqa: BLE001 - caching is best effort
+            logger.warning("Embedding cache write failed: %r", exc)
+
+    def clear(self) -> None:
+        """Forget the in-process tier (the Redis tier expires on its own)."""
+        with self._lock:
+            self._lru.clear()
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._lru[key] = blob
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    def flush_stats(self) -> None:
+        """Add the hit/miss counts gathered since the last flush to ``STATS_KEY``."""
+        with self._lock:
+            counts, self._stats = self._stats, Counter()
+            self._lookups = 0
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for result, count in counts.items():
+                pipe.hincrby(STATS_KEY, result, count)
+            pipe.execute()
+        except Exception:  # noqa: BLE001 - metrics best effort
+            pass
+
+    def _record(self, **counts: int) -> None:
+        with self._lock:
+            self._stats.update({result: count for result, count in counts.items() if count})
+            self._lookups += 1
+            due = self._lookups >= STATS_FLUSH_LOOKUPS or time.monotonic() - self._flushed_at >= STATS_FLUSH_SECONDS
+        if due:
+            self.flush_stats()
+
+
+embedding_cache = EmbeddingCache(settings.EMBED_CACHE_SIZE, settings.EMBED_CACHE_TTL_SECONDS)
+atexit.register(embedding_cache.flush_stats)
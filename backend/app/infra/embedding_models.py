@@ -0,0 +1,148 @@
+"""
+Embedding model registry: one source of truth for vector dimensions.
+
+A model's dimension is resolved once per process: from the shared Redis hash
+``embedding:dimensions``, then ``CREW7_EMBED_DIMENSION`` for the configured
+model, then by probing Ollama, falling back to ``KNOWN_DIMENSIONS`` while
+Ollama is unreachable. The fallback is only a guess and is not memoized;
+Ollama is probed again after ``PROBE_RETRY_SECONDS``. Collections are sized
+from it and vectors are checked against it before they are written, so a
+mis-sized or all-zero vector fails loudly instead of polluting search.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Sequence
+
+import httpx
+
+from app.config import settings
+from app.infra.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS_KEY = "embedding:dimensions"
+PROBE_RETRY_SECONDS = 30.0
+
+# Offline fallback for common Ollama embedding models (name without tag)
+KNOWN_DIMENSIONS: dict[str, int] = {
+    "all-minilm": 384,
+    "nomic-embed-text": 768,
+    "mxbai-embed-large": 1024,
+    "snowflake-arctic-embed": 1024,
+    "bge-m3": 1024,
+    "bge-large": 1024,
+}
+
+_dimensions: dict[str, int] = {}
+_dimensions_lock = threading.Lock()
+# Monotonic time of the last failed probe per model, to rate-limit retries
+_failed_probes: dict[str, float] = {}
+
+
+class EmbeddingDimensionError(ValueError):
+    """A vector does not match its embedding model's dimension (or is all zeros)."""
+
+
+class EmbeddingUnavailableError(RuntimeError):
+    """The embedding model could not produce vectors."""
+
+
+def embedding_dimension(model: str | None = None) -> int:
+    """Dimension of ``model`` (default: ``settings.MODEL_EMBED``)."""
+    model = model or settings.MODEL_EMBED
+    with _dimensions_lock:
+        dimension = _dimensions.get(model)
+    if dimension:
+        return dimension
+
+    dimension = _shared_dimension(model)
+    if not dimension and model == settings.MODEL_EMBED and settings.EMBED_DIMENSION > 0:
+        dimension = settings.EMBED_DIMENSION
+    if dimension:
+        with _dimensions_lock:
+            _dimensions[model] = dimension
+        return dimension
+
+    with _dimensions_lock:
+        failed_at = _failed_probes.get(model)
+    if failed_at is None or time.monotonic() - failed_at >= PROBE_RETRY_SECONDS:
+        dimension = _probe_dimension(model)
+        if dimension:
+            record_dimension(model, dimension)
+            return dimension
+        with _dimensions_lock:
+            _failed_probes[model] = time.monotonic()
+
+    # A guess from the model name; not memoized so a later probe can correct it
+    dimension = KNOWN_DIMENSIONS.get(model.split(":", 1)[0])
+    if not dimension:
+        raise EmbeddingDimensionError(
+            f"Unknown dimension for embedding model {model!r}; set CREW7_EMBED_DIMENSION or start Ollama"
+        )
+    return dimension
+
+
+def record_dimension(model: str, dimension: int) -> None:
+    """Remember ``model``'s dimension for this process and every other worker."""
+    with _dimensions_lock:
+        _dimensions[model] = dimension
+        _failed_probes.pop(model, None)
+    try:
+        get_redis().hset(DIMENSIONS_KEY, model, dimension)
+    except Exception as exc:  # noqa: BLE001 - the process-local entry is enough to proceed
+        logger.warning("Could not share embedding dimension for %s: %r", model, exc)
+
+
+def observe_vectors(model: str, vectors: Sequence[Sequence[float]]) -> None:
+    """Record the dimension of freshly embedded vectors, rejecting inconsistent ones."""
+    if not vectors:
+        return
+    with _dimensions_lock:
+        known = _dimensions.get(model)
+    if known is None:
+        record_dimension(model, len(vectors[0]))
+        known = len(vectors[0])
+    for vector in vectors:
+        if len(vector) != known:
+            raise EmbeddingDimensionError(f"{model} returned a {len(vector)}-dim vector, expected {known}")
+
+
+def check_vector(vector: Sequence[float], dimension: int | None = None) -> None:
+    """Raise ``EmbeddingDimensionError`` unless ``vector`` is a usable ``dimension``-sized embedding."""
+    expected = dimension or embedding_dimension()
+    if len(vector) != expected:
+        raise EmbeddingDimensionError(f"Expected a {expected}-dim vector, got {len(vector)}")
+    if not any(vector):
+        raise EmbeddingDimensionError("Refusing to store an all-zero vector")
+
+
+def clear_dimensions() -> None:
+    """Forget process-local dimensions (e.g. after switching embedding models)."""
+    with _dimensions_lock:
+        _dimensions.clear()
+        _failed_probes.clear()
+
+
+def _shared_dimension(model: str) -> int | None:
+    try:
+        value = get_redis().hget(DIMENSIONS_KEY, model)
+    except Exception:  # noqa: BLE001 - fall through to probing
+        return None
+    return int(value) if value else None
+
+
+def _probe_dimension(model: str) -> int | None:
+    try:
+        response = httpx.post(
+            f"{settings.OLLAMA_BASE_URL.rstrip('/')}/api/embed",
+            json={"model": model, "input": ["dimension probe"]},
+            timeout=10,
+        )
+        response.raise_for_status()
+        return len(response.json()["embeddings"][0])
+    except Exception as exc:  # noqa: BLE001 - caller falls back to KNOWN_DIMENSIONS
+        logger.warning("Could not probe embedding dimension for %s: %r", model, exc)
+        return None
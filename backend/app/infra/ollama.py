@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from functools import lru_cache
 from typing import AsyncIterator, List
@@ -7,6 +8,8 @@ from typing import AsyncIterator, List
 import httpx
 
 from app.config import settings
+from app.infra.embedding_cache import embedding_cache
+from app.infra.embedding_models import observe_vectors
 
 
 class OllamaClient:
@@ -27,12 +30,18 @@ class OllamaClient:
                         continue
 
     async def embed(self, model: str, text: str) -> List[float]:
+        cached = await asyncio.to_thread(embedding_cache.get, model, text)
+        if cached is not None:
+            return cached
         url = f"{self._base}/api/embeddings"
         async with httpx.AsyncClient(timeout=60) as client:
             response = await client.post(url, json={"model": model, "prompt": text})
             response.raise_for_status()
             data = response.json()
-            return data["embedding"]
+        vector = data["embedding"]
+        observe_vectors(model, [vector])
+        await asyncio.to_thread(embedding_cache.put, model, text, vector)
+        return vector
 
 
 @lru_cache
@@ -1,5 +1,5 @@
 from __future__ import annotations
 
-from app.infra.qdrant_client import ensure_collection, get_qdrant
+from app.infra.qdrant_client import ensure_collection, forget_collection, get_qdrant, hybrid_search
 
-__all__ = ["get_qdrant", "ensure_collection"]
+__all__ = ["get_qdrant", "ensure_collection", "forget_collection", "hybrid_search"]
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
-from typing import Optional
+import threading
+from typing import Callable, Optional, TypeVar
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.http.models import (
+    Distance,
+    Filter,
+    Fusion,
+    FusionQuery,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    PayloadSchemaType,
+    Prefetch,
+    ScoredPoint,
+    VectorParams,
+)
 
 from app.config import settings
+from app.infra.embedding_models import embedding_dimension
+from app.infra.sparse_vectors import SPARSE_VECTOR, query_sparse_vector, sparse_vectors_config
+
+T = TypeVar("T")
 
 _qdrant: Optional[QdrantClient] = None
 
@@ -17,11 +34,156 @@ def get_qdrant() -> QdrantClient:
     return _qdrant
 
 
-def ensure_collection(name: str, vector_size: int = 384) -> None:
-    client = get_qdrant()
-    collections = client.get_collections().collections
-    if name not in [collection.name for collection in collections]:
-        client.create_collection(
-            collection_name=name,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
-        )
+# Payload fields memory searches filter on; indexed so filters don't scan payloads
+PAYLOAD_INDEXES: dict[str, PayloadSchemaType] = {
+    "crew_id": PayloadSchemaType.KEYWORD,
+    "mission_id": PayloadSchemaType.KEYWORD,
+    "agent_role": PayloadSchemaType.KEYWORD,
+    "type": PayloadSchemaType.KEYWORD,
+    "timestamp": PayloadSchemaType.DATETIME,
+}
+
+# Collections this process has seen exist; dropped again by forget_collection
+_known_collections: set[str] = set()
+_known_collections_lock = threading.Lock()
+# Whether a collection carries the sparse (lexical) vector, per collection name
+_sparse_collections: dict[str, bool] = {}
+
+
+def ensure_collection(
+    name: str,
+    vector_size: int | None = None,
+    *,
+    tenant_key: str | None = None,
+    client: QdrantClient | None = None,
+) -> None:
+    """
+    Create ``name`` if missing, sized for the configured embedding model by default.
+
+    Known collections return without a Qdrant round trip; otherwise a single
+    ``collection_exists`` check (not a scan of every collection) precedes an
+    idempotent create, so concurrent writers racing to create it both succeed.
+    Every field in ``PAYLOAD_INDEXES`` gets a payload index; collections
+    created before indexes existed get the missing ones on first sight.
+    With ``MEMORY_HYBRID`` on, new collections also get the sparse ``bm25``
+    vector for hybrid search; existing ones are left as they are.
+
+    ``tenant_key`` marks a collection shared by many tenants: that payload
+    field gets a tenant keyword index and HNSW graphs are built per tenant
+    (``payload_m``) instead of globally, as every search filters on it.
+    """
+    if name in _known_collections:
+        return
+    client = client or get_qdrant()
+    if client.collection_exists(name):
+        info = client.get_collection(name)
+        indexed = set(info.payload_schema or {})
+        sparse = SPARSE_VECTOR in (info.config.params.sparse_vectors or {})
+    else:
+        try:
+            client.create_collection(
+                collection_name=name,
+                vectors_config=VectorParams(size=vector_size or embedding_dimension(), distance=Distance.COSINE),
+                sparse_vectors_config=sparse_vectors_config() if settings.MEMORY_HYBRID else None,
+                hnsw_config=HnswConfigDiff(payload_m=16, m=0) if tenant_key else None,
+            )
+        except Exception:
+            # Another writer created it first
+            if not client.collection_exists(name):
+                raise
+        indexed = set()
+        sparse = settings.MEMORY_HYBRID
+    _ensure_payload_indexes(client, name, indexed, tenant_key)
+    with _known_collections_lock:
+        _known_collections.add(name)
+        _sparse_collections[name] = sparse
+
+
+def _ensure_payload_indexes(client: QdrantClient, name: str, indexed: set[str], tenant_key: str | None) -> None:
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field in indexed:
+            continue
+        field_schema = KeywordIndexParams(type="keyword", is_tenant=True) if field == tenant_key else schema
+        # Don't wait: indexing an existing collection runs in the background
+        client.create_payload_index(collection_name=name, field_name=field, field_schema=field_schema, wait=False)
+
+
+def forget_collection(name: str) -> None:
+    """Invalidate the cached existence of ``name`` (call after deleting it)."""
+    with _known_collections_lock:
+        _known_collections.discard(name)
+        _sparse_collections.pop(name, None)
+
+
+def is_missing_collection(exc: Exception) -> bool:
+    """True when ``exc`` is Qdrant reporting that the target collection does not exist."""
+    if isinstance(exc, UnexpectedResponse):
+        return exc.status_code == 404
+    # Local mode raises ValueError("Collection <name> not found")
+    return isinstance(exc, ValueError) and str(exc).startswith("Collection ") and str(exc).endswith(" not found")
+
+
+def retry_if_deleted(name: str, write: Callable[[], T]) -> T:
+    """
+    Run ``write``, which ensures ``name`` and writes to it, retrying once if
+    another process deleted the collection after this one memoized it.
+    """
+    try:
+        return write()
+    except Exception as exc:
+        if not is_missing_collection(exc):
+            raise
+    forget_collection(name)
+    return write()
+
+
+def has_sparse_vectors(name: str, client: QdrantClient | None = None) -> bool:
+    """
+    True when ``name`` was created with the sparse ``bm25`` vector (collections
+    predating it lack it). Always false with ``MEMORY_HYBRID`` off, so writes
+    stay dense-only.
+    """
+    if not settings.MEMORY_HYBRID:
+        return False
+    with _known_collections_lock:
+        sparse = _sparse_collections.get(name)
+    if sparse is None:
+        params = (client or get_qdrant()).get_collection(name).config.params
+        sparse = SPARSE_VECTOR in (params.sparse_vectors or {})
+        with _known_collections_lock:
+            _sparse_collections[name] = sparse
+    return sparse
+
+
+def hybrid_search(
+    collection: str,
+    vector: list[float],
+    text: str | None,
+    *,
+    limit: int,
+    query_filter: Filter | None = None,
+    client: QdrantClient | None = None,
+) -> list[ScoredPoint]:
+    """
+    Top ``limit`` points for a dense ``vector`` plus the lexical match of ``text``.
+
+    Dense and sparse candidates (``MEMORY_HYBRID_CANDIDATES`` each) are fused
+    with reciprocal-rank fusion, so scores are RRF ranks, not cosine
+    similarities. Without ``text``, with ``MEMORY_HYBRID`` off, or on a
+    collection lacking the sparse vector this is a plain dense search.
+    """
+    client = client or get_qdrant()
+    sparse = query_sparse_vector(text) if text and settings.MEMORY_HYBRID else None
+    if sparse is None or not sparse.indices or not has_sparse_vectors(collection, client):
+        return client.search(collection_name=collection, query_vector=vector, limit=limit, query_filter=query_filter)
+    candidates = max(settings.MEMORY_HYBRID_CANDIDATES, limit)
+    return client.query_points(
+        collection_name=collection,
+        prefetch=[
+            Prefetch(query=vector, filter=query_filter, limit=candidates),
+            Prefetch(query=sparse, using=SPARSE_VECTOR, filter=query_filter, limit=candidates),
+        ],
+        query=FusionQuery(fusion=Fusion.RRF),
+        limit=limit,
+        with_payload=True,
+    ).points
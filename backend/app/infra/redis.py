@@ -1,5 +1,5 @@
 from __future__ import annotations
 
-from app.infra.redis_client import get_redis
+from app.infra.redis_client import get_async_redis, get_redis
 
-__all__ = ["get_redis"]
+__all__ = ["get_redis", "get_async_redis"]
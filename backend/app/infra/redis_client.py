@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import weakref
+
 from redis import Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool
+from redis.asyncio import Redis as AsyncRedis
 
 from app.config import settings
 
 _redis: Redis | None = None
+_binary_redis: Redis | None = None
+_async_redis: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncRedis]" = weakref.WeakKeyDictionary()
 
 
 def get_redis() -> Redis:
@@ -15,5 +22,42 @@ def get_redis() -> Redis:
     return _redis
 
 
+def get_binary_redis() -> Redis:
+    """Sync client without response decoding, for values stored as raw bytes."""
+    global _binary_redis
+    if _binary_redis is None:
+        _binary_redis = Redis.from_url(settings.REDIS_URL, decode_responses=False)
+    return _binary_redis
+
+
+def get_async_redis() -> AsyncRedis:
+    """
+    Return the asyncio Redis client for the running event loop.
+
+    redis.asyncio connections are bound to the loop that opened them, so one
+    pool is kept per loop: the API process shares a single pool across every
+    stream consumer, while RQ jobs that call ``asyncio.run`` get their own
+    (closed with ``close_async_redis`` before that loop ends).
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_redis.get(loop)
+    if client is None:
+        pool = AsyncConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_ASYNC_MAX_CONNECTIONS,
+        )
+        client = AsyncRedis(connection_pool=pool)
+        _async_redis[loop] = client
+    return client
+
+
+async def close_async_redis() -> None:
+    """Close the running loop's asyncio client and disconnect its pool."""
+    client = _async_redis.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose(close_connection_pool=True)
+
+
 # Alias for backwards compatibility
 get_redis_client = get_redis
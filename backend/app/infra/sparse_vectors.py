@@ -0,0 +1,65 @@
+"""
+BM25-style sparse vectors for lexical memory recall.
+
+Dense embeddings blur exact identifiers (endpoint paths, error codes, table
+names), so memory collections also carry a sparse ``bm25`` vector: tokens
+hashed to indices, weighted by BM25 term-frequency saturation. Qdrant applies
+the IDF half itself (``Modifier.IDF``), so no corpus statistics live here.
+Identifier-like tokens (``crew_memory``, ``/api/runs``, ``E1234``) are kept
+whole and also split into their parts.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client.http.models import Modifier, SparseVector, SparseVectorParams
+
+SPARSE_VECTOR = "bm25"
+
+# BM25 parameters; documents are normalised against a typical memory length
+BM25_K1 = 1.2
+BM25_B = 0.75
+AVG_DOC_TOKENS = 128
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._/:-][a-z0-9]+)*")
+_PART_RE = re.compile(r"[._/:-]+")
+
+
+def sparse_vectors_config() -> dict[str, SparseVectorParams]:
+    return {SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = _PART_RE.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+def _index(token: str) -> int:
+    return zlib.crc32(token.encode())
+
+
+def document_sparse_vector(text: str) -> SparseVector:
+    """Sparse vector of a stored memory (BM25 term-frequency weights)."""
+    tokens = tokenize(text)
+    counts = Counter(_index(token) for token in tokens)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / AVG_DOC_TOKENS)
+    weights = {index: tf * (BM25_K1 + 1) / (tf + norm) for index, tf in counts.items()}
+    return SparseVector(indices=list(weights), values=list(weights.values()))
+
+
+def hybrid_vector(vector: list[float], text: str) -> dict[str, list[float] | SparseVector]:
+    """Point vector carrying the dense embedding (unnamed) and ``text``'s sparse vector."""
+    return {"": vector, SPARSE_VECTOR: document_sparse_vector(text)}
+
+
+def query_sparse_vector(text: str) -> SparseVector:
+    """Sparse vector of a query: each distinct token once."""
+    indices = sorted({_index(token) for token in tokenize(text)})
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
@@ -9,9 +9,10 @@ Provides endpoints for:
 """
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 
 from app.services.memory_service import (
@@ -23,7 +24,9 @@ from app.services.memory_service import (
     search_crew_memory,
     search_mission_memory,
 )
+from app.infra.embedding_models import EmbeddingDimensionError, EmbeddingUnavailableError
 from app.services.embedding_service import generate_embedding, generate_embeddings_batch
+from app.services.memory_ingest import ingest_ndjson, ingest_progress
 
 router = APIRouter(prefix="/memory", tags=["memory"])
 
@@ -51,6 +54,7 @@ class SearchMemoryRequest(BaseModel):
 
 class SearchCrewMemoryRequest(SearchMemoryRequest):
     mission_id: str | None = Field(None, description="Filter by mission")
+    query: str | None = Field(None, description="Query text; enables hybrid lexical + vector recall")
 
 
 class MemoryResult(BaseModel):
@@ -103,6 +107,8 @@ async def add_crew_memory_endpoint(crew_id: str, request: AddCrewMemoryRequest):
             agent_role=request.agent_role,
         )
         return {"memory_id": memory_id, "crew_id": crew_id}
+    except EmbeddingDimensionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add memory: {str(e)}")
 
@@ -112,7 +118,9 @@ async def search_crew_memory_endpoint(crew_id: str, request: SearchCrewMemoryReq
     """
     Search a crew's memory for relevant past experiences.
     
-    Use semantic similarity to find related memories.
+    Use semantic similarity to find related memories; pass ``query`` (the
+    text behind ``query_embedding``) to also match exact terms such as
+    endpoint names or error codes.
     Great for:
     - Recalling similar past missions
     - Finding relevant architecture decisions
@@ -125,6 +133,7 @@ async def search_crew_memory_endpoint(crew_id: str, request: SearchCrewMemoryReq
             top_k=request.top_k,
             mission_id=request.mission_id,
             agent_role=request.agent_role,
+            query_text=request.query,
         )
         return results
     except Exception as e:
@@ -187,6 +196,8 @@ async def add_mission_memory_endpoint(mission_id: str, request: AddMemoryRequest
             agent_role=request.agent_role,
         )
         return {"memory_id": memory_id, "mission_id": mission_id}
+    except EmbeddingDimensionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add memory: {str(e)}")
 
@@ -260,10 +271,47 @@ async def add_crew_memories_batch(crew_id: str, memories: list[AddCrewMemoryRequ
             "memories_added": len(memory_ids),
             "memory_ids": memory_ids
         }
+    except EmbeddingDimensionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add batch memories: {str(e)}")
 
 
+@router.post("/crews/{crew_id}/ingest", response_model=dict[str, Any])
+async def ingest_crew_memories(
+    crew_id: str,
+    request: Request,
+    chunk_size: int | None = Query(None, ge=1, le=4096, description="Memories per embed batch and Qdrant upsert"),
+):
+    """
+    Stream a large import into a crew's memory.
+
+    The request body is NDJSON, one memory per line (same fields as
+    ``/crews/{crew_id}/batch``; ``embedding`` may be omitted and is then
+    generated). Lines are ingested in chunks while the body is still
+    uploading; poll ``GET /crews/{crew_id}/ingest`` for progress. Returns
+    the final counts, throughput and any rejected lines.
+    """
+    try:
+        result: dict[str, Any] = {}
+        async for event in ingest_ndjson(crew_id, request.stream(), chunk_size=chunk_size):
+            result = event
+        return result
+    except EmbeddingUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to ingest memories: {str(e)}")
+
+
+@router.get("/crews/{crew_id}/ingest", response_model=dict[str, Any])
+async def get_crew_ingest_progress(crew_id: str):
+    """Progress (counts and memories/second) of the crew's current or last bulk import."""
+    progress = await ingest_progress(crew_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="No import found for this crew")
+    return progress
+
+
 # ============================================================================
 # Embedding Helper Endpoints
 # ============================================================================
@@ -293,6 +341,8 @@ async def generate_embedding_endpoint(request: EmbeddingRequest):
             "embedding": embedding,
             "dimension": len(embedding)
         }
+    except EmbeddingUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate embedding: {str(e)}")
 
@@ -301,14 +351,18 @@ async def generate_embedding_endpoint(request: EmbeddingRequest):
 async def generate_embeddings_batch_endpoint(request: EmbeddingBatchRequest):
     """
     Generate embeddings for multiple texts in batch.
-    More efficient than calling /embed multiple times.
+    More efficient than calling /embed multiple times: texts are sent to
+    Ollama in chunks of CREW7_EMBED_BATCH_SIZE per request.
     """
     try:
-        embeddings = generate_embeddings_batch(request.texts)
+        # Chunks are embedded concurrently on worker threads; keep the loop free
+        embeddings = await asyncio.to_thread(generate_embeddings_batch, request.texts)
         return {
             "count": len(embeddings),
             "embeddings": embeddings,
             "dimension": len(embeddings[0]) if embeddings else 0
         }
+    except EmbeddingUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate embeddings: {str(e)}")
@@ -1,25 +1,31 @@
 import json
+from contextlib import aclosing
 from typing import AsyncGenerator
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
 from fastapi.responses import StreamingResponse
 
-from app.services.pubsub import bus
+from app.services.pubsub import async_bus as bus
 
 router = APIRouter(prefix="/events", tags=["stream"])
 
 
-async def sse_gen(run_id: UUID) -> AsyncGenerator[bytes, None]:
+async def sse_gen(run_id: UUID, last_event_id: str | None = None) -> AsyncGenerator[bytes, None]:
     yield b"event: boot\ndata: {}\n\n"
-    async for evt in bus.consume(run_id):
-        payload = json.dumps(evt).encode()
-        yield b"data: " + payload + b"\n\n"
-        if evt.get("type") == "done":
-            break
+    async with aclosing(bus.stream(run_id, since=last_event_id)) as events:
+        async for entry_id, evt in events:
+            payload = json.dumps(evt).encode()
+            yield b"id: " + entry_id.encode() + b"\ndata: " + payload + b"\n\n"
+            if evt.get("type") == "done":
+                break
     yield b"event: done\ndata: {}\n\n"
 
 
 @router.get("/runs/{run_id}")
-async def stream(run_id: UUID) -> StreamingResponse:
-    return StreamingResponse(sse_gen(run_id), media_type="text/event-stream")
+async def stream(
+    run_id: UUID,
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """Stream run events; reconnecting clients resume after ``Last-Event-ID``."""
+    return StreamingResponse(sse_gen(run_id, last_event_id), media_type="text/event-stream")
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from contextlib import aclosing
 from typing import Any
 from uuid import UUID
 
@@ -10,8 +11,9 @@ from app.infra.db import SessionLocal
 from app.models.crew import Crew
 from app.models.run import Run, RunStatus
 from app.services.auth_service import parse_token
+from app.services.graph_bus import graph_bus
 from app.services.mission_bus import mission_bus
-from app.services.pubsub import bus
+from app.services.pubsub import async_bus as bus
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +21,16 @@ router = APIRouter(prefix="/ws", tags=["websocket"])
 
 
 @router.websocket("/runs/{run_id}")
-async def ws_run(ws: WebSocket, run_id: UUID) -> None:
+async def ws_run(ws: WebSocket, run_id: UUID, since: str | None = None) -> None:
+    """Stream run events; ``?since=<id>`` resumes after the last received event ``id``."""
     await ws.accept()
     try:
         await ws.send_json({"type": "boot"})
-        async for evt in bus.consume(run_id):
-            await ws.send_json(evt)
-            if evt.get("type") == "done":
-                break
+        async with aclosing(bus.stream(run_id, since=since)) as events:
+            async for entry_id, evt in events:
+                await ws.send_json({**evt, "id": entry_id})
+                if evt.get("type") == "done":
+                    break
     except WebSocketDisconnect:
         return
 
@@ -53,6 +57,10 @@ def _decode_token(token: str | None) -> UserCtx | None:
     return UserCtx(user_id=payload["sub"], org_id=payload["org"], role=payload.get("role", "member"))
 
 
+# Signals derived from the DB are cached briefly; published ones live longer
+_FALLBACK_SIGNAL_TTL = 60
+
+
 def _initial_signal(org_id: str) -> dict[str, Any]:
     session = SessionLocal()
     try:
@@ -74,6 +82,23 @@ def _initial_signal(org_id: str) -> dict[str, Any]:
         session.close()
 
 
+async def _load_initial_signal(org_id: str) -> dict[str, Any]:
+    """Answer the handshake from the Redis projection, falling back to the DB off-loop."""
+    try:
+        cached = await mission_bus.signal_snapshot(org_id)
+    except Exception as exc:  # noqa: BLE001 - projection is an optimisation
+        logger.warning(f"Mission WebSocket: signal projection unavailable: {exc!r}")
+        return await asyncio.to_thread(_initial_signal, org_id)
+    if cached is not None:
+        return cached
+    signal = await asyncio.to_thread(_initial_signal, org_id)
+    try:
+        await mission_bus.remember_signal(org_id, signal, ttl=_FALLBACK_SIGNAL_TTL)
+    except Exception:  # noqa: BLE001 - caching is best effort
+        pass
+    return signal
+
+
 @router.websocket("/mission")
 async def ws_mission(ws: WebSocket) -> None:
     protocol, token = _extract_token(ws)
@@ -89,7 +114,7 @@ async def ws_mission(ws: WebSocket) -> None:
     subscription = await mission_bus.subscribe(user_ctx.org_id)
     queue = subscription.queue
     try:
-        last_signal = _initial_signal(user_ctx.org_id)
+        last_signal = await _load_initial_signal(user_ctx.org_id)
         await ws.send_json(last_signal)
         while True:
             try:
@@ -121,40 +146,21 @@ async def ws_graph(ws: WebSocket, crew_id: str) -> None:
     await ws.accept(subprotocol=protocol)
     logger.info(f"Graph WebSocket: connected for crew_id={crew_id}, org_id={user_ctx.org_id}")
 
-    # Subscribe to graph events for this crew
-    from app.infra.redis_client import get_redis_client
-    
-    redis = get_redis_client()
-    channel = f"graph:{crew_id}"
-    pubsub = redis.pubsub()
-    
+    subscription = await graph_bus.subscribe(crew_id)
     try:
-        await pubsub.subscribe(channel)
-        logger.info(f"Graph WebSocket: subscribed to {channel}")
-        
-        # Listen for graph events and forward to WebSocket
         while True:
             try:
-                message = await asyncio.wait_for(pubsub.get_message(ignore_subscribe_messages=True), timeout=30.0)
-                
-                if message and message["type"] == "message":
-                    # Forward the graph event to WebSocket client
-                    import json
-                    event = json.loads(message["data"])
-                    await ws.send_json(event)
-                    logger.info(f"Graph WebSocket: forwarded event {event.get('type')} for crew {crew_id}")
-                elif message is None:
-                    # Heartbeat
-                    await ws.send_json({"type": "ping"})
-                    
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=30.0)
             except asyncio.TimeoutError:
-                # Send heartbeat
                 await ws.send_json({"type": "ping"})
-                
+                continue
+            await ws.send_json(event)
+            logger.debug(f"Graph WebSocket: forwarded event {event.get('type')} for crew {crew_id}")
     except WebSocketDisconnect:
         logger.info(f"Graph WebSocket: disconnected for crew_id={crew_id}")
     except Exception as exc:
         logger.error(f"Graph WebSocket: error for crew_id={crew_id}: {exc!r}")
     finally:
-        await pubsub.unsubscribe(channel)
-        await pubsub.close()
+        graph_bus.unsubscribe(subscription)
+        if subscription.dropped:
+            logger.info(f"Graph WebSocket: dropped {subscription.dropped} stale events for crew_id={crew_id}")
@@ -0,0 +1,285 @@
+"""
+Asyncio worker that runs several orchestration jobs concurrently.
+
+A run spends nearly all of its time waiting on LLM HTTP calls, so one process
+can drive many of them. ``AsyncRunWorker`` keeps up to ``concurrency`` jobs
+from the RQ ``runs`` queue in flight. Whenever a slot frees up it looks at the
+first ``SCAN_DEPTH`` queued jobs and claims the one from the org with the
+fewest running jobs, so a single busy org cannot starve the others; jobs of
+orgs at ``per_org_limit`` stay in Redis for other workers instead of being
+held here. When whatever arrives next could start right away (nothing
+running, or an empty queue and no org at its limit) it blocks on the queue.
+
+Each job goes through rq's public ``SimpleWorker.execute_job`` in a thread
+(one ``JobSlot`` worker per concurrent job), so job status, registries and
+results are kept exactly as rq keeps them. Run jobs hand their coroutine back
+to this worker's event loop (``run_job_coroutine``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+import socket
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process
+from typing import Generic, TypeVar
+from uuid import uuid4
+
+from redis import Redis
+from rq import Queue, SimpleWorker
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
+from rq.scheduler import RQScheduler
+from rq.timeouts import BaseDeathPenalty
+
+from app.infra.redis_client import close_async_redis
+from app.services.worker_runtime import warm_runtime, worker_loop
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SYSTEM_ORG = "_system"
+DEQUEUE_TIMEOUT = 5  # seconds; blocking dequeue timeout, bounds how long a stop request waits
+RESCAN_INTERVAL = 1.0  # seconds between head rescans while only capped orgs' jobs are queued
+SCAN_DEPTH = 100  # queued jobs considered per admission
+
+
+class FairBuffer(Generic[T]):
+    """
+    Per-org FIFO buffers with least-loaded-org admission.
+
+    ``pop`` returns the next item from the org with the fewest admitted (not
+    yet released) items, breaking ties by least recent admission. A positive
+    ``per_org_limit`` additionally caps admitted items per org.
+    """
+
+    def __init__(self, per_org_limit: int = 0) -> None:
+        self.per_org_limit = per_org_limit
+        self._queues: dict[str, deque[T]] = {}
+        self._running: dict[str, int] = {}
+        self._turn: dict[str, int] = {}
+        self._admissions = 0
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._queues.values())
+
+    def push(self, org: str, item: T) -> None:
+        self._queues.setdefault(org, deque()).append(item)
+
+    def pop(self) -> tuple[str, T] | None:
+        candidates = [org for org, items in self._queues.items() if items and not self._capped(org)]
+        if not candidates:
+            return None
+        org = min(candidates, key=lambda key: (self._running.get(key, 0), self._turn.get(key, -1)))
+        item = self._queues[org].popleft()
+        if not self._queues[org]:
+            del self._queues[org]
+        self.admit(org)
+        return org, item
+
+    def admit(self, org: str) -> None:
+        """Count an item of ``org`` as admitted without it passing through the buffer."""
+        self._running[org] = self._running.get(org, 0) + 1
+        self._admissions += 1
+        self._turn[org] = self._admissions
+
+    def at_limit(self) -> bool:
+        """True when some org has ``per_org_limit`` items admitted."""
+        return any(self._capped(org) for org in self._running)
+
+    def _capped(self, org: str) -> bool:
+        return bool(self.per_org_limit) and self._running.get(org, 0) >= self.per_org_limit
+
+    def release(self, org: str) -> None:
+        remaining = self._running.get(org, 0) - 1
+        if remaining > 0:
+            self._running[org] = remaining
+        else:
+            self._running.pop(org, None)
+
+    def drain(self) -> list[T]:
+        items = [item for queue in self._queues.values() for item in queue]
+        self._queues.clear()
+        return items
+
+
+class _LoopDeathPenalty(BaseDeathPenalty):
+    """No signal-based timeout: job threads can't take SIGALRM; runs time out on the loop."""
+
+    def setup_death_penalty(self) -> None:
+        pass
+
+    def cancel_death_penalty(self) -> None:
+        pass
+
+
+class JobSlot(SimpleWorker):
+    """
+    One concurrent job of ``AsyncRunWorker``.
+
+    ``execute_job`` is rq's own in-process path (job status, registries,
+    results, retries, dependents), called from a thread. rq keeps the running
+    job's state on the worker, hence a worker per slot.
+    """
+
+    death_penalty_class = _LoopDeathPenalty
+
+
+class AsyncRunWorker:
+    """Run up to ``concurrency`` jobs from ``queue`` at once in this process."""
+
+    def __init__(
+        self,
+        queue: Queue,
+        *,
+        concurrency: int,
+        per_org_limit: int = 0,
+        name: str | None = None,
+    ) -> None:
+        self.queue = queue
+        self.connection: Redis = queue.connection
+        self.concurrency = max(1, concurrency)
+        self.name = name or f"async-{socket.gethostname()}-{uuid4().hex[:8]}"
+        self._slots = [
+            JobSlot([queue], connection=self.connection, name=f"{self.name}.{index}", serializer=queue.serializer)
+            for index in range(self.concurrency)
+        ]
+        self._buffer: FairBuffer[str] = FairBuffer(per_org_limit)
+        # Org of each job id seen at the head of the queue, so rescans only fetch new jobs
+        self._queued_orgs: dict[str, str] = {}
+        self._inflight: set[asyncio.Task[None]] = set()
+        self._stopping = False
+        self._scheduler_process: Process | None = None
+
+    def request_stop(self) -> None:
+        """Stop taking new jobs; running jobs are allowed to finish."""
+        self._stopping = True
+
+    async def run(self, *, burst: bool = False, with_scheduler: bool = False) -> None:
+        loop = asyncio.get_running_loop()
+        # Crew kickoffs and job slots block an executor thread for the whole run
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.concurrency * 2 + 4, thread_name_prefix="run-worker")
+        )
+        # Job threads hand their coroutines back to this loop (run_job_coroutine)
+        worker_loop.set(loop)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError):  # pragma: no cover - non-main thread / Windows
+                pass
+        if with_scheduler:
+            self._start_scheduler()
+        logger.info("Async worker %s started (concurrency=%s)", self.name, self.concurrency)
+
+        try:
+            while True:
+                if self._stopping and not self._inflight:
+                    break
+                if not self._stopping and len(self._inflight) < self.concurrency:
+                    # Idle, every org is admissible: no need to look past the head
+                    admitted = await self._claim() if self._inflight else None
+                    if admitted is None and self._next_is_admissible():
+                        job = await asyncio.to_thread(self._dequeue, None if burst else DEQUEUE_TIMEOUT)
+                        if job is not None:
+                            admitted = _org_of(job), job
+                            self._buffer.admit(admitted[0])
+                        elif burst and not self._inflight:
+                            break
+                    if admitted is not None:
+                        self._start(*admitted)
+                        continue
+                if self._inflight:
+                    # Capped orgs' jobs wait for a run to finish; new arrivals are picked up on rescan
+                    full = self._stopping or len(self._inflight) >= self.concurrency
+                    await asyncio.wait(
+                        self._inflight, timeout=None if full else RESCAN_INTERVAL, return_when=asyncio.FIRST_COMPLETED
+                    )
+        finally:
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+            await close_async_redis()
+            self._stop_scheduler()
+            logger.info("Async worker %s stopped", self.name)
+
+    def _next_is_admissible(self) -> bool:
+        # Whatever arrives next may start now: nothing runs, or the queue was empty
+        # at the last scan and no org is at its limit. Then blocking on the queue is safe.
+        return not self._inflight or (not self._queued_orgs and not self._buffer.at_limit())
+
+    def _start(self, org: str, job: Job) -> None:
+        task = asyncio.create_task(self._execute(org, job), name=f"job-{job.id}")
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _claim(self) -> tuple[str, Job] | None:
+        """Remove the fairest admissible job from the head of the queue, if any."""
+        for job_id, org in await asyncio.to_thread(self._scan):
+            self._buffer.push(org, job_id)
+        try:
+            while (admitted := self._buffer.pop()) is not None:
+                org, job_id = admitted
+                self._queued_orgs.pop(job_id, None)
+                job = await asyncio.to_thread(self._take, job_id)
+                if job is not None:
+                    return org, job
+                self._buffer.release(org)
+            return None
+        finally:
+            self._buffer.drain()
+
+    def _scan(self) -> list[tuple[str, str]]:
+        """``(job id, org)`` of the first ``SCAN_DEPTH`` queued jobs; only unseen jobs are fetched."""
+        job_ids = self.queue.get_job_ids(0, SCAN_DEPTH)
+        unseen = [job_id for job_id in job_ids if job_id not in self._queued_orgs]
+        if unseen:
+            jobs = Job.fetch_many(unseen, connection=self.connection, serializer=self.queue.serializer)
+            self._queued_orgs.update((job.id, _org_of(job)) for job in jobs if job is not None)
+        self._queued_orgs = {job_id: self._queued_orgs[job_id] for job_id in job_ids if job_id in self._queued_orgs}
+        return list(self._queued_orgs.items())
+
+    def _take(self, job_id: str) -> Job | None:
+        # Removing it is the claim: only one worker's LREM takes a given id
+        if not self.queue.remove(job_id):
+            return None
+        return self.queue.fetch_job(job_id)
+
+    def _dequeue(self, timeout: int | None) -> Job | None:
+        try:
+            result = Queue.dequeue_any([self.queue], timeout, connection=self.connection, serializer=self.queue.serializer)
+        except DequeueTimeout:
+            return None
+        return result[0] if result else None
+
+    async def _execute(self, org: str, job: Job) -> None:
+        slot = self._slots.pop()
+        try:
+            # Failures are recorded on the job by rq
+            await asyncio.to_thread(slot.execute_job, job, self.queue)
+        finally:
+            self._slots.append(slot)
+            self._buffer.release(org)
+
+    def _start_scheduler(self) -> None:
+        scheduler = RQScheduler([self.queue], connection=self.connection)
+        if scheduler.acquire_locks():
+            self._scheduler_process = scheduler.start()
+
+    def _stop_scheduler(self) -> None:
+        if self._scheduler_process is not None and self._scheduler_process.is_alive():
+            self._scheduler_process.terminate()
+            self._scheduler_process.join()
+
+
+def _org_of(job: Job) -> str:
+    return str(job.meta.get("org_id") or SYSTEM_ORG)
+
+
+def run_async_worker(queue: Queue, *, concurrency: int, per_org_limit: int = 0) -> None:
+    """Warm the run stack and serve ``queue`` until SIGINT/SIGTERM."""
+    warm_runtime()
+    worker = AsyncRunWorker(queue, concurrency=concurrency, per_org_limit=per_org_limit)
+    asyncio.run(worker.run(with_scheduler=True))
@@ -100,5 +100,14 @@ def start_run(
     # enqueue a background job instead of in-process streaming
     q = get_queue()
     # enqueue the orchestrator (importable by worker)
-    q.enqueue(orchestrate_run, str(run.id), str(crew_id), payload.prompt, inputs, job_timeout=60 * 30)
+    # org_id lets the async worker schedule runs fairly across orgs
+    q.enqueue(
+        orchestrate_run,
+        str(run.id),
+        str(crew_id),
+        payload.prompt,
+        inputs,
+        job_timeout=60 * 30,
+        meta={"org_id": org_id},
+    )
     return run
@@ -1,52 +1,119 @@
 """
 Embedding Service - Generate vector embeddings for text content.
 
-Uses Ollama embeddings model for semantic representation.
+Uses Ollama embeddings model for semantic representation. Requests go through
+one keep-alive ``httpx.Client`` per process; batches are sent as chunks of
+``EMBED_BATCH_SIZE`` texts to Ollama's ``/api/embed`` endpoint, with up to
+``EMBED_CONCURRENCY`` chunks in flight. Vectors are cached by content (see
+``app.infra.embedding_cache``).
 """
 from __future__ import annotations
 
-import requests
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 
 from app.config import settings
+from app.infra.embedding_cache import embedding_cache
+from app.infra.embedding_models import EmbeddingUnavailableError, observe_vectors
 
+_http_client: httpx.Client | None = None
+_http_client_lock = threading.Lock()
 
-def generate_embedding(text: str) -> list[float]:
-    """
-    Generate a vector embedding for the given text.
-    
-    Uses the configured embedding model (default: nomic-embed-text).
-    Returns a 768-dimensional vector for semantic similarity search.
-    """
+
+def _client() -> httpx.Client:
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                base_url=settings.OLLAMA_BASE_URL,
+                timeout=60,
+                limits=httpx.Limits(
+                    max_connections=max(settings.EMBED_CONCURRENCY, 1) * 2,
+                    max_keepalive_connections=max(settings.EMBED_CONCURRENCY, 1),
+                ),
+            )
+        return _http_client
+
+
+def close_embedding_client() -> None:
+    """Close the pooled HTTP client (e.g. on shutdown or after changing OLLAMA_BASE_URL)."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def _embed_chunk(texts: list[str]) -> list[list[float]]:
+    """One ``/api/embed`` request."""
     try:
-        response = requests.post(
-            f"{settings.OLLAMA_BASE_URL}/api/embeddings",
+        response = _client().post(
+            "/api/embed",
             json={
                 "model": settings.MODEL_EMBED,
-                "prompt": text,
+                "input": texts,
             },
-            timeout=30,
         )
         response.raise_for_status()
-        result = response.json()
-        return result["embedding"]
+        embeddings = response.json()["embeddings"]
     except Exception as e:
-        # Fallback: return zero vector if embedding fails
-        # In production, you might want to raise the error instead
-        print(f"Warning: Failed to generate embedding: {e}")
-        return [0.0] * 768
+        raise EmbeddingUnavailableError(f"Failed to embed {len(texts)} text(s) with {settings.MODEL_EMBED}: {e}") from e
+    if len(embeddings) != len(texts):
+        raise EmbeddingUnavailableError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+    observe_vectors(settings.MODEL_EMBED, embeddings)
+    return embeddings
 
 
-def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
+def generate_embedding(text: str) -> list[float]:
+    """
+    Generate a vector embedding for the given text.
+    
+    Uses the configured embedding model (``settings.MODEL_EMBED``); the
+    vector size is that model's registered dimension (see
+    ``app.infra.embedding_models``). Raises ``EmbeddingUnavailableError``
+    when Ollama cannot embed, rather than returning a placeholder vector.
+    """
+    return generate_embeddings_batch([text])[0]
+
+
+def generate_embeddings_batch(
+    texts: list[str],
+    *,
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+) -> list[list[float]]:
     """
     Generate embeddings for multiple texts in batch.
-    More efficient than calling generate_embedding multiple times.
+
+    Cached vectors (see ``embedding_cache``) are reused; the remaining unique
+    texts are split into chunks of ``batch_size`` (``EMBED_BATCH_SIZE``), each
+    embedded with a single ``/api/embed`` request, with up to ``concurrency``
+    (``EMBED_CONCURRENCY``) chunks at once. Results keep input order.
+    Raises ``EmbeddingUnavailableError`` if any chunk fails.
     """
-    embeddings = []
-    for text in texts:
-        embedding = generate_embedding(text)
-        embeddings.append(embedding)
-    return embeddings
+    if not texts:
+        return []
+    model = settings.MODEL_EMBED
+    found = embedding_cache.get_many(model, texts)
+    pending = list(dict.fromkeys(text for text, vector in zip(texts, found) if vector is None))
+    if pending:
+        size = max(batch_size or settings.EMBED_BATCH_SIZE, 1)
+        chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+        workers = min(max(concurrency or settings.EMBED_CONCURRENCY, 1), len(chunks))
+        if workers == 1:
+            results = [_embed_chunk(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+                results = list(pool.map(_embed_chunk, chunks))
+
+        embedded: dict[str, list[float]] = {}
+        for chunk, vectors in zip(chunks, results):
+            embedding_cache.put_many(model, chunk, vectors)
+            embedded.update(zip(chunk, vectors))
+        found = [vector if vector is not None else embedded[text] for text, vector in zip(texts, found)]
+    return found
 
 
 def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from app.infra.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class FanoutSubscription:
+    key: str
+    queue: asyncio.Queue[dict[str, Any]]
+    dropped: int = 0
+
+    def offer(self, message: dict[str, Any]) -> None:
+        # Slow consumers lose the oldest message rather than stalling dispatch
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+            self.queue.put_nowait(message)
+
+
+class ChannelFanout:
+    """
+    Process-wide Redis pub/sub fan-out for ``{prefix}{key}`` channels.
+
+    A single ``redis.asyncio`` connection pattern-subscribes to ``{prefix}*``
+    and routes each message to the bounded queues of local subscribers for
+    that key. The listener starts with the first subscriber and stops when
+    the last one leaves, so idle processes hold no pub/sub connection.
+    """
+
+    def __init__(self, prefix: str, queue_size: int = 100) -> None:
+        self.prefix = prefix
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[FanoutSubscription]] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._subscribed = asyncio.Event()
+
+    def channel(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def subscribe(self, key: str) -> FanoutSubscription:
+        """Register a subscriber once the pattern subscription is confirmed by Redis."""
+        subscription = FanoutSubscription(key=key, queue=asyncio.Queue(maxsize=self.queue_size))
+        self._subscribers.setdefault(key, set()).add(subscription)
+        if self._task is None or self._task.done():
+            self._subscribed = asyncio.Event()
+            self._task = asyncio.create_task(self._listen(self._subscribed))
+        await self._subscribed.wait()
+        return subscription
+
+    def unsubscribe(self, subscription: FanoutSubscription) -> None:
+        subscribers = self._subscribers.get(subscription.key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.key]
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    async def publish(self, key: str, message: dict[str, Any]) -> None:
+        await get_async_redis().publish(self.channel(key), json.dumps(message))
+
+    async def _listen(self, subscribed: asyncio.Event) -> None:
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.prefix}*")
+                async for message in pubsub.listen():
+                    if message.get("type") == "psubscribe":
+                        # Redis has registered the pattern; publishes from now on reach us
+                        subscribed.set()
+                        continue
+                    self._dispatch(message)
+            except asyncio.CancelledError:  # noqa: PERF203 - propagate cancellation
+                raise
+            except Exception as exc:  # noqa: BLE001 - reconnect after transient errors
+                logger.warning("Fan-out listener for %s* failed: %r", self.prefix, exc)
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        if message.get("type") != "pmessage":
+            return
+        channel = message.get("channel")
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        subscribers = self._subscribers.get(str(channel)[len(self.prefix):])
+        if not subscribers:
+            return
+        data = message.get("data")
+        if isinstance(data, bytes):
+            data = data.decode()
+        try:
+            payload = json.loads(data)
+        except (TypeError, json.JSONDecodeError):
+            return
+        for subscription in list(subscribers):
+            subscription.offer(payload)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.services.fanout import ChannelFanout, FanoutSubscription
+
+CHANNEL_PREFIX = "graph:"
+# Graph events are state snapshots; a lagging socket only needs recent ones
+GRAPH_QUEUE_SIZE = 64
+
+GraphSubscription = FanoutSubscription
+
+
+class GraphBus:
+    """
+    Process-wide router for live agent-graph events.
+
+    One ``PSUBSCRIBE graph:*`` connection serves every ``/ws/graph`` socket in
+    the process; events are routed by crew id into a bounded queue per socket
+    that drops the stalest event when the client falls behind.
+    """
+
+    def __init__(self) -> None:
+        self._fanout = ChannelFanout(CHANNEL_PREFIX, queue_size=GRAPH_QUEUE_SIZE)
+
+    async def subscribe(self, crew_id: str) -> GraphSubscription:
+        return await self._fanout.subscribe(crew_id)
+
+    def unsubscribe(self, subscription: GraphSubscription) -> None:
+        self._fanout.unsubscribe(subscription)
+
+    async def publish(self, crew_id: str, event: dict[str, Any]) -> None:
+        await self._fanout.publish(crew_id, event)
+
+
+graph_bus = GraphBus()
@@ -0,0 +1,218 @@
+"""
+Bulk crew memory ingestion from an NDJSON stream.
+
+Each line is one memory: ``{"content": ..., "embedding"?: [...], "metadata"?,
+"mission_id"?, "agent_role"?}``. Lines are grouped into chunks of
+``MEMORY_INGEST_CHUNK_SIZE``; per chunk, missing embeddings are generated in
+one batch, the points go to Qdrant in a single ``wait=False`` ``vec_upsert``
+and, once Qdrant has acknowledged it, the recent-memory cache is updated in
+one Redis round trip. A progress event (counts and
+throughput) is yielded after every chunk and a final ``done`` event at the end;
+the latest one is also kept in Redis (``memory:ingest:{crew_id}``) so an
+import can be watched while it uploads. Bad lines, and chunks Qdrant fails to
+take, are counted and reported, not fatal.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator
+from uuid import uuid4
+
+from qdrant_client.http.models import UpdateStatus
+
+from app.config import settings
+from app.infra.embedding_models import EmbeddingDimensionError, check_vector, embedding_dimension
+from app.infra.redis_client import get_async_redis
+from app.services.embedding_service import generate_embeddings_batch
+from app.services.memory_service import crew_memory_target, remember_recent, vec_upsert
+
+logger = logging.getLogger(__name__)
+
+# Per-line errors kept for the final event; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+PROGRESS_TTL_SECONDS = 24 * 3600
+# Upsert replies meaning Qdrant has the points (accepted, or already applied)
+ACCEPTED = (UpdateStatus.ACKNOWLEDGED, UpdateStatus.COMPLETED)
+
+
+def progress_key(crew_id: str) -> str:
+    return f"memory:ingest:{crew_id}"
+
+
+async def ingest_progress(crew_id: str) -> dict[str, Any] | None:
+    """Latest progress event of ``crew_id``'s current or last import."""
+    raw = await get_async_redis().get(progress_key(crew_id))
+    return json.loads(raw) if raw else None
+
+
+async def _publish(event: dict[str, Any]) -> dict[str, Any]:
+    try:
+        await get_async_redis().set(progress_key(event["crew_id"]), json.dumps(event), ex=PROGRESS_TTL_SECONDS)
+    except Exception as exc:  # noqa: BLE001 - progress reporting must not fail the import
+        logger.warning("Could not publish ingest progress: %r", exc)
+    return event
+
+
+@dataclass
+class IngestStats:
+    crew_id: str
+    received: int = 0
+    ingested: int = 0
+    embedded: int = 0
+    failed: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def event(self, name: str) -> dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        event = {
+            "event": name,
+            "crew_id": self.crew_id,
+            "received": self.received,
+            "ingested": self.ingested,
+            "embedded": self.embedded,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "per_second": round(self.ingested / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        if name == "done":
+            event["errors"] = self.errors
+        return event
+
+
+def parse_line(raw: bytes | str, dimension: int) -> dict[str, Any]:
+    """Validate one NDJSON line; raises ``ValueError`` with a short reason."""
+    try:
+        record = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e.msg}") from e
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    if not isinstance(record.get("content"), str) or not record["content"]:
+        raise ValueError("missing content")
+    embedding = record.get("embedding")
+    if embedding is not None:
+        if not isinstance(embedding, list) or not all(
+            isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+            for value in embedding
+        ):
+            raise ValueError("embedding must be a list of finite numbers")
+        if len(embedding) != dimension:
+            raise ValueError(f"embedding has {len(embedding)} dimensions, expected {dimension}")
+    if record.get("metadata") is not None and not isinstance(record["metadata"], dict):
+        raise ValueError("metadata must be an object")
+    return record
+
+
+def ingest_chunk(crew_id: str, records: list[tuple[int, dict[str, Any]]], stats: IngestStats) -> None:
+    """Embed, upsert and cache one chunk of ``(line number, record)`` pairs."""
+    if not records:
+        return
+    collection, tenant = crew_memory_target(crew_id)
+    dimension = embedding_dimension()
+
+    missing = [record["content"] for _, record in records if record.get("embedding") is None]
+    generated = iter(generate_embeddings_batch(missing)) if missing else iter(())
+    stats.embedded += len(missing)
+
+    timestamp = datetime.utcnow().isoformat()
+    lines: list[int] = []
+    items: list[tuple[str, list[float], dict[str, Any]]] = []
+    for line, record in records:
+        vector = record.get("embedding")
+        if vector is None:
+            vector = next(generated)
+        try:
+            check_vector(vector, dimension)
+        except EmbeddingDimensionError as e:
+            stats.fail(line, str(e))
+            continue
+        lines.append(line)
+        items.append((str(uuid4()), vector, {
+            "content": record["content"],
+            "crew_id": crew_id,
+            "mission_id": record.get("mission_id"),
+            "agent_role": record.get("agent_role"),
+            "timestamp": timestamp,
+            "metadata": record.get("metadata") or {},
+        }))
+    if not items:
+        return
+
+    # Don't wait for indexing: the next chunk is embedded while Qdrant applies this one
+    try:
+        result = vec_upsert(collection, items, tenant_key="crew_id" if tenant else None, wait=False)
+    except Exception as exc:  # noqa: BLE001 - a failed chunk is reported per line, later chunks still run
+        logger.warning("Memory ingest upsert for crew %s failed: %r", crew_id, exc)
+        error = f"Qdrant write failed: {exc}"
+    else:
+        status = getattr(result.status, "value", result.status)
+        error = None if result.status in ACCEPTED else f"Qdrant did not accept the write (status {status})"
+    if error is not None:
+        for line in lines:
+            stats.fail(line, error)
+        return
+    stats.ingested += len(items)
+
+    try:
+        remember_recent(crew_id, [(item_id, payload) for item_id, _, payload in items])
+    except Exception as exc:  # noqa: BLE001 - the memories are stored; only the recent cache missed them
+        logger.warning("Could not cache recent memories for crew %s: %r", crew_id, exc)
+
+
+async def ingest_ndjson(
+    crew_id: str,
+    body: AsyncIterator[bytes],
+    *,
+    chunk_size: int | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Ingest an NDJSON byte stream into ``crew_id``'s memory, yielding progress events."""
+    size = max(chunk_size or settings.MEMORY_INGEST_CHUNK_SIZE, 1)
+    dimension = await asyncio.to_thread(embedding_dimension)
+    stats = IngestStats(crew_id=crew_id)
+    chunk: list[tuple[int, dict[str, Any]]] = []
+    buffer = b""
+    line_number = 0
+
+    def take(raw: bytes) -> None:
+        nonlocal line_number
+        line_number += 1
+        if not raw.strip():
+            return
+        stats.received += 1
+        try:
+            chunk.append((line_number, parse_line(raw, dimension)))
+        except ValueError as e:
+            stats.fail(line_number, str(e))
+
+    async for data in body:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            take(raw)
+            if len(chunk) >= size:
+                # Embedding and Qdrant calls block; keep the event loop serving other requests
+                await asyncio.to_thread(ingest_chunk, crew_id, chunk, stats)
+                chunk = []
+                yield await _publish(stats.event("progress"))
+    if buffer:
+        take(buffer)
+    if chunk:
+        await asyncio.to_thread(ingest_chunk, crew_id, chunk, stats)
+    done = stats.event("done")
+    logger.info(
+        "Ingested %s memories for crew %s in %ss (%s/s, %s failed)",
+        stats.ingested, crew_id, done["elapsed_seconds"], done["per_second"], stats.failed,
+    )
+    yield await _publish(done)
@@ -0,0 +1,136 @@
+"""
+Move per-crew/per-mission memory collections into the shared tenant collections.
+
+``crew_memory_{crew_id}`` and ``mission_memory_{mission_id}`` collections are
+copied point by point (same ids, vectors and payloads, with the tenant field
+filled in and, with hybrid search on, the sparse vector added where missing)
+into ``crew_memory`` / ``mission_memory``. A source collection is only dropped
+when asked to and after the copied count matches.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import FieldCondition, Filter, MatchValue, PointStruct
+
+from app.infra.embedding_models import embedding_dimension
+from app.infra.qdrant_client import ensure_collection, forget_collection, get_qdrant, has_sparse_vectors
+from app.infra.sparse_vectors import hybrid_vector
+from app.services.memory_service import SHARED_CREW_COLLECTION, SHARED_MISSION_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# (source prefix, shared collection, tenant payload field)
+LAYOUTS = (
+    ("crew_memory_", SHARED_CREW_COLLECTION, "crew_id"),
+    ("mission_memory_", SHARED_MISSION_COLLECTION, "mission_id"),
+)
+
+
+@dataclass
+class MigrationResult:
+    source: str
+    target: str
+    tenant: str
+    copied: int
+    dropped: bool = False
+
+
+def _with_sparse(vector: Any, payload: dict[str, Any]) -> Any:
+    # Collections predating hybrid search only hold the dense vector
+    if isinstance(vector, list) and isinstance(payload.get("content"), str):
+        return hybrid_vector(vector, payload["content"])
+    return vector
+
+
+def tenant_collections(client: QdrantClient | None = None) -> Iterator[tuple[str, str, str, str]]:
+    """Yield ``(source, target, tenant_key, tenant_id)`` for every per-tenant collection."""
+    client = client or get_qdrant()
+    for collection in client.get_collections().collections:
+        for prefix, target, tenant_key in LAYOUTS:
+            if collection.name.startswith(prefix) and collection.name != target:
+                yield collection.name, target, tenant_key, collection.name[len(prefix):]
+                break
+
+
+def migrate_collection(
+    source: str,
+    target: str,
+    tenant_key: str,
+    tenant_id: str,
+    *,
+    batch_size: int = 256,
+    drop: bool = False,
+    client: QdrantClient | None = None,
+) -> MigrationResult:
+    client = client or get_qdrant()
+    ensure_collection(target, embedding_dimension(), tenant_key=tenant_key, client=client)
+    sparse = has_sparse_vectors(target, client)
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if records:
+            client.upsert(
+                collection_name=target,
+                points=[
+                    PointStruct(
+                        id=record.id,
+                        vector=_with_sparse(record.vector, record.payload or {}) if sparse else record.vector,
+                        payload={**(record.payload or {}), tenant_key: tenant_id},
+                    )
+                    for record in records
+                ],
+                wait=True,
+            )
+            copied += len(records)
+        if offset is None:
+            break
+
+    result = MigrationResult(source=source, target=target, tenant=tenant_id, copied=copied)
+    if drop:
+        migrated = client.count(collection_name=source, exact=True).count
+        in_target = client.count(
+            collection_name=target,
+            count_filter=Filter(must=[FieldCondition(key=tenant_key, match=MatchValue(value=tenant_id))]),
+            exact=True,
+        ).count
+        if in_target < migrated:
+            logger.warning("Keeping %s: %s of %s points found in %s", source, in_target, migrated, target)
+        else:
+            client.delete_collection(source)
+            forget_collection(source)
+            result.dropped = True
+    return result
+
+
+def migrate_all(
+    *,
+    batch_size: int = 256,
+    drop: bool = False,
+    dry_run: bool = False,
+    client: QdrantClient | None = None,
+) -> list[MigrationResult]:
+    """Migrate every per-tenant collection; ``dry_run`` only lists them."""
+    client = client or get_qdrant()
+    results = []
+    for source, target, tenant_key, tenant_id in list(tenant_collections(client)):
+        if dry_run:
+            count = client.count(collection_name=source, exact=True).count
+            results.append(MigrationResult(source=source, target=target, tenant=tenant_id, copied=count))
+            continue
+        result = migrate_collection(
+            source, target, tenant_key, tenant_id, batch_size=batch_size, drop=drop, client=client
+        )
+        logger.info("Migrated %s -> %s (%s points)", source, target, result.copied)
+        results.append(result)
+    return results
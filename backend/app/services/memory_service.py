@@ -2,14 +2,25 @@ from __future__ import annotations
 
 import hashlib
 import json
+import time
 from datetime import datetime
 from typing import Any, Iterable
 from uuid import uuid4
 
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue, PointStruct
-
-from app.infra.qdrant_client import ensure_collection, get_qdrant
+from qdrant_client.http.models import Filter, FieldCondition, FilterSelector, MatchValue, PointStruct, UpdateResult
+
+from app.config import settings
+from app.infra.embedding_models import check_vector, embedding_dimension
+from app.infra.qdrant_client import (
+    ensure_collection,
+    forget_collection,
+    get_qdrant,
+    has_sparse_vectors,
+    hybrid_search,
+    retry_if_deleted,
+)
 from app.infra.redis_client import get_redis
+from app.infra.sparse_vectors import hybrid_vector
 
 
 # ============================================================================
@@ -50,32 +61,68 @@ def kv_delete(namespace: str, key: str) -> None:
 # VECTOR STORE (Qdrant) - Semantic search, long-term memory
 # ============================================================================
 
-def vec_upsert(collection: str, items: Iterable[tuple[str, list[float], dict]]) -> None:
-    """Insert or update vectors in a Qdrant collection."""
-    ensure_collection(collection)
-    client = get_qdrant()
-    points = [PointStruct(id=item_id, vector=vector, payload=payload) for item_id, vector, payload in items]
-    client.upsert(collection_name=collection, points=points)
+def vec_upsert(
+    collection: str,
+    items: Iterable[tuple[str, list[float], dict]],
+    *,
+    tenant_key: str | None = None,
+    wait: bool = True,
+) -> UpdateResult:
+    """
+    Insert or update vectors in a Qdrant collection.
+
+    Raises ``EmbeddingDimensionError`` if any vector is mis-sized for the
+    embedding model or all zeros; nothing is written in that case.
+    ``tenant_key`` is passed to ``ensure_collection`` for shared collections.
+    A payload ``content`` string is also indexed lexically for hybrid search.
+    A collection deleted by another process is recreated (see ``retry_if_deleted``).
+    With ``wait=False`` Qdrant replies once it has accepted the points
+    (status ``acknowledged``) rather than after applying them.
+    """
+    dimension = embedding_dimension()
+    items = list(items)
+    for _, vector, _ in items:
+        check_vector(vector, dimension)
+
+    def write() -> UpdateResult:
+        ensure_collection(collection, dimension, tenant_key=tenant_key)
+        sparse = has_sparse_vectors(collection)
+        points = [
+            PointStruct(
+                id=item_id,
+                vector=hybrid_vector(vector, payload["content"]) if sparse and isinstance(payload.get("content"), str) else vector,
+                payload=payload,
+            )
+            for item_id, vector, payload in items
+        ]
+        return get_qdrant().upsert(collection_name=collection, points=points, wait=wait)
 
+    return retry_if_deleted(collection, write)
 
-def vec_search(collection: str, vector: list[float], top_k: int = 5, filters: dict[str, Any] | None = None):
-    """Search for similar vectors in a collection with optional filters."""
-    client = get_qdrant()
-    
-    query_filter = None
-    if filters:
-        conditions = [
-            FieldCondition(key=key, match=MatchValue(value=value))
-            for key, value in filters.items()
-        ]
-        query_filter = Filter(must=conditions)
-    
-    return client.search(
-        collection_name=collection,
-        query_vector=vector,
-        limit=top_k,
-        query_filter=query_filter
-    )
+
+def _match_filter(filters: dict[str, Any] | None) -> Filter | None:
+    if not filters:
+        return None
+    return Filter(must=[
+        FieldCondition(key=key, match=MatchValue(value=value))
+        for key, value in filters.items()
+    ])
+
+
+def vec_search(
+    collection: str,
+    vector: list[float],
+    top_k: int = 5,
+    filters: dict[str, Any] | None = None,
+    text: str | None = None,
+):
+    """
+    Search for similar vectors in a collection with optional filters.
+
+    With ``text`` (the query as written), dense and lexical (BM25) matches
+    are fused; see ``hybrid_search``.
+    """
+    return hybrid_search(collection, vector, text, limit=top_k, query_filter=_match_filter(filters))
 
 
 def vec_delete(collection: str, point_ids: list[str]) -> None:
@@ -84,13 +131,103 @@ def vec_delete(collection: str, point_ids: list[str]) -> None:
     client.delete(collection_name=collection, points_selector=point_ids)
 
 
-def vec_count(collection: str) -> int:
-    """Count total vectors in a collection."""
+def vec_count(collection: str, filters: dict[str, Any] | None = None) -> int:
+    """Count vectors in a collection, optionally only those matching ``filters``."""
     client = get_qdrant()
-    result = client.count(collection_name=collection)
+    result = client.count(collection_name=collection, count_filter=_match_filter(filters), exact=True)
     return result.count
 
 
+# ============================================================================
+# MEMORY LAYOUT - Collection per crew/mission, or shared tenant collections
+# ============================================================================
+
+SHARED_CREW_COLLECTION = "crew_memory"
+SHARED_MISSION_COLLECTION = "mission_memory"
+
+
+def shared_memory_storage() -> bool:
+    """True when CREW7_MEMORY_STORAGE=shared (all tenants in two collections)."""
+    return settings.MEMORY_STORAGE == "shared"
+
+
+def crew_memory_target(crew_id: str) -> tuple[str, dict[str, str]]:
+    """``(collection, tenant filter)`` holding ``crew_id``'s memories."""
+    if shared_memory_storage():
+        return SHARED_CREW_COLLECTION, {"crew_id": crew_id}
+    return f"crew_memory_{crew_id}", {}
+
+
+def mission_memory_target(mission_id: str) -> tuple[str, dict[str, str]]:
+    """``(collection, tenant filter)`` holding ``mission_id``'s memories."""
+    if shared_memory_storage():
+        return SHARED_MISSION_COLLECTION, {"mission_id": mission_id}
+    return f"mission_memory_{mission_id}", {}
+
+
+def _clear_tenant(collection: str, tenant: dict[str, str]) -> None:
+    client = get_qdrant()
+    if tenant:
+        # Shared collection: drop only this tenant's points
+        try:
+            client.delete(collection_name=collection, points_selector=FilterSelector(filter=_match_filter(tenant)))
+        except Exception:
+            pass  # Collection might not exist
+        return
+    forget_collection(collection)
+    try:
+        client.delete_collection(collection)
+    except Exception:
+        pass  # Collection might not exist
+
+
+# ============================================================================
+# RECENT MEMORY (Redis) - Last N crew memories, newest last
+# ============================================================================
+
+def recent_key(crew_id: str) -> str:
+    return f"crew_recent:{crew_id}"
+
+
+def _legacy_recent_key(crew_id: str) -> str:
+    # Unbounded hash written by earlier versions
+    return f"crew_recent_{crew_id}"
+
+
+# Crews whose legacy hash this process has already deleted
+_legacy_recent_dropped: set[str] = set()
+
+
+def remember_recent(crew_id: str, memories: list[tuple[str, dict[str, Any]]]) -> None:
+    """
+    Record ``(memory_id, payload)`` pairs in the crew's recent-memory sorted set.
+
+    Members are compact JSON scored by insertion time, a microsecond apart
+    within one call so a batch keeps its order; the set is trimmed to the
+    newest ``MEMORY_RECENT_LIMIT`` entries in the same round trip.
+    """
+    if not memories:
+        return
+    key = recent_key(crew_id)
+    now = time.time()
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zadd(key, {
+        json.dumps({"id": memory_id, **payload}, separators=(",", ":"), default=str): now + index * 1e-6
+        for index, (memory_id, payload) in enumerate(memories)
+    })
+    pipe.zremrangebyrank(key, 0, -settings.MEMORY_RECENT_LIMIT - 1)
+    if crew_id not in _legacy_recent_dropped:
+        pipe.delete(_legacy_recent_key(crew_id))
+    pipe.execute()
+    _legacy_recent_dropped.add(crew_id)
+
+
+def recent_crew_memories(crew_id: str, limit: int | None = None) -> list[dict[str, Any]]:
+    """Newest-first recent memories of a crew (at most ``MEMORY_RECENT_LIMIT``)."""
+    raw = get_redis().zrevrange(recent_key(crew_id), 0, (limit or settings.MEMORY_RECENT_LIMIT) - 1)
+    return [json.loads(member) for member in raw]
+
+
 # ============================================================================
 # CREW MEMORY - High-level memory operations for AI crews
 # ============================================================================
@@ -117,9 +254,7 @@ def add_crew_memory(
     Returns:
         memory_id: Unique identifier for this memory
     """
-    collection = f"crew_memory_{crew_id}"
-    ensure_collection(collection)
-    
+    collection, tenant = crew_memory_target(crew_id)
     memory_id = str(uuid4())
     payload = {
         "content": content,
@@ -130,10 +265,10 @@ def add_crew_memory(
         "metadata": metadata or {},
     }
     
-    vec_upsert(collection, [(memory_id, embedding, payload)])
+    vec_upsert(collection, [(memory_id, embedding, payload)], tenant_key="crew_id" if tenant else None)
     
     # Also cache recent memory in Redis for fast access
-    kv_set(f"crew_recent_{crew_id}", memory_id, json.dumps(payload))
+    remember_recent(crew_id, [(memory_id, payload)])
     
     return memory_id
 
@@ -144,6 +279,7 @@ def search_crew_memory(
     top_k: int = 5,
     mission_id: str | None = None,
     agent_role: str | None = None,
+    query_text: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Search crew's memory for relevant past experiences.
@@ -154,20 +290,22 @@ def search_crew_memory(
         top_k: Number of results to return
         mission_id: Optional filter by mission
         agent_role: Optional filter by agent role
+        query_text: Optional query text; enables hybrid (dense + BM25) recall,
+            which finds exact identifiers a dense search misses
     
     Returns:
         List of memory records with content, score, and metadata
     """
-    collection = f"crew_memory_{crew_id}"
+    collection, tenant = crew_memory_target(crew_id)
     
-    filters = {}
+    filters = dict(tenant)
     if mission_id:
         filters["mission_id"] = mission_id
     if agent_role:
         filters["agent_role"] = agent_role
     
     try:
-        results = vec_search(collection, query_embedding, top_k, filters)
+        results = vec_search(collection, query_embedding, top_k, filters, text=query_text)
         return [
             {
                 "id": str(hit.id),
@@ -200,9 +338,7 @@ def add_mission_memory(
     - Storing intermediate results
     - Recording agent communications
     """
-    collection = f"mission_memory_{mission_id}"
-    ensure_collection(collection)
-    
+    collection, tenant = mission_memory_target(mission_id)
     memory_id = str(uuid4())
     payload = {
         "content": content,
@@ -212,7 +348,7 @@ def add_mission_memory(
         "metadata": metadata or {},
     }
     
-    vec_upsert(collection, [(memory_id, embedding, payload)])
+    vec_upsert(collection, [(memory_id, embedding, payload)], tenant_key="mission_id" if tenant else None)
     return memory_id
 
 
@@ -223,9 +359,9 @@ def search_mission_memory(
     agent_role: str | None = None,
 ) -> list[dict[str, Any]]:
     """Search within a specific mission's memory."""
-    collection = f"mission_memory_{mission_id}"
+    collection, tenant = mission_memory_target(mission_id)
     
-    filters = {}
+    filters = dict(tenant)
     if agent_role:
         filters["agent_role"] = agent_role
     
@@ -248,16 +384,16 @@ def search_mission_memory(
 
 def get_crew_memory_stats(crew_id: str) -> dict[str, Any]:
     """Get statistics about a crew's memory."""
-    collection = f"crew_memory_{crew_id}"
+    collection, tenant = crew_memory_target(crew_id)
     
     try:
-        total_memories = vec_count(collection)
-        recent = kv_list(f"crew_recent_{crew_id}")
+        total_memories = vec_count(collection, tenant)
+        recent_count = get_redis().zcard(recent_key(crew_id))
         
         return {
             "crew_id": crew_id,
             "total_memories": total_memories,
-            "recent_count": len(recent),
+            "recent_count": recent_count,
             "collection_name": collection,
         }
     except Exception:
@@ -271,23 +407,13 @@ def get_crew_memory_stats(crew_id: str) -> dict[str, Any]:
 
 def clear_crew_memory(crew_id: str) -> None:
     """Clear all memories for a crew (use with caution!)."""
-    collection = f"crew_memory_{crew_id}"
-    client = get_qdrant()
-    try:
-        client.delete_collection(collection)
-    except Exception:
-        pass  # Collection might not exist
+    _clear_tenant(*crew_memory_target(crew_id))
     
     # Clear Redis cache
     redis = get_redis()
-    redis.delete(f"crew_recent_{crew_id}")
+    redis.delete(recent_key(crew_id), _legacy_recent_key(crew_id))
 
 
 def clear_mission_memory(mission_id: str) -> None:
     """Clear all memories for a specific mission."""
-    collection = f"mission_memory_{mission_id}"
-    client = get_qdrant()
-    try:
-        client.delete_collection(collection)
-    except Exception:
-        pass
+    _clear_tenant(*mission_memory_target(mission_id))
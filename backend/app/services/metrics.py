@@ -7,6 +7,11 @@ from app.infra.redis_client import get_redis
 
 _RUNS_STARTED_KEY = "metrics:runs_started"
 _RUNS_DONE_KEY = "metrics:runs_done"
+_RUN_STREAM_GC_KEY = "metrics:run_stream_gc"
+_WORKER_STARTUP_KEY = "metrics:worker_startup"
+_RUN_CACHE_KEY = "metrics:run_cache"
+_LLM_CACHE_KEY = "metrics:llm_cache"
+_EMBEDDING_CACHE_KEY = "metrics:embedding_cache"
 
 
 def record_run_started(crew_id: str) -> None:
@@ -25,6 +30,18 @@ def record_run_done(crew_id: str, status: str) -> None:
         pass
 
 
+def record_job_startup(worker_mode: str, seconds: float) -> None:
+    """Accumulate per-job startup overhead (job pickup until crew kickoff) per worker mode."""
+    try:
+        redis = get_redis()
+        pipe = redis.pipeline()
+        pipe.hincrbyfloat(_WORKER_STARTUP_KEY, f"{worker_mode}:seconds", seconds)
+        pipe.hincrby(_WORKER_STARTUP_KEY, f"{worker_mode}:jobs", 1)
+        pipe.execute()
+    except Exception:  # noqa: BLE001 - metrics best effort
+        pass
+
+
 class _RunMetricsCollector:
     def collect(self):  # type: ignore[override]
         redis = None
@@ -63,6 +80,82 @@ class _RunMetricsCollector:
             done_metrics.add_metric([crew_id, status], int(value))
         yield done_metrics
 
+        gc_metrics = GaugeMetricFamily(
+            "crew7_run_stream_gc_total",
+            "Run stream garbage collection totals (keys expired or deleted, bytes expiring or reclaimed, consumers)",
+            labels=["counter"],
+        )
+        try:
+            gc_values = redis.hgetall(_RUN_STREAM_GC_KEY) or {}
+        except Exception:  # pragma: no cover - redis offline
+            return
+        for counter, value in gc_values.items():
+            gc_metrics.add_metric([counter], int(value))
+        yield gc_metrics
+
+        startup_seconds = GaugeMetricFamily(
+            "crew7_worker_job_startup_seconds_total",
+            "Time from job pickup until crew kickoff, summed per worker mode",
+            labels=["mode"],
+        )
+        startup_jobs = GaugeMetricFamily(
+            "crew7_worker_job_startup_jobs_total",
+            "Jobs counted in crew7_worker_job_startup_seconds_total",
+            labels=["mode"],
+        )
+        try:
+            startup_values = redis.hgetall(_WORKER_STARTUP_KEY) or {}
+        except Exception:  # pragma: no cover - redis offline
+            return
+        for key, value in startup_values.items():
+            mode, _, field = key.rpartition(":")
+            if field == "seconds":
+                startup_seconds.add_metric([mode], float(value))
+            elif field == "jobs":
+                startup_jobs.add_metric([mode], int(value))
+        yield startup_seconds
+        yield startup_jobs
+
+        cache_metrics = GaugeMetricFamily(
+            "crew7_run_cache_total",
+            "Run result cache lookups and writes (hit, miss, bypass, store, evict, oversize)",
+            labels=["result"],
+        )
+        try:
+            cache_values = redis.hgetall(_RUN_CACHE_KEY) or {}
+        except Exception:  # pragma: no cover - redis offline
+            return
+        for result, value in cache_values.items():
+            cache_metrics.add_metric([result], int(value))
+        yield cache_metrics
+
+        llm_cache_metrics = GaugeMetricFamily(
+            "crew7_llm_cache_total",
+            "Agent LLM and tool call cache lookups",
+            labels=["kind", "result"],
+        )
+        try:
+            llm_cache_values = redis.hgetall(_LLM_CACHE_KEY) or {}
+        except Exception:  # pragma: no cover - redis offline
+            return
+        for key, value in llm_cache_values.items():
+            kind, _, result = key.partition(":")
+            llm_cache_metrics.add_metric([kind, result], int(value))
+        yield llm_cache_metrics
+
+        embedding_cache_metrics = GaugeMetricFamily(
+            "crew7_embedding_cache_total",
+            "Embedding cache lookups by outcome (lru_hit, redis_hit, miss)",
+            labels=["result"],
+        )
+        try:
+            embedding_cache_values = redis.hgetall(_EMBEDDING_CACHE_KEY) or {}
+        except Exception:  # pragma: no cover - redis offline
+            return
+        for result, value in embedding_cache_values.items():
+            embedding_cache_metrics.add_metric([result], int(value))
+        yield embedding_cache_metrics
+
 
 _collector = _RunMetricsCollector()
 _collector_registered = False
@@ -1,84 +1,65 @@
 from __future__ import annotations
 
-import asyncio
 import json
-from dataclasses import dataclass
 from typing import Any
 
-from app.infra.redis_client import get_redis
+from app.infra.redis_client import get_async_redis
+from app.services.fanout import ChannelFanout, FanoutSubscription
 
 CHANNEL_PREFIX = "mission:"
+SIGNAL_KEY_PREFIX = "mission_signal:"
+SIGNAL_TTL_SECONDS = 2 * 3600
 
-
-@dataclass
-class MissionSubscription:
-    queue: asyncio.Queue[dict[str, Any]]
-    task: asyncio.Task[None]
-
-    async def close(self) -> None:
-        self.task.cancel()
-        try:
-            await self.task
-        except asyncio.CancelledError:
-            pass
+MissionSubscription = FanoutSubscription
 
 
 class MissionBus:
-    """Redis-backed fan-out for mission-level websocket events."""
+    """
+    Redis-backed fan-out for mission-level websocket events.
+
+    All ``/ws/mission`` sockets in the process share one async pattern
+    subscription; messages are routed to per-connection queues by org id.
+    """
 
     def __init__(self) -> None:
-        self._redis = get_redis()
+        self._fanout = ChannelFanout(CHANNEL_PREFIX, queue_size=100)
 
     def _channel(self, org_id: str) -> str:
-        return f"{CHANNEL_PREFIX}{org_id}"
+        return self._fanout.channel(org_id)
 
     async def subscribe(self, org_id: str) -> MissionSubscription:
-        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=100)
-        pubsub = self._redis.pubsub()
-        await asyncio.to_thread(pubsub.subscribe, self._channel(org_id))
-
-        async def reader() -> None:
-            try:
-                while True:
-                    message = await asyncio.to_thread(
-                        pubsub.get_message,
-                        ignore_subscribe_messages=True,
-                        timeout=2.0,
-                    )
-                    if not message:
-                        await asyncio.sleep(0.1)
-                        continue
-                    data = message.get("data")
-                    if isinstance(data, bytes):
-                        data = data.decode()
-                    if not isinstance(data, str):
-                        continue
-                    try:
-                        payload = json.loads(data)
-                    except json.JSONDecodeError:
-                        continue
-                    try:
-                        queue.put_nowait(payload)
-                    except asyncio.QueueFull:
-                        try:
-                            queue.get_nowait()
-                        except asyncio.QueueEmpty:
-                            pass
-                        queue.put_nowait(payload)
-            except asyncio.CancelledError:  # noqa: PERF203 - propagate cancellation
-                raise
-            finally:
-                await asyncio.to_thread(pubsub.close)
-
-        task = asyncio.create_task(reader())
-        return MissionSubscription(queue=queue, task=task)
+        return await self._fanout.subscribe(org_id)
 
     async def unsubscribe(self, subscription: MissionSubscription) -> None:
-        await subscription.close()
+        self._fanout.unsubscribe(subscription)
 
     async def publish(self, org_id: str, message: dict[str, Any]) -> None:
+        await self._fanout.publish(org_id, message)
+
+    def _signal_key(self, org_id: str) -> str:
+        return f"{SIGNAL_KEY_PREFIX}{org_id}"
+
+    async def publish_signal(self, org_id: str, message: dict[str, Any]) -> None:
+        """Record the org's latest signal as its status projection, then broadcast it."""
         payload = json.dumps(message)
-        await asyncio.to_thread(self._redis.publish, self._channel(org_id), payload)
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            pipe.set(self._signal_key(org_id), payload, ex=SIGNAL_TTL_SECONDS)
+            pipe.publish(self._channel(org_id), payload)
+            await pipe.execute()
+
+    async def signal_snapshot(self, org_id: str) -> dict[str, Any] | None:
+        """Return the last signal recorded for an org, if any."""
+        raw = await get_async_redis().get(self._signal_key(org_id))
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+
+    async def remember_signal(self, org_id: str, message: dict[str, Any], ttl: int) -> None:
+        """Seed the projection without overwriting a signal published meanwhile."""
+        await get_async_redis().set(self._signal_key(org_id), json.dumps(message), ex=ttl, nx=True)
 
 
 mission_bus = MissionBus()
@@ -90,7 +71,7 @@ async def publish_signal(org_id: str, status: str, crew_id: str | None = None, *
         payload["crewId"] = crew_id
     if extra:
         payload.update(extra)
-    await mission_bus.publish(org_id, {"type": "signal", "payload": payload})
+    await mission_bus.publish_signal(org_id, {"type": "signal", "payload": payload})
 
 
 async def publish_alert(
@@ -2,48 +2,96 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 from datetime import datetime, timezone
-from typing import Any, Generator
+from typing import Any, AsyncIterator
 from uuid import UUID, uuid4
 
+from rq import get_current_job
+
 from app.config import settings
 from app.infra.db import SessionLocal
+from app.infra.embedding_models import EmbeddingDimensionError, EmbeddingUnavailableError, check_vector
 from app.infra.ollama import get_ollama_client
 from app.models.crew import Crew
 from app.models.run import Run, RunStatus
 from app.services.memory_service import kv_set, vec_upsert, add_crew_memory, add_mission_memory
 from app.services.embedding_service import generate_embedding
+from app.services.graph_bus import graph_bus
 from app.services.mission_bus import publish_alert, publish_signal
-from app.services.pubsub import bus
-from app.services.metrics import record_run_started, record_run_done
+from app.services.pubsub import async_bus as bus
+from app.services.result_cache import CachedRun, cache_enabled, result_cache, result_cache_key, wants_bypass
+from app.services.metrics import record_job_startup, record_run_started, record_run_done
+from app.services.worker_runtime import job_startup_seconds, run_job_coroutine
 from app.crewai.adapters import upsert_memory
-from app.crewai.factory import make_crew
+from app.crewai.callbacks import RunCallbacks
+from app.crewai.factory import make_crew, memory_context
 from app.crewai.fullstack_crew import make_fullstack_saas_crew
+from app.crewai.llm_cache import LLMCache
 from app.crewai.toolpacks import default_toolpacks
-from app.infra.redis_client import get_redis, get_redis_client
 
 
 def orchestrate_run(run_id: str, crew_id: str, prompt: str, inputs: dict[str, Any]) -> None:
-    """RQ worker entry point."""
-    asyncio.run(_orchestrate_run_async(UUID(run_id), UUID(crew_id), prompt, inputs))
-
-
-async def _orchestrate_run_async(run_id: UUID, crew_id: UUID, prompt: str, inputs: dict[str, Any]) -> None:
-    crew_snapshot = _mark_running_and_snapshot(crew_id, run_id)
+    """RQ worker entry point; under the async worker the run shares its event loop."""
+    # Anchor startup timing at job pickup so fork/import cost is included
+    origin = time.perf_counter() - job_startup_seconds(get_current_job())
+    run_job_coroutine(orchestrate_run_async(run_id, crew_id, prompt, inputs, origin=origin))
+
+
+async def orchestrate_run_async(
+    run_id: str,
+    crew_id: str,
+    prompt: str,
+    inputs: dict[str, Any],
+    *,
+    origin: float | None = None,
+) -> None:
+    """Coroutine form of ``orchestrate_run``."""
+    await _orchestrate_run_async(UUID(run_id), UUID(crew_id), prompt, inputs, origin=origin)
+
+
+async def _orchestrate_run_async(
+    run_id: UUID,
+    crew_id: UUID,
+    prompt: str,
+    inputs: dict[str, Any],
+    *,
+    origin: float | None = None,
+) -> None:
+    origin = time.perf_counter() if origin is None else origin
+    crew_snapshot = await asyncio.to_thread(_mark_running_and_snapshot, crew_id, run_id)
     if crew_snapshot is None:
-        _mark_failed(run_id, "Crew or run missing")
-        bus.publish(run_id, {"type": "error", "data": "Crew or run missing."})
-        bus.publish(run_id, {"type": "done"})
+        await asyncio.to_thread(_mark_failed, run_id, "Crew or run missing")
+        await bus.publish_many(run_id, [{"type": "error", "data": "Crew or run missing."}, {"type": "done"}])
         return
 
+    bypass_cache = wants_bypass(inputs)
+    # ``cache`` is a run option, not part of the prompt (or the cache key)
+    inputs = {key: value for key, value in inputs.items() if key != "cache"}
     rendered_prompt = _render_prompt(prompt, crew_snapshot, inputs)
     org_id = crew_snapshot.get("org_id")
 
+    cache_key: str | None = None
+    cached: CachedRun | None = None
+    recalled: str | None = None
+    if cache_enabled(crew_snapshot["recipe"]):
+        try:
+            # The crew is built from this same recall; the answer depends on it as much as on the prompt
+            recalled = await asyncio.to_thread(memory_context, str(crew_id), rendered_prompt)
+        except Exception as e:  # noqa: BLE001 - without the recalled memory the key is unknown
+            print(f"Warning: Skipping run cache for run {run_id}, memory recall failed: {e}")
+        else:
+            cache_key = result_cache_key(str(crew_id), crew_snapshot, rendered_prompt, recalled)
+            if bypass_cache:
+                await asyncio.to_thread(result_cache.record, "bypass")
+            else:
+                cached = await asyncio.to_thread(result_cache.lookup, cache_key)
+
     if org_id:
         await publish_signal(org_id, "busy", str(crew_id))
 
-    bus.publish(run_id, {"type": "status", "data": "running"})
-    record_run_started(str(crew_id))
+    await bus.publish(run_id, {"type": "status", "data": "running"})
+    await asyncio.to_thread(record_run_started, str(crew_id))
     
     # Publish graph start event
     await _publish_graph_event(crew_id, {
@@ -53,23 +101,45 @@ async def _orchestrate_run_async(run_id: UUID, crew_id: UUID, prompt: str, input
     })
     
     final_text = ""
+    tokens: list[str] = []
+    tasks: list[dict[str, Any]] = []
+    if cached is not None:
+        events = _replay_cached_run(cached)
+    else:
+        events = run_orchestration(crew_id, rendered_prompt, run_id, memory=recalled)
     try:
-        for kind, data in run_orchestration(crew_id, rendered_prompt, run_id):
-            if kind == "log":
-                bus.publish(run_id, {"type": "message", "data": data})
-            elif kind == "token":
-                final_text += data
-                bus.publish(run_id, {"type": "token", "data": data})
-            elif kind == "done":
-                if isinstance(data, str):
-                    final_text = data
-                break
+        # Tokens are coalesced into token_batch frames instead of one XADD each
+        async with bus.batch(run_id) as stream:
+            async for kind, data in events:
+                if kind == "log":
+                    await stream.publish({"type": "message", "data": data})
+                elif kind == "task":
+                    tasks.append(data)
+                    await stream.publish({"type": "task_output", "data": data})
+                elif kind == "ready":
+                    # Job pickup until kickoff, before any LLM call
+                    startup_s = round(time.perf_counter() - origin, 3)
+                    await asyncio.to_thread(record_job_startup, settings.WORKER_MODE, startup_s)
+                    await stream.publish({
+                        "type": "metric",
+                        "data": {"startup_s": startup_s, "worker_mode": settings.WORKER_MODE, **data},
+                    })
+                elif kind == "token":
+                    final_text += data
+                    tokens.append(data)
+                    await stream.add_token(data)
+                elif kind == "done":
+                    if isinstance(data, str):
+                        final_text = data
+                    break
     except Exception as exc:  # noqa: BLE001 - capture orchestration errors
-        _mark_failed(run_id, str(exc))
-        record_run_done(str(crew_id), "failed")
-        bus.publish(run_id, {"type": "error", "data": str(exc)})
-        bus.publish(run_id, {"type": "status", "data": "failed"})
-        bus.publish(run_id, {"type": "done"})
+        await asyncio.to_thread(_mark_failed, run_id, str(exc))
+        await asyncio.to_thread(record_run_done, str(crew_id), "failed")
+        await bus.publish_many(run_id, [
+            {"type": "error", "data": str(exc)},
+            {"type": "status", "data": "failed"},
+            {"type": "done"},
+        ])
         
         # Publish graph error event
         await _publish_graph_event(crew_id, {
@@ -92,13 +162,17 @@ async def _orchestrate_run_async(run_id: UUID, crew_id: UUID, prompt: str, input
 
     output_text = final_text.strip()
     if output_text:
-        bus.publish(run_id, {"type": "message", "data": output_text})
+        await bus.publish(run_id, {"type": "message", "data": output_text})
 
-    await _persist_memory(crew_snapshot, run_id, prompt, output_text)
-    _mark_succeeded(run_id)
-    record_run_done(str(crew_id), "succeeded")
-    bus.publish(run_id, {"type": "status", "data": "succeeded"})
-    bus.publish(run_id, {"type": "done"})
+    if cached is None:
+        await _persist_memory(crew_snapshot, run_id, prompt, output_text)
+        if cache_key and output_text:
+            await asyncio.to_thread(
+                result_cache.store, cache_key, CachedRun(text=final_text, tokens=tokens, tasks=tasks)
+            )
+    await asyncio.to_thread(_mark_succeeded, run_id)
+    await asyncio.to_thread(record_run_done, str(crew_id), "succeeded")
+    await bus.publish_many(run_id, [{"type": "status", "data": "succeeded"}, {"type": "done"}])
     
     # Publish graph completion event
     await _publish_graph_event(crew_id, {
@@ -111,80 +185,115 @@ async def _orchestrate_run_async(run_id: UUID, crew_id: UUID, prompt: str, input
         await publish_signal(org_id, "available", str(crew_id))
 
 
-def run_orchestration(crew_id: UUID, prompt: str, run_id: UUID) -> Generator[tuple[str, str], None, None]:
+async def run_orchestration(
+    crew_id: UUID,
+    prompt: str,
+    run_id: UUID,
+    *,
+    memory: str | None = None,
+) -> AsyncIterator[tuple[str, Any]]:
     """
     Run crew orchestration with specialized crew detection.
     Detects Full-Stack SaaS Crew and uses appropriate factory.
+
+    Blocking work (DB lookups, memory recall while building the crew and the
+    crew kickoff itself) runs in the default executor. CrewAI callbacks fire on
+    the kickoff thread and are pumped back onto the loop, so each task's
+    output, token count and timing is yielded (and its graph events published)
+    as soon as that task completes rather than after the whole crew finishes.
+    ``memory`` is crew memory already recalled for ``prompt`` (e.g. for the
+    run cache key); the crew is built with it instead of recalling again.
     """
     tools = default_toolpacks()
-    
-    # Get crew details to check type
-    with SessionLocal() as db:
-        crew_obj = db.get(Crew, crew_id)
-        crew_type = None
-        if crew_obj and crew_obj.recipe_json:
-            crew_type = crew_obj.recipe_json.get("crew_type")
-    
+    recipe, models, org_id = await asyncio.to_thread(_crew_config, crew_id)
+    crew_type = recipe.get("crew_type")
+    # Per-crew override of settings.CREW_EXECUTION_MODE ("sequential" | "dag")
+    execution_mode = recipe.get("execution_mode")
+    # Cross-run LLM/tool call cache, opted into via models_json.llm_cache
+    llm_cache = LLMCache.from_models(models, scope=f"{org_id}/{crew_id}")
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[tuple[str, dict[str, Any]] | None] = asyncio.Queue()
+
+    def emit(kind: str, data: dict[str, Any]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, (kind, data))
+
+    callbacks = RunCallbacks(emit)
+    build_started = time.perf_counter()
+
     # Use specialized crew for Full-Stack SaaS
     if crew_type == "fullstack_saas":
         yield ("log", "🚀 Initializing Full-Stack SaaS Crew (7 specialized agents)...")
-        crew = make_fullstack_saas_crew(str(crew_id), prompt, tools)
-        agents = [
-            "orchestrator",
-            "backend_architect", 
-            "backend_implementer",
-            "frontend_architect",
-            "frontend_implementer",
-            "qa_engineer",
-            "devops_engineer"
-        ]
+        crew = await asyncio.to_thread(
+            make_fullstack_saas_crew,
+            str(crew_id),
+            prompt,
+            tools,
+            callbacks=callbacks,
+            execution_mode=execution_mode,
+            llm_cache=llm_cache,
+            memory=memory,
+        )
     else:
         yield ("log", "Crew planning…")
-        crew = make_crew(str(crew_id), prompt, tools)
-        agents = ["orchestrator", "backend_dev", "frontend_dev", "qa_engineer", "devops_engineer"]
-    
-    # Simulate agent lifecycle with graph events
-    agents = ["orchestrator", "backend_dev", "frontend_dev", "qa_engineer", "devops_engineer"]
-    
-    for agent in agents:
-        # Publish agent start
-        asyncio.create_task(_publish_graph_event(crew_id, {
-            "type": "agent_start",
-            "agent": agent,
-            "run_id": str(run_id),
-            "timestamp": _now().isoformat()
-        }))
-        
-        yield ("log", f"Agent {agent} starting...")
-        
-        # Simulate agent work
-        import time
-        time.sleep(0.5)
-        
-        # Publish agent completion with token count
-        asyncio.create_task(_publish_graph_event(crew_id, {
-            "type": "agent_end",
-            "agent": agent,
-            "run_id": str(run_id),
-            "status": "done",
-            "tokens": 150,
-            "timestamp": _now().isoformat()
-        }))
-        
-        # Publish edge to next agent
-        if agents.index(agent) < len(agents) - 1:
-            next_agent = agents[agents.index(agent) + 1]
-            asyncio.create_task(_publish_graph_event(crew_id, {
-                "type": "edge",
-                "source": agent,
-                "target": next_agent,
-                "run_id": str(run_id),
-                "timestamp": _now().isoformat()
-            }))
-    
-    result = crew.kickoff(inputs={"user_request": prompt})
+        crew = await asyncio.to_thread(
+            make_crew,
+            str(crew_id),
+            prompt,
+            tools,
+            callbacks=callbacks,
+            execution_mode=execution_mode,
+            llm_cache=llm_cache,
+            memory=memory,
+        )
+
+    yield ("ready", {"crew_build_s": round(time.perf_counter() - build_started, 3)})
+
+    kickoff = asyncio.ensure_future(asyncio.to_thread(crew.kickoff, inputs={"user_request": prompt}))
+    # Runs after every callback the kickoff thread queued before returning
+    kickoff.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (item := await events.get()) is not None:
+            kind, data = item
+            if kind == "task_start":
+                for source in data["after"]:
+                    await _publish_graph_event(crew_id, {
+                        "type": "edge",
+                        "source": source,
+                        "target": data["agent"],
+                        "run_id": str(run_id),
+                        "timestamp": _now().isoformat(),
+                    })
+                await _publish_graph_event(crew_id, {
+                    "type": "agent_start",
+                    "agent": data["agent"],
+                    "task": data["task"],
+                    "run_id": str(run_id),
+                    "timestamp": _now().isoformat(),
+                })
+                yield ("log", f"{data['role']} started: {data['task']}")
+            elif kind == "step":
+                if data["tool"]:
+                    yield ("log", f"{data['role']} → {data['tool']}")
+            elif kind == "task_end":
+                await _publish_graph_event(crew_id, {
+                    "type": "agent_end",
+                    "agent": data["agent"],
+                    "run_id": str(run_id),
+                    "status": "done",
+                    "tokens": data["tokens"],
+                    "duration_s": data["duration_s"],
+                    "timestamp": _now().isoformat(),
+                })
+                yield ("task", data)
+        result = kickoff.result()
+    finally:
+        callbacks.detach()
+        if not kickoff.done():
+            kickoff.cancel()
+
     final_text = result if isinstance(result, str) else str(result)
-    upsert_memory(str(crew_id), [final_text])
+    await asyncio.to_thread(upsert_memory, str(crew_id), [final_text])
     for chunk in final_text.split(" "):
         if not chunk:
             continue
@@ -192,6 +301,26 @@ def run_orchestration(crew_id: UUID, prompt: str, run_id: UUID) -> Generator[tup
     yield ("done", final_text)
 
 
+async def _replay_cached_run(cached: CachedRun) -> AsyncIterator[tuple[str, Any]]:
+    """Replay a cached result through the same event path as a live run."""
+    yield ("log", "♻️ Replaying cached result for an identical prompt and crew configuration")
+    for task in cached.tasks:
+        yield ("task", task)
+    for token in cached.tokens:
+        yield ("token", token)
+    yield ("done", cached.text)
+
+
+def _crew_config(crew_id: UUID) -> tuple[dict[str, Any], dict[str, Any], str | None]:
+    """The crew's ``(recipe_json, models_json, org_id)``, empty dicts when unset."""
+    with SessionLocal() as db:
+        crew_obj = db.get(Crew, crew_id)
+        if crew_obj is None:
+            return {}, {}, None
+        org_id = str(crew_obj.org_id) if crew_obj.org_id else None
+        return dict(crew_obj.recipe_json or {}), dict(crew_obj.models_json or {}), org_id
+
+
 def _render_prompt(prompt: str, crew_snapshot: dict[str, Any], inputs: dict[str, Any]) -> str:
     recipe = crew_snapshot["recipe"]
     env = crew_snapshot["env"]
@@ -231,7 +360,8 @@ async def _persist_memory(crew_snapshot: dict[str, Any], run_id: UUID, prompt: s
     crew_id = str(crew_snapshot.get("crew_id", "unknown"))
 
     # Store in Redis KV for fast lookup
-    kv_set(
+    await asyncio.to_thread(
+        kv_set,
         kv_namespace,
         f"run:{run_id}:summary",
         {"prompt": prompt, "output": output_text, "ts": _now().isoformat()},
@@ -240,47 +370,25 @@ async def _persist_memory(crew_snapshot: dict[str, Any], run_id: UUID, prompt: s
     if not output_text:
         return
 
-    # Generate embedding for semantic search
+    # Embedding and vector writes are blocking HTTP calls; keep them off the loop
     try:
-        embedding = generate_embedding(output_text)
-        
-        # Add to crew's long-term memory
-        add_crew_memory(
-            crew_id=crew_id,
-            content=output_text,
-            embedding=embedding,
-            metadata={
-                "run_id": str(run_id),
-                "prompt": prompt,
-                "type": "run_output",
-                "success": True,
-            },
-            mission_id=str(run_id),
-            agent_role="orchestrator",
-        )
-        
-        # Also add to mission-specific memory
-        add_mission_memory(
-            mission_id=str(run_id),
-            content=f"User Request: {prompt}\n\nResult: {output_text}",
-            embedding=embedding,
-            metadata={
-                "type": "mission_transcript",
-                "crew_id": crew_id,
-            },
-            agent_role="orchestrator",
-        )
-        
+        await asyncio.to_thread(_store_run_memory, crew_id, run_id, prompt, output_text)
+    except (EmbeddingUnavailableError, EmbeddingDimensionError) as e:
+        # No usable vector; the legacy path would only write a placeholder
+        print(f"Warning: Skipping vector memory for run {run_id}: {e}")
     except Exception as e:  # noqa: BLE001 - fallback to old method if new memory fails
         print(f"Warning: Enhanced memory failed, falling back to legacy: {e}")
         
         # Fallback to old vector upsert
         try:
             vector = await get_ollama_client().embed(settings.MODEL_EMBED, output_text)
-        except Exception:
-            vector = [0.0] * 384
+            check_vector(vector)
+        except Exception as embed_error:  # noqa: BLE001 - never store zero vectors
+            print(f"Warning: Skipping legacy vector memory for run {run_id}: {embed_error}")
+            return
         
-        vec_upsert(
+        await asyncio.to_thread(
+            vec_upsert,
             vec_collection,
             [
                 (
@@ -297,6 +405,38 @@ async def _persist_memory(crew_snapshot: dict[str, Any], run_id: UUID, prompt: s
         )
 
 
+def _store_run_memory(crew_id: str, run_id: UUID, prompt: str, output_text: str) -> None:
+    """Embed the run output and add it to crew and mission memory (blocking)."""
+    embedding = generate_embedding(output_text)
+    
+    # Add to crew's long-term memory
+    add_crew_memory(
+        crew_id=crew_id,
+        content=output_text,
+        embedding=embedding,
+        metadata={
+            "run_id": str(run_id),
+            "prompt": prompt,
+            "type": "run_output",
+            "success": True,
+        },
+        mission_id=str(run_id),
+        agent_role="orchestrator",
+    )
+    
+    # Also add to mission-specific memory
+    add_mission_memory(
+        mission_id=str(run_id),
+        content=f"User Request: {prompt}\n\nResult: {output_text}",
+        embedding=embedding,
+        metadata={
+            "type": "mission_transcript",
+            "crew_id": crew_id,
+        },
+        agent_role="orchestrator",
+    )
+
+
 def _mark_running_and_snapshot(crew_id: UUID, run_id: UUID) -> dict[str, Any] | None:
     session = SessionLocal()
     try:
@@ -353,8 +493,6 @@ def _now() -> datetime:
 async def _publish_graph_event(crew_id: UUID, event: dict[str, Any]) -> None:
     """Publish graph event to Redis channel for WebSocket subscribers."""
     try:
-        redis = get_redis_client()
-        channel = f"graph:{crew_id}"
-        await redis.publish(channel, json.dumps(event))
+        await graph_bus.publish(str(crew_id), event)
     except Exception:  # noqa: BLE001 - don't fail run if graph event fails
         pass
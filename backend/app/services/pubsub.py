@@ -2,14 +2,37 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import time
-from typing import AsyncIterator
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from typing import Any, AsyncIterator
 from uuid import UUID
 
-from app.infra.redis_client import get_redis
+from redis.exceptions import ResponseError
+
+from app.config import settings
+from app.infra.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
 
 STREAM_PREFIX = "run:"
 GROUP = "crew7-consumers"
+STREAM_MAXLEN = 1000
+SUBSCRIBER_QUEUE_SIZE = 1000
+READ_BLOCK_MS = 5000
+READ_COUNT = 100
+TOKEN_BATCH_MAX_DELAY = 0.05
+TOKEN_BATCH_MAX_BYTES = 4096
+GC_STATS_KEY = "metrics:run_stream_gc"
+
+
+def _stream_key(run_id: UUID) -> str:
+    return f"{STREAM_PREFIX}{run_id}"
+
+
+def _is_done(events: list[dict]) -> bool:
+    return any(event.get("type") == "done" for event in events)
 
 
 class RunBus:
@@ -17,30 +40,472 @@ class RunBus:
         self._redis = get_redis()
 
     def _stream(self, run_id: UUID) -> str:
-        return f"{STREAM_PREFIX}{run_id}"
+        return _stream_key(run_id)
 
     def publish(self, run_id: UUID, event: dict) -> None:
         """Publish event to Redis stream (synchronous operation)."""
-        self._redis.xadd(self._stream(run_id), {"e": json.dumps(event)}, maxlen=1000)
+        self.publish_many(run_id, [event])
 
-    async def consume(self, run_id: UUID) -> AsyncIterator[dict]:
+    def publish_many(self, run_id: UUID, events: list[dict]) -> None:
+        """
+        Publish several events in order with a single pipelined round trip.
+
+        Once a ``done`` event is written the stream gets a retention TTL so
+        finished runs stay replayable for a while and then free their memory.
+        """
+        if not events:
+            return
         stream = self._stream(run_id)
-        consumer = f"c-{int(time.time() * 1000) % 1_000_000}"
+        pipe = self._redis.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(stream, {"e": json.dumps(event)}, maxlen=STREAM_MAXLEN)
+        if _is_done(events):
+            pipe.expire(stream, settings.RUN_STREAM_TTL_SECONDS)
+        pipe.execute()
+
+    def batch(
+        self,
+        run_id: UUID,
+        *,
+        max_delay: float = TOKEN_BATCH_MAX_DELAY,
+        max_bytes: int = TOKEN_BATCH_MAX_BYTES,
+    ) -> TokenBatcher:
+        return TokenBatcher(self, run_id, max_delay=max_delay, max_bytes=max_bytes)
+
+    async def consume(self, run_id: UUID) -> AsyncIterator[dict]:
+        """Read events without blocking the loop; delegates to the asyncio bus."""
+        async for payload in async_bus.consume(run_id):
+            yield payload
+
+
+class _TokenBuffer:
+    """Token framing shared by the sync and asyncio batchers (no I/O)."""
+
+    def __init__(self, run_id: UUID, *, max_delay: float, max_bytes: int) -> None:
+        self._run_id = run_id
+        self._max_delay = max_delay
+        self._max_bytes = max_bytes
+        self._tokens: list[str] = []
+        self._size = 0
+        self._pending: list[dict] = []
+        self._last_write = time.monotonic()
+        self._first_token = self._last_write
+
+    def _buffer_token(self, text: str) -> bool:
+        """Buffer ``text``; True when pending frames are due to be written."""
+        now = time.monotonic()
+        if not self._tokens:
+            self._first_token = now
+        self._tokens.append(text)
+        self._size += len(text.encode("utf-8"))
+        # A slow trickle never reaches max_bytes; bound its latency by age instead
+        expired = now - self._first_token >= self._max_delay
+        if self._size >= self._max_bytes or expired:
+            self._seal()
+        return bool(self._pending) and (expired or now - self._last_write >= self._max_delay)
+
+    def _buffer_event(self, event: dict) -> None:
+        self._seal()
+        self._pending.append(event)
+
+    def _seal(self) -> None:
+        if not self._tokens:
+            return
+        self._pending.append({"type": "token_batch", "data": "".join(self._tokens), "count": len(self._tokens)})
+        self._tokens = []
+        self._size = 0
+
+    def _take(self) -> list[dict]:
+        pending, self._pending = self._pending, []
+        self._last_write = time.monotonic()
+        return pending
+
+
+class TokenBatcher(_TokenBuffer):
+    """
+    Coalesce token events into ``token_batch`` frames.
+
+    Tokens are buffered until ``max_bytes`` of text accumulates or the oldest
+    buffered token is ``max_delay`` seconds old, and buffered frames are
+    written with one pipelined XADD once ``max_delay`` seconds have passed
+    since the last write (immediately for a frame closed by age). Any other event flushes pending tokens first,
+    so ordering on the stream is preserved. Use as a context manager so the
+    tail is flushed on exit.
+    """
+
+    def __init__(self, bus: RunBus, run_id: UUID, *, max_delay: float, max_bytes: int) -> None:
+        super().__init__(run_id, max_delay=max_delay, max_bytes=max_bytes)
+        self._bus = bus
+
+    def __enter__(self) -> TokenBatcher:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.flush()
+
+    def add_token(self, text: str) -> None:
+        if self._buffer_token(text):
+            self._write()
+
+    def publish(self, event: dict) -> None:
+        self._buffer_event(event)
+        self._write()
+
+    def flush(self) -> None:
+        self._seal()
+        self._write()
+
+    def _write(self) -> None:
+        if events := self._take():
+            self._bus.publish_many(self._run_id, events)
+
+
+class AsyncTokenBatcher(_TokenBuffer):
+    """``TokenBatcher`` for ``AsyncRunBus``: same framing, writes are awaited."""
+
+    def __init__(self, bus: AsyncRunBus, run_id: UUID, *, max_delay: float, max_bytes: int) -> None:
+        super().__init__(run_id, max_delay=max_delay, max_bytes=max_bytes)
+        self._bus = bus
+
+    async def __aenter__(self) -> AsyncTokenBatcher:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.flush()
+
+    async def add_token(self, text: str) -> None:
+        if self._buffer_token(text):
+            await self._write()
+
+    async def publish(self, event: dict) -> None:
+        self._buffer_event(event)
+        await self._write()
+
+    async def flush(self) -> None:
+        self._seal()
+        await self._write()
+
+    async def _write(self) -> None:
+        if events := self._take():
+            await self._bus.publish_many(self._run_id, events)
+
+
+def _parse_entry_id(entry_id: str | None) -> tuple[int, int] | None:
+    """Parse a Redis stream entry ID (``<ms>-<seq>``); ``None`` if malformed."""
+    if not entry_id:
+        return None
+    ms, _, seq = entry_id.partition("-")
+    try:
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return None
+
+
+@dataclass(eq=False)
+class RunSubscription:
+    stream: str
+    queue: asyncio.Queue[tuple[str, dict[str, Any]]]
+    lagged: bool = False
+
+    def offer(self, item: tuple[str, dict[str, Any]]) -> None:
+        # A full queue means the client is slow; stop queueing (newer entries
+        # would jump the gap) until the consumer has backfilled from the stream.
+        if self.lagged:
+            return
         try:
-            self._redis.xgroup_create(stream, GROUP, id="$", mkstream=True)
-        except Exception:
-            pass
-        last_id = ">"
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+
+@dataclass
+class _StreamReader:
+    stream: str
+    subscribers: set[RunSubscription] = field(default_factory=set)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task[None] | None = None
+
+
+class RunStreamHub:
+    """
+    Per-process fan-out for run streams.
+
+    Each active ``run:{id}`` stream gets a single XREAD loop no matter how many
+    local WebSocket/SSE clients watch it; entries are copied into a bounded
+    queue per subscriber and the loop is torn down when the last one leaves.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self._queue_size = queue_size
+        self._readers: dict[str, _StreamReader] = {}
+
+    async def subscribe(self, stream: str) -> RunSubscription:
+        """Register a subscriber and wait until the reader has anchored its cursor."""
+        subscription = RunSubscription(stream=stream, queue=asyncio.Queue(maxsize=self._queue_size))
+        reader = self._readers.get(stream)
+        if reader is None:
+            reader = _StreamReader(stream=stream)
+            self._readers[stream] = reader
+            reader.task = asyncio.create_task(self._read_loop(reader))
+        reader.subscribers.add(subscription)
+        await reader.ready.wait()
+        return subscription
+
+    def unsubscribe(self, subscription: RunSubscription) -> None:
+        reader = self._readers.get(subscription.stream)
+        if reader is None:
+            return
+        reader.subscribers.discard(subscription)
+        if not reader.subscribers:
+            del self._readers[subscription.stream]
+            if reader.task is not None:
+                reader.task.cancel()
+
+    def subscriber_count(self, stream: str) -> int:
+        reader = self._readers.get(stream)
+        return len(reader.subscribers) if reader else 0
+
+    async def _read_loop(self, reader: _StreamReader) -> None:
+        redis = get_async_redis()
+        last_id: str | None = None
         while True:
-            records = self._redis.xreadgroup(GROUP, consumer, {stream: last_id}, count=10, block=5000)
-            if not records:
-                await asyncio.sleep(0.05)
+            try:
+                if last_id is None:
+                    # Anchor to a concrete ID: re-issuing XREAD with "$" after a
+                    # timeout would skip anything added between the two calls.
+                    latest = await redis.xrevrange(reader.stream, count=1)
+                    last_id = latest[0][0] if latest else "0-0"
+                    reader.ready.set()
+                records = await redis.xread({reader.stream: last_id}, count=READ_COUNT, block=READ_BLOCK_MS)
+            except asyncio.CancelledError:  # noqa: PERF203 - propagate cancellation
+                raise
+            except Exception as exc:  # noqa: BLE001 - keep serving subscribers after transient errors
+                logger.warning("Run stream reader for %s failed: %r", reader.stream, exc)
+                await asyncio.sleep(1.0)
                 continue
-            for _, entries in records:
+            for _, entries in records or []:
                 for entry_id, fields in entries:
+                    last_id = entry_id
                     payload = json.loads(fields.get("e", "{}"))
-                    yield payload
-                    self._redis.xack(stream, GROUP, entry_id)
+                    for subscription in list(reader.subscribers):
+                        subscription.offer((entry_id, payload))
+
+
+class AsyncRunBus:
+    """
+    asyncio RunBus backed by ``redis.asyncio``.
+
+    Blocking stream reads are awaited instead of stalling the event loop, and
+    all local consumers of a run share one reader through the stream hub.
+    History is replayed with XRANGE, so late joiners see the whole run and
+    reconnecting clients resume after the last entry ID they received.
+    """
+
+    def __init__(self, hub: RunStreamHub | None = None) -> None:
+        self._hub = hub or RunStreamHub()
+
+    def _stream(self, run_id: UUID) -> str:
+        return _stream_key(run_id)
+
+    async def publish(self, run_id: UUID, event: dict) -> None:
+        await self.publish_many(run_id, [event])
+
+    async def publish_many(self, run_id: UUID, events: list[dict]) -> None:
+        """Pipelined like ``RunBus.publish_many``, without blocking the event loop."""
+        if not events:
+            return
+        stream = self._stream(run_id)
+        pipe = get_async_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(stream, {"e": json.dumps(event)}, maxlen=STREAM_MAXLEN)
+        if _is_done(events):
+            pipe.expire(stream, settings.RUN_STREAM_TTL_SECONDS)
+        await pipe.execute()
+
+    def batch(
+        self,
+        run_id: UUID,
+        *,
+        max_delay: float = TOKEN_BATCH_MAX_DELAY,
+        max_bytes: int = TOKEN_BATCH_MAX_BYTES,
+    ) -> AsyncTokenBatcher:
+        return AsyncTokenBatcher(self, run_id, max_delay=max_delay, max_bytes=max_bytes)
+
+    async def consume(self, run_id: UUID, since: str | None = None) -> AsyncIterator[dict]:
+        async for _, payload in self.stream(run_id, since):
+            yield payload
+
+    async def stream(self, run_id: UUID, since: str | None = None) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Yield ``(entry_id, event)`` pairs for a run.
+
+        ``since`` is the last entry ID the client already has; only later
+        entries are delivered. Without it the stream is replayed from the start.
+        """
+        stream = self._stream(run_id)
+        cursor = since if _parse_entry_id(since) is not None else None
+        subscription = await self._hub.subscribe(stream)
+        try:
+            async for entry_id, payload in self._range(stream, cursor):
+                cursor = entry_id
+                yield entry_id, payload
+            while True:
+                if subscription.lagged:
+                    # Resume queueing first, then drop the queue: the XRANGE
+                    # below re-reads everything after the last yielded entry,
+                    # and newer queued entries are skipped as duplicates.
+                    subscription.lagged = False
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    async for entry_id, payload in self._range(stream, cursor):
+                        cursor = entry_id
+                        yield entry_id, payload
+                    continue
+                entry_id, payload = await subscription.queue.get()
+                if cursor is not None and _parse_entry_id(entry_id) <= _parse_entry_id(cursor):
+                    continue  # already delivered by the replay
+                cursor = entry_id
+                yield entry_id, payload
+        finally:
+            self._hub.unsubscribe(subscription)
+
+    async def _range(self, stream: str, after: str | None) -> AsyncIterator[tuple[str, dict]]:
+        redis = get_async_redis()
+        start = "-" if after is None else f"({after}"
+        while True:
+            entries = await redis.xrange(stream, min=start, max="+", count=READ_COUNT)
+            for entry_id, fields in entries:
+                yield entry_id, json.loads(fields.get("e", "{}"))
+            if len(entries) < READ_COUNT:
+                return
+            start = f"({entries[-1][0]}"
+
+
+@dataclass
+class StreamGCStats:
+    streams_scanned: int = 0
+    keys_expired: int = 0
+    keys_deleted: int = 0
+    bytes_expiring: int = 0  # held by streams that were given a retention TTL
+    bytes_reclaimed: int = 0  # freed by deleting empty streams
+    consumers_deleted: int = 0
+    pending_dropped: int = 0
+    groups_destroyed: int = 0
+
+
+class RunStreamLifecycle:
+    """
+    Garbage collection for ``run:*`` streams.
+
+    A sweep puts a retention TTL on finished (or long-abandoned) streams that
+    have none yet, deletes empty streams outright, deletes consumer-group
+    consumers idle past the threshold together with their pending entries,
+    and destroys groups left without consumers. Totals are accumulated in Redis for the metrics collector.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: int | None = None,
+        abandon_seconds: int | None = None,
+        consumer_idle_ms: int | None = None,
+    ) -> None:
+        self._redis = get_redis()
+        self._ttl = ttl_seconds if ttl_seconds is not None else settings.RUN_STREAM_TTL_SECONDS
+        self._abandon = abandon_seconds if abandon_seconds is not None else settings.RUN_STREAM_ABANDON_SECONDS
+        self._idle_ms = consumer_idle_ms if consumer_idle_ms is not None else settings.RUN_STREAM_CONSUMER_IDLE_MS
+
+    def sweep(self) -> StreamGCStats:
+        stats = StreamGCStats()
+        for stream in self._redis.scan_iter(match=f"{STREAM_PREFIX}*", _type="stream", count=500):
+            stats.streams_scanned += 1
+            try:
+                self._prune_consumers(stream, stats)
+                self._apply_retention(stream, stats)
+            except ResponseError as exc:  # stream vanished or expired mid-sweep
+                logger.debug("Run stream GC skipped %s: %r", stream, exc)
+        self._record(stats)
+        return stats
+
+    def _prune_consumers(self, stream: str, stats: StreamGCStats) -> None:
+        for group in self._redis.xinfo_groups(stream):
+            name = group["name"]
+            remaining = 0
+            for consumer in self._redis.xinfo_consumers(stream, name):
+                if consumer["idle"] >= self._idle_ms:
+                    stats.pending_dropped += self._redis.xgroup_delconsumer(stream, name, consumer["name"])
+                    stats.consumers_deleted += 1
+                else:
+                    remaining += 1
+            if remaining == 0:
+                self._redis.xgroup_destroy(stream, name)
+                stats.groups_destroyed += 1
+
+    def _apply_retention(self, stream: str, stats: StreamGCStats) -> None:
+        if self._redis.ttl(stream) != -1:
+            return  # already expiring (or gone)
+        latest = self._redis.xrevrange(stream, count=1)
+        if latest:
+            entry_id, fields = latest[0]
+            finished = json.loads(fields.get("e", "{}")).get("type") == "done"
+            age = time.time() - _parse_entry_id(entry_id)[0] / 1000
+            if not finished and age < self._abandon:
+                return
+        if not latest:
+            # Nothing left to replay; an empty stream only lingers because of its groups
+            stats.bytes_reclaimed += self._memory_usage(stream)
+            stats.keys_deleted += self._redis.delete(stream)
+            return
+        stats.bytes_expiring += self._memory_usage(stream)
+        self._redis.expire(stream, self._ttl)
+        stats.keys_expired += 1
+
+    def _memory_usage(self, key: str) -> int:
+        try:
+            return int(self._redis.memory_usage(key) or 0)
+        except ResponseError:
+            return 0  # MEMORY USAGE unavailable (e.g. restricted ACL)
+
+    def _record(self, stats: StreamGCStats) -> None:
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for name, value in asdict(stats).items():
+                if value:
+                    pipe.hincrby(GC_STATS_KEY, name, value)
+            pipe.hincrby(GC_STATS_KEY, "sweeps", 1)
+            pipe.execute()
+        except Exception:  # noqa: BLE001 - metrics best effort
+            pass
+
+
+def sweep_run_streams() -> dict[str, int]:
+    """RQ job: run one GC sweep and schedule the next one."""
+    stats = RunStreamLifecycle().sweep()
+    logger.info("Run stream GC: %s", stats)
+    schedule_run_stream_gc()
+    return asdict(stats)
+
+
+def schedule_run_stream_gc(queue: Any = None) -> None:
+    """
+    Schedule the next sweep on the RQ scheduler.
+
+    The job ID is derived from the time slot, so every worker (and every
+    self-reschedule) in the same interval maps to one scheduled job.
+    """
+    from app.services.jobs import get_queue
+
+    interval = settings.RUN_STREAM_GC_INTERVAL_SECONDS
+    slot = int(time.time() // interval) + 1
+    queue = queue or get_queue()
+    queue.enqueue_in(
+        timedelta(seconds=slot * interval - time.time()),
+        sweep_run_streams,
+        job_id=f"crew7-run-stream-gc-{slot}",
+        result_ttl=interval,
+    )
 
 
+hub = RunStreamHub()
 bus = RunBus()
+async_bus = AsyncRunBus(hub)
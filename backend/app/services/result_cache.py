@@ -0,0 +1,123 @@
+"""
+Opt-in cache of finished run results.
+
+Eval suites and retried runs often send the same rendered prompt to the same
+crew configuration. Results are keyed by a hash of the crew and org, the
+crew's recipe, models, tools, the rendered prompt, the memory recalled into
+it and the resolved model versions, stored in Redis with a TTL, and evicted oldest-first once ``RUN_CACHE_MAX_ENTRIES`` is
+exceeded. A hit replays the stored token stream instead of running the crew.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from app.config import settings
+from app.crewai.models import model_versions
+from app.infra.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "run_cache:"
+CACHE_INDEX_KEY = "run_cache:index"
+STATS_KEY = "metrics:run_cache"
+BYPASS = "bypass"
+
+
+@dataclass
+class CachedRun:
+    text: str
+    tokens: list[str] = field(default_factory=list)
+    tasks: list[dict[str, Any]] = field(default_factory=list)
+
+
+def result_cache_key(
+    crew_id: str,
+    crew_snapshot: dict[str, Any],
+    rendered_prompt: str,
+    memory_context: str = "",
+) -> str:
+    """
+    ``memory_context`` is the crew memory recalled for the prompt: a run whose
+    memory has changed since the cached one is a different run.
+    """
+    fingerprint = json.dumps(
+        {
+            "crew_id": str(crew_id),
+            "org_id": str(crew_snapshot.get("org_id") or ""),
+            "recipe": crew_snapshot.get("recipe") or {},
+            "models": crew_snapshot.get("models") or {},
+            "tools": crew_snapshot.get("tools") or {},
+            "prompt": rendered_prompt,
+            "memory": memory_context,
+            "model_versions": model_versions(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def cache_enabled(recipe: dict[str, Any]) -> bool:
+    """Globally via CREW7_RUN_CACHE or per crew with ``recipe_json.result_cache``."""
+    return bool(recipe.get("result_cache", settings.RUN_CACHE_ENABLED))
+
+
+def wants_bypass(inputs: dict[str, Any]) -> bool:
+    return str(inputs.get("cache", "")).lower() == BYPASS
+
+
+class RunResultCache:
+    def lookup(self, key: str) -> CachedRun | None:
+        try:
+            redis = get_redis()
+            raw = redis.get(f"{CACHE_PREFIX}{key}")
+            if raw is None:
+                # Entry expired by TTL; drop it from the eviction index too
+                redis.zrem(CACHE_INDEX_KEY, key)
+                self.record("miss")
+                return None
+            cached = CachedRun(**json.loads(raw))
+        except Exception as exc:  # noqa: BLE001 - a broken cache must not fail the run
+            logger.warning("Run cache lookup failed: %r", exc)
+            return None
+        self.record("hit")
+        return cached
+
+    def store(self, key: str, run: CachedRun) -> bool:
+        payload = json.dumps(asdict(run))
+        if len(payload.encode()) > settings.RUN_CACHE_MAX_BYTES:
+            self.record("oversize")
+            return False
+        try:
+            redis = get_redis()
+            pipe = redis.pipeline()
+            pipe.set(f"{CACHE_PREFIX}{key}", payload, ex=settings.RUN_CACHE_TTL_SECONDS)
+            pipe.zadd(CACHE_INDEX_KEY, {key: time.time()})
+            pipe.zcard(CACHE_INDEX_KEY)
+            size = pipe.execute()[-1]
+
+            overflow = size - settings.RUN_CACHE_MAX_ENTRIES
+            evicted = [member for member, _ in redis.zpopmin(CACHE_INDEX_KEY, overflow)] if overflow > 0 else []
+            if evicted:
+                redis.delete(*(f"{CACHE_PREFIX}{member}" for member in evicted))
+        except Exception as exc:  # noqa: BLE001 - caching is best effort
+            logger.warning("Run cache store failed: %r", exc)
+            return False
+        self.record("store")
+        if evicted:
+            self.record("evict", len(evicted))
+        return True
+
+    def record(self, result: str, amount: int = 1) -> None:
+        try:
+            get_redis().hincrby(STATS_KEY, result, amount)
+        except Exception:  # noqa: BLE001 - metrics best effort
+            pass
+
+
+result_cache = RunResultCache()
@@ -0,0 +1,112 @@
+"""
+Long-lived RQ worker processes for run orchestration.
+
+The stock ``rq.Worker`` forks a work horse per job, so every run re-imports
+crewai/langchain/qdrant_client and discards pooled LLM clients and agent
+templates. ``PreloadedWorker`` executes jobs in its own process after warming
+that stack once; ``run_preloaded`` runs one of them, or a ``WorkerPool`` of
+them forked from a parent that already imported everything.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Coroutine, TypeVar
+
+from redis import Redis
+from rq import Queue, SimpleWorker, get_current_job
+from rq.job import Job
+from rq.timeouts import JobTimeoutException
+from rq.worker_pool import WorkerPool
+
+from app.infra.redis_client import close_async_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Event loop of the async worker; its job threads inherit it through their context
+worker_loop: ContextVar[asyncio.AbstractEventLoop | None] = ContextVar("worker_loop", default=None)
+
+
+def preload_runtime() -> float:
+    """Import the orchestration stack (crewai, langchain, qdrant_client); returns seconds spent."""
+    started = time.perf_counter()
+    from app.services import orchestrator_service  # noqa: F401 - imports crew factories and clients
+
+    return time.perf_counter() - started
+
+
+def warm_runtime() -> float:
+    """Preload modules and build agent templates (and their LLM clients); returns seconds spent."""
+    started = time.perf_counter()
+    preload_runtime()
+    from app.crewai.templates import warm_agent_templates
+
+    try:
+        warmed = warm_agent_templates()
+    except Exception as exc:  # noqa: BLE001 - fall back to building templates on first run
+        logger.warning("Could not warm agent templates: %r", exc)
+    else:
+        logger.info("Warmed agent templates for %s", ", ".join(warmed) or "no crew types")
+    return time.perf_counter() - started
+
+
+def job_startup_seconds(job: Job | None) -> float:
+    """Seconds since RQ started ``job`` (0 outside a worker)."""
+    if job is None or job.started_at is None:
+        return 0.0
+    started_at = job.started_at
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    return max((datetime.now(timezone.utc) - started_at).total_seconds(), 0.0)
+
+
+def run_job_coroutine(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run ``coro`` to completion from a job function.
+
+    In a job thread of the async worker it runs on that worker's event loop,
+    cancelled once the job's timeout passes; anywhere else on a fresh loop,
+    whose asyncio Redis pool is closed before the loop is.
+    """
+    loop = worker_loop.get()
+    if loop is None:
+        return asyncio.run(_closing_async_redis(coro))
+    job = get_current_job()
+    timeout = job.timeout if job is not None and job.timeout and job.timeout > 0 else None
+    future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(coro, timeout), loop)
+    try:
+        return future.result()
+    except TimeoutError as exc:
+        raise JobTimeoutException(f"Task exceeded maximum timeout value ({timeout} seconds)") from exc
+
+
+async def _closing_async_redis(coro: Coroutine[Any, Any, T]) -> T:
+    try:
+        return await coro
+    finally:
+        await close_async_redis()
+
+
+class PreloadedWorker(SimpleWorker):
+    """``SimpleWorker`` that warms the run stack once and keeps it across jobs."""
+
+    def work(self, *args, **kwargs):  # type: ignore[override]
+        elapsed = warm_runtime()
+        self.log.info("Run stack warmed in %.2fs", elapsed)
+        return super().work(*args, **kwargs)
+
+
+def run_preloaded(queues: list[Queue], connection: Redis, concurrency: int = 1) -> None:
+    """Serve ``queues`` from ``concurrency`` preloaded worker processes."""
+    # Imported before forking so pool children inherit the loaded modules
+    preload_runtime()
+    if concurrency <= 1:
+        PreloadedWorker(queues, connection=connection).work(with_scheduler=True)
+        return
+    pool = WorkerPool(queues, connection=connection, num_workers=concurrency, worker_class=PreloadedWorker)
+    pool.start()
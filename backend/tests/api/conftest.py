@@ -6,15 +6,19 @@ This module provides common fixtures used across all API test files.
 from __future__ import annotations
 
 import atexit
+import json
 import os
 import sys
 import tempfile
-from typing import Callable
+from typing import Callable, Iterator
 from pathlib import Path
 
 import fakeredis
+import fakeredis.aioredis
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from qdrant_client import QdrantClient
 
 # Add backend directory to Python path
 backend_dir = Path(__file__).parent.parent.parent
@@ -29,12 +33,14 @@ os.environ["DB_URL"] = f"sqlite+pysqlite:///{_DB_PATH}"
 os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
 
 from app.main import app  # noqa: E402
-from app.infra import redis_client  # noqa: E402
+from app.infra import qdrant_client, redis_client  # noqa: E402
+from app.infra.embedding_cache import embedding_cache  # noqa: E402
+from app.infra.embedding_models import clear_dimensions  # noqa: E402
 from app.infra.db import Base, SessionLocal, engine  # noqa: E402
 from app.models.billing import ensure_wallet  # noqa: E402
 from app.models.user import User  # noqa: E402
 from app.services.bootstrap import ensure_seed_crews  # noqa: E402
-from app.services import crew_service, jobs  # noqa: E402
+from app.services import crew_service, embedding_service, fanout, jobs, memory_ingest, mission_bus, pubsub  # noqa: E402
 
 
 def _cleanup_db_path() -> None:
@@ -59,9 +65,22 @@ def _reset_database() -> None:
 @pytest.fixture()
 def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
     """Create test client with mocked dependencies."""
-    fake_redis = fakeredis.FakeRedis(decode_responses=True)
+    fake_server = fakeredis.FakeServer()
+    fake_redis = fakeredis.FakeRedis(server=fake_server, decode_responses=True)
     redis_client._redis = fake_redis  # type: ignore[attr-defined]
+    redis_client._binary_redis = fakeredis.FakeRedis(server=fake_server)  # type: ignore[attr-defined]
     monkeypatch.setattr(redis_client, "get_redis", lambda: fake_redis)
+    monkeypatch.setattr(pubsub.bus, "_redis", fake_redis)
+    # redis.asyncio clients are loop-bound; hand out a fresh one per call
+    def fake_async_redis() -> fakeredis.aioredis.FakeRedis:
+        return fakeredis.aioredis.FakeRedis(server=fake_server, decode_responses=True)
+
+    monkeypatch.setattr(pubsub, "get_async_redis", fake_async_redis)
+    monkeypatch.setattr(fanout, "get_async_redis", fake_async_redis)
+    monkeypatch.setattr(mission_bus, "get_async_redis", fake_async_redis)
+    monkeypatch.setattr(memory_ingest, "get_async_redis", fake_async_redis)
+    # fakeredis serves blocking reads synchronously, so keep them short
+    monkeypatch.setattr(pubsub, "READ_BLOCK_MS", 10)
 
     class DummyQueue:
         def __init__(self) -> None:
@@ -120,3 +139,42 @@ def user_with_credits(client: TestClient, auth_token: str) -> None:
         wallet = ensure_wallet(session, user_row.org_id)
         wallet.credits = 1000
         session.commit()
+
+
+@pytest.fixture()
+def local_qdrant(monkeypatch: pytest.MonkeyPatch) -> QdrantClient:
+    """In-process Qdrant installed as the app's client, with empty collection memos."""
+    local = QdrantClient(":memory:")
+    monkeypatch.setattr(qdrant_client, "_qdrant", local)
+    monkeypatch.setattr(qdrant_client, "_known_collections", set())
+    monkeypatch.setattr(qdrant_client, "_sparse_collections", {})
+    return local
+
+
+class FakeOllama:
+    """Stand-in for Ollama's /api/embed: ``embed`` maps each batch to vectors, ``requests`` records the batches."""
+
+    def __init__(self) -> None:
+        self.requests: list[list[str]] = []
+        self.embed: Callable[[list[str]], list[list[float]]] = lambda texts: [
+            [1.0 + len(text)] + [0.5] * 383 for text in texts
+        ]
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/embed"
+        texts = json.loads(request.content)["input"]
+        self.requests.append(texts)
+        return httpx.Response(200, json={"embeddings": self.embed(texts)})
+
+
+@pytest.fixture()
+def fake_ollama(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeOllama]:
+    """Serve embeddings from a FakeOllama (deterministic 384-dim vectors) with cold embedding caches."""
+    fake = FakeOllama()
+    ollama = httpx.Client(base_url="http://ollama.test", transport=httpx.MockTransport(fake.handle))
+    monkeypatch.setattr(embedding_service, "_http_client", ollama)
+    embedding_cache.clear()
+    clear_dimensions()
+    yield fake
+    embedding_cache.clear()
+    clear_dimensions()
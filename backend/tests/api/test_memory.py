@@ -4,8 +4,15 @@ Tests for Memory API endpoints.
 Endpoints: /memory
 Router: app.routes.memory
 """
+import json
+
 import pytest
 from fastapi.testclient import TestClient
+from qdrant_client import QdrantClient
+
+
+# Every test embeds through a fake Ollama (see conftest.fake_ollama)
+pytestmark = pytest.mark.usefixtures("fake_ollama")
 
 
 def test_memory_embed(client: TestClient):
@@ -33,6 +40,330 @@ def test_memory_embed_batch(client: TestClient):
     assert data["count"] == 3
 
 
+def test_embeddings_batch_sends_chunks_to_embed_endpoint(monkeypatch: pytest.MonkeyPatch, fake_ollama):
+    """Test generate_embeddings_batch sends one /api/embed request per chunk and keeps order"""
+    from app.services import embedding_service
+
+    fake_ollama.embed = lambda texts: [[float(text.split()[-1])] for text in texts]
+    monkeypatch.setattr(embedding_service.embedding_cache, "ttl_seconds", 0)
+
+    texts = [f"text {index}" for index in range(10)]
+    embeddings = embedding_service.generate_embeddings_batch(texts, batch_size=4, concurrency=3)
+
+    assert embeddings == [[float(index)] for index in range(10)]
+    assert sorted(len(chunk) for chunk in fake_ollama.requests) == [2, 4, 4]
+    assert embedding_service.generate_embedding("text 7") == [7.0]
+
+
+def test_embedding_cache_serves_repeats_from_lru_then_redis(client: TestClient, fake_ollama):
+    """Test repeated texts are embedded once and served from the LRU, then the Redis tier"""
+    from app.infra.embedding_cache import STATS_KEY, embedding_cache, pack_vector
+    from app.infra.redis_client import get_redis
+    from app.services import embedding_service
+
+    fake_ollama.embed = lambda texts: [[0.5, float(len(text))] for text in texts]
+    embedding_cache.flush_stats()
+    get_redis().delete(STATS_KEY)
+
+    texts = ["cached alpha", "cached beta!", "cached alpha"]
+    first = embedding_service.generate_embeddings_batch(texts)
+    assert fake_ollama.requests == [["cached alpha", "cached beta!"]]  # duplicates embedded once
+    assert embedding_service.generate_embeddings_batch(texts) == first  # LRU tier
+    embedding_cache.clear()
+    assert embedding_service.generate_embeddings_batch(texts) == first  # Redis tier
+    assert len(fake_ollama.requests) == 1
+
+    assert len(pack_vector(first[0])) == 4 * len(first[0])  # float32 blobs
+    assert all(isinstance(blob, bytes) for blob in embedding_cache._lru.values())  # LRU holds the same blobs
+    assert not get_redis().exists(STATS_KEY)  # counted in process until a flush
+    embedding_cache.flush_stats()
+    stats = get_redis().hgetall(STATS_KEY)
+    assert stats == {"miss": "3", "lru_hit": "3", "redis_hit": "3"}
+
+
+def test_embedding_dimensions_are_registered_and_enforced(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """Test the embedding registry sizes vectors once and rejects mis-sized or zero vectors"""
+    from app.config import settings
+    from app.infra import embedding_models
+    from app.infra.embedding_models import EmbeddingDimensionError, check_vector, embedding_dimension
+    from app.infra.redis_client import get_redis
+    from app.services.embedding_service import generate_embedding
+
+    monkeypatch.setattr(embedding_models, "_probe_dimension", lambda model: None)
+    monkeypatch.setattr(embedding_models, "PROBE_RETRY_SECONDS", 0)
+    assert embedding_dimension("nomic-embed-text:latest") == 768  # offline fallback table
+    monkeypatch.setattr(embedding_models, "_probe_dimension", lambda model: 512)
+    assert embedding_dimension("nomic-embed-text:latest") == 512  # the fallback was not memoized
+
+    vector = generate_embedding("registry probe")
+    assert embedding_dimension() == len(vector) == 384
+    assert get_redis().hget(embedding_models.DIMENSIONS_KEY, settings.MODEL_EMBED) == "384"
+
+    check_vector(vector)
+    with pytest.raises(EmbeddingDimensionError):
+        check_vector([0.1] * 768)
+    with pytest.raises(EmbeddingDimensionError):
+        check_vector([0.0] * 384)
+
+    response = client.post(
+        "/memory/crews/registry-crew",
+        json={"content": "placeholder", "embedding": [0.0] * 384},
+    )
+    assert response.status_code == 422
+
+
+def test_ensure_collection_is_memoized_and_invalidated_on_clear(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    local_qdrant: QdrantClient
+):
+    """Test memory writes skip the existence check for known collections until they are cleared"""
+    from app.services.memory_service import add_crew_memory, clear_crew_memory, search_crew_memory
+
+    checks: list[str] = []
+    exists = local_qdrant.collection_exists
+
+    def counting_exists(name: str) -> bool:
+        checks.append(name)
+        return exists(name)
+
+    monkeypatch.setattr(local_qdrant, "collection_exists", counting_exists)
+
+    vector = [1.0] + [0.5] * 383
+    for index in range(3):
+        add_crew_memory("memo-crew", f"memory {index}", vector)
+    assert checks == ["crew_memory_memo-crew"]
+    assert len(search_crew_memory("memo-crew", vector, top_k=5)) == 3
+
+    clear_crew_memory("memo-crew")
+    add_crew_memory("memo-crew", "after clear", vector)
+    assert len(checks) == 2
+    assert len(search_crew_memory("memo-crew", vector, top_k=5)) == 1
+
+
+def test_memory_writes_recreate_collection_deleted_elsewhere(client: TestClient, local_qdrant: QdrantClient):
+    """Test a collection deleted by another process is recreated on the next write instead of failing"""
+    from app.services.memory_ingest import IngestStats, ingest_chunk
+    from app.services.memory_service import add_crew_memory
+
+    vector = [1.0] + [0.5] * 383
+
+    add_crew_memory("gone-crew", "first", vector)
+    local_qdrant.delete_collection("crew_memory_gone-crew")  # memo still says it exists
+    add_crew_memory("gone-crew", "second", vector)
+    assert local_qdrant.count("crew_memory_gone-crew", exact=True).count == 1
+
+    local_qdrant.delete_collection("crew_memory_gone-crew")
+    stats = IngestStats(crew_id="gone-crew")
+    ingest_chunk("gone-crew", [(1, {"content": "ingested", "embedding": vector})], stats)
+    assert stats.ingested == 1
+    assert local_qdrant.count("crew_memory_gone-crew", exact=True).count == 1
+
+
+def test_ensure_collection_declares_payload_indexes(monkeypatch: pytest.MonkeyPatch, local_qdrant: QdrantClient):
+    """Test new collections get keyword/datetime payload indexes for every filterable field"""
+    from app.infra import qdrant_client
+
+    indexes: dict[str, object] = {}
+    monkeypatch.setattr(
+        local_qdrant, "create_payload_index", lambda collection_name, field_name, field_schema, **kwargs: indexes.update({field_name: field_schema})
+    )
+
+    qdrant_client.ensure_collection("indexed_memory", 4, tenant_key="crew_id", client=local_qdrant)
+
+    assert set(indexes) == {"crew_id", "mission_id", "agent_role", "type", "timestamp"}
+    assert indexes["crew_id"].is_tenant
+    assert indexes["timestamp"] == "datetime"
+
+
+def test_shared_memory_storage_isolates_tenants_and_migrates(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    local_qdrant: QdrantClient
+):
+    """Test shared collections filter by tenant and per-crew collections migrate into them"""
+    from app.config import settings
+    from app.services import memory_service
+    from app.services.memory_migration import migrate_all
+
+    vector = [1.0] + [0.5] * 383
+
+    # Legacy layout: one collection per crew
+    memory_service.add_crew_memory("legacy-crew", "legacy memory", vector)
+    assert local_qdrant.collection_exists("crew_memory_legacy-crew")
+
+    monkeypatch.setattr(settings, "MEMORY_STORAGE", "shared")
+    memory_service.add_crew_memory("crew-a", "a memory", vector)
+    memory_service.add_crew_memory("crew-b", "b memory", vector)
+    memory_service.add_mission_memory("mission-1", "mission memory", vector)
+    assert [hit["content"] for hit in memory_service.search_crew_memory("crew-a", vector)] == ["a memory"]
+    assert memory_service.get_crew_memory_stats("crew-b")["total_memories"] == 1
+    assert len(memory_service.search_mission_memory("mission-1", vector)) == 1
+
+    results = migrate_all(drop=True, client=local_qdrant)
+    assert [(result.source, result.copied, result.dropped) for result in results] == [
+        ("crew_memory_legacy-crew", 1, True)
+    ]
+    assert not local_qdrant.collection_exists("crew_memory_legacy-crew")
+    assert [hit["content"] for hit in memory_service.search_crew_memory("legacy-crew", vector)] == ["legacy memory"]
+
+    memory_service.clear_crew_memory("crew-a")
+    assert memory_service.search_crew_memory("crew-a", vector) == []
+    assert len(memory_service.search_crew_memory("crew-b", vector)) == 1
+
+
+def test_memory_ingest_streams_ndjson_in_chunks(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    local_qdrant: QdrantClient
+):
+    """Test POST /memory/crews/{crew_id}/ingest embeds and upserts per chunk and reports progress"""
+    from app.infra.redis_client import get_redis
+
+    upserts: list[tuple[int, bool]] = []
+    original_upsert = local_qdrant.upsert
+
+    def spy_upsert(collection_name, points, wait=True, **kwargs):
+        upserts.append((len(points), wait))
+        return original_upsert(collection_name=collection_name, points=points, wait=wait, **kwargs)
+
+    monkeypatch.setattr(local_qdrant, "upsert", spy_upsert)
+
+    lines = [json.dumps({"content": f"doc {index}", "agent_role": "backend"}) for index in range(5)]
+    lines.append(json.dumps({"content": "pre-embedded", "embedding": [2.0] + [0.5] * 383}))
+    lines.append("not json")
+    lines.append(json.dumps({"content": "wrong size", "embedding": [1.0, 2.0]}))
+    lines.append(json.dumps({"content": "not numbers", "embedding": ["a"] * 384}))
+    body = "\n".join(lines) + "\n"
+
+    response = client.post("/memory/crews/bulk-crew/ingest?chunk_size=3", content=body.encode())
+    assert response.status_code == 200
+    done = response.json()
+    assert done["event"] == "done"
+    assert (done["received"], done["ingested"], done["embedded"], done["failed"]) == (9, 6, 5, 3)
+    assert [error["line"] for error in done["errors"]] == [7, 8, 9]
+    assert done["errors"][2]["error"] == "embedding must be a list of finite numbers"
+    assert "per_second" in done
+    assert upserts == [(3, False), (3, False)]
+    assert local_qdrant.count("crew_memory_bulk-crew", exact=True).count == 6
+    assert get_redis().zcard("crew_recent:bulk-crew") == 6
+    assert client.get("/memory/crews/bulk-crew/ingest").json() == done
+
+
+def test_memory_ingest_counts_only_accepted_writes(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    local_qdrant: QdrantClient
+):
+    """Test lines of a chunk Qdrant did not accept are reported as failed, not ingested"""
+    from qdrant_client.http.models import UpdateResult
+
+    from app.infra.redis_client import get_redis
+    from app.services.memory_ingest import IngestStats, ingest_chunk
+
+    monkeypatch.setattr(local_qdrant, "upsert", lambda **kwargs: UpdateResult.model_construct(status="wait_timeout"))
+    vector = [1.0] + [0.5] * 383
+    stats = IngestStats(crew_id="rejected-crew")
+    ingest_chunk("rejected-crew", [(1, {"content": "a", "embedding": vector}), (2, {"content": "b", "embedding": vector})], stats)
+
+    assert (stats.ingested, stats.failed) == (0, 2)
+    assert stats.errors[0] == {"line": 1, "error": "Qdrant did not accept the write (status wait_timeout)"}
+    assert get_redis().zcard("crew_recent:rejected-crew") == 0
+
+    # A chunk whose write raises is reported the same way instead of aborting the import
+    def failing_upsert(**kwargs):
+        raise ConnectionError("qdrant down")
+
+    monkeypatch.setattr(local_qdrant, "upsert", failing_upsert)
+    ingest_chunk("rejected-crew", [(3, {"content": "c", "embedding": vector})], stats)
+    assert (stats.ingested, stats.failed) == (0, 3)
+    assert stats.errors[2] == {"line": 3, "error": "Qdrant write failed: qdrant down"}
+
+
+def test_recent_crew_memories_are_capped(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    local_qdrant: QdrantClient
+):
+    """Test the recent-memory sorted set keeps only the newest MEMORY_RECENT_LIMIT entries"""
+    from app.config import settings
+    from app.infra.redis_client import get_redis
+    from app.services import memory_service
+
+    monkeypatch.setattr(settings, "MEMORY_RECENT_LIMIT", 3)
+    get_redis().hset("crew_recent_capped-crew", "old", json.dumps("{}"))
+
+    for index in range(5):
+        memory_service.add_crew_memory("capped-crew", f"memory {index}", [1.0 + index] + [0.5] * 383)
+
+    recent = memory_service.recent_crew_memories("capped-crew")
+    assert [memory["content"] for memory in recent] == ["memory 4", "memory 3", "memory 2"]
+    assert recent[0]["crew_id"] == "capped-crew" and "id" in recent[0]
+    assert not get_redis().exists("crew_recent_capped-crew")
+    stats = memory_service.get_crew_memory_stats("capped-crew")
+    assert (stats["total_memories"], stats["recent_count"]) == (5, 3)
+
+    memory_service.clear_crew_memory("capped-crew")
+    assert memory_service.recent_crew_memories("capped-crew") == []
+
+    # One call's memories keep their order even though they share a timestamp
+    memory_service.remember_recent("capped-crew", [("b", {"content": "first"}), ("a", {"content": "second"})])
+    assert [memory["content"] for memory in memory_service.recent_crew_memories("capped-crew")] == ["second", "first"]
+
+
+def test_hybrid_recall_finds_exact_identifiers(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    local_qdrant: QdrantClient
+):
+    """Test search_crew_memory and recall_memory fuse BM25 matches with dense results"""
+    from langchain_core.embeddings import Embeddings
+
+    from app.config import settings
+    from app.crewai import adapters
+    from app.infra.embedding_models import EmbeddingDimensionError
+    from app.services import memory_service
+
+    query_vector = [1.0] + [0.5] * 383
+
+    # Off by default: collections stay dense-only and text queries are plain dense searches
+    memory_service.add_crew_memory("dense-crew", "E4012 on duplicate ids", query_vector)
+    assert not local_qdrant.get_collection("crew_memory_dense-crew").config.params.sparse_vectors
+    assert len(memory_service.search_crew_memory("dense-crew", query_vector, query_text="E4012")) == 1
+
+    monkeypatch.setattr(settings, "MEMORY_HYBRID", True)
+    memory_service.add_crew_memory("hybrid-crew", "Deploys go through the staging pipeline", query_vector)
+    memory_service.add_crew_memory(
+        "hybrid-crew", "POST /api/v2/invoices returns E4012 on duplicate ids", [0.1] * 383 + [1.0]
+    )
+
+    dense = memory_service.search_crew_memory("hybrid-crew", query_vector, top_k=1)
+    hybrid = memory_service.search_crew_memory("hybrid-crew", query_vector, top_k=1, query_text="why E4012?")
+    assert dense[0]["content"].startswith("Deploys")
+    assert hybrid[0]["content"].startswith("POST /api/v2/invoices")
+
+    class FixedEmbeddings(Embeddings):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            return [query_vector if "staging" in text else [0.1] * 383 + [1.0] for text in texts]
+
+        def embed_query(self, text: str) -> list[float]:
+            return query_vector
+
+    monkeypatch.setattr(adapters, "QdrantClient", lambda **kwargs: local_qdrant)
+    monkeypatch.setattr(adapters, "embedder", FixedEmbeddings)
+    adapters.upsert_memory("hybrid-crew", ["Deploys go through the staging pipeline", "invoices table: billing.invoices"])
+    hits = adapters.recall_memory("hybrid-crew", "billing.invoices schema", k=1)
+    assert [hit.page_content for hit in hits] == ["invoices table: billing.invoices"]
+
+    class ZeroEmbeddings(FixedEmbeddings):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            return [[0.0] * 384 for _ in texts]
+
+    monkeypatch.setattr(adapters, "embedder", ZeroEmbeddings)
+    with pytest.raises(EmbeddingDimensionError):
+        adapters.upsert_memory("hybrid-crew", ["embedding service returned zeros"])
+
+
 def test_memory_add_crew_memory(client: TestClient, auth_headers: dict[str, str], user_crew_id: str):
     """Test POST /memory/crews/{crew_id}"""
     # First generate embedding
@@ -101,3 +101,400 @@ def test_runs_get_artifacts(
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, (list, dict))
+
+
+def test_run_callbacks_report_task_progress():
+    """Test RunCallbacks emits task start/end events with edges from prior agents"""
+    from crewai import Agent, Crew, Task
+    from crewai.events import crewai_event_bus
+    from crewai.events.types.task_events import TaskStartedEvent
+    from crewai.tasks.task_output import TaskOutput
+
+    from app.crewai.callbacks import RunCallbacks
+
+    planner = Agent(role="Orchestrator / Tech Lead", goal="plan", backstory="b", llm="gpt-4o-mini")
+    backend = Agent(role="Backend Engineer", goal="build", backstory="b", llm="gpt-4o-mini")
+    t_plan = Task(description="Plan it", expected_output="plan", agent=planner)
+    t_build = Task(description="Build it", expected_output="code", agent=backend)
+    crew = Crew(agents=[planner, backend], tasks=[t_plan, t_build])
+
+    events: list[tuple[str, dict]] = []
+    callbacks = RunCallbacks(lambda kind, data: events.append((kind, data)))
+    callbacks.attach(crew)
+    try:
+        for task in crew.tasks:
+            crewai_event_bus.emit(task, TaskStartedEvent(context="", task=task))
+            task.callback(TaskOutput(description=task.description, raw=f"{task.description} done", agent=task.agent.role))
+    finally:
+        callbacks.detach()
+
+    assert [kind for kind, _ in events] == ["task_start", "task_end", "task_start", "task_end"]
+    assert events[0][1]["agent"] == "orchestrator"
+    assert events[2][1]["after"] == ["orchestrator"]
+    assert events[3][1]["output"] == "Build it done"
+    assert events[3][1]["duration_s"] >= 0
+
+
+def test_make_crew_dag_mode_declares_task_graph(monkeypatch: pytest.MonkeyPatch):
+    """Test dag execution mode builds a DagCrew whose specialists only wait for the plan"""
+    from app.crewai import factory
+    from app.crewai.dag import DagCrew, task_dependencies
+    from app.crewai.factory import make_crew
+
+    monkeypatch.setattr(factory, "recall_memory", lambda *args, **kwargs: [])
+    crew = make_crew("crew-dag-test", "Build a todo app", {}, execution_mode="dag")
+
+    assert isinstance(crew, DagCrew)
+    deps = task_dependencies(crew.tasks)
+    # backend, frontend, data and security depend on t_plan only
+    assert [deps[i] for i in (1, 2, 5, 6)] == [{0}] * 4
+    assert deps[-1] == set(range(len(crew.tasks) - 1))
+
+
+def test_make_crew_sequential_mode_keeps_default_context(monkeypatch: pytest.MonkeyPatch):
+    """Test sequential crews don't get dag dependency contexts, so every task sees all earlier outputs"""
+    from crewai.utilities.constants import NOT_SPECIFIED
+
+    from app.crewai import factory
+    from app.crewai.dag import DagCrew, task_dependencies
+    from app.crewai.factory import make_crew
+
+    monkeypatch.setattr(factory, "recall_memory", lambda *args, **kwargs: [])
+    crew = make_crew("crew-seq-test", "Build a todo app", {}, execution_mode="sequential")
+
+    assert not isinstance(crew, DagCrew)
+    assert all(task.context is NOT_SPECIFIED for task in crew.tasks)
+    assert task_dependencies(crew.tasks)[5] == set(range(5))
+
+
+def test_make_crew_reuses_agent_templates(monkeypatch: pytest.MonkeyPatch):
+    """Test repeated make_crew calls copy cached agent templates instead of rebuilding LLMs"""
+    from app.crewai import factory
+    from app.crewai.models import get_ollama_llm
+    from app.crewai.templates import clear_agent_templates
+    from app.crewai.toolpacks import default_toolpacks
+
+    calls: list[str] = []
+
+    def counting_llm(role: str):
+        calls.append(role)
+        return factory_llm
+
+    factory_llm = get_ollama_llm()
+    assert get_ollama_llm() is factory_llm  # pooled per (provider, model, temperature, max_tokens)
+
+    monkeypatch.setattr(factory, "recall_memory", lambda *args, **kwargs: [])
+    monkeypatch.setattr(factory, "get_llm_for_agent", counting_llm)
+    clear_agent_templates()
+    try:
+        qa_tools = default_toolpacks()["qa"]
+        first = factory.make_crew("crew-a", "Build it", {"qa": qa_tools})
+        second = factory.make_crew("crew-b", "Build it again", {})
+    finally:
+        clear_agent_templates()
+
+    assert len(calls) == 7
+    assert first.agents[0] is not second.agents[0]
+    assert first.agents[3].role == "QA Engineer"
+    assert first.agents[3].tools == qa_tools and second.agents[3].tools == []
+
+
+def test_preloaded_worker_warms_once_across_jobs(monkeypatch: pytest.MonkeyPatch):
+    """Test the preloaded worker warms the run stack once and runs jobs in-process"""
+    import fakeredis
+    from rq import Queue
+
+    from app.services import worker_runtime
+
+    warmed: list[float] = []
+    monkeypatch.setattr(worker_runtime, "warm_runtime", lambda: warmed.append(0.0) or 0.0)
+    conn = fakeredis.FakeRedis()
+    queue = Queue("runs", connection=conn)
+    jobs = [queue.enqueue(worker_runtime.job_startup_seconds, None) for _ in range(2)]
+
+    worker_runtime.PreloadedWorker([queue], connection=conn).work(burst=True)
+
+    assert len(warmed) == 1
+    for job in jobs:
+        job.refresh()
+        assert job.is_finished and job.result == 0.0
+
+
+def test_fair_buffer_admits_least_loaded_org_first():
+    """Test per-org fairness: a burst from one org does not starve another"""
+    from app.services.async_worker import FairBuffer
+
+    buffer: FairBuffer[str] = FairBuffer()
+    for index in range(3):
+        buffer.push("busy-org", f"busy-{index}")
+    buffer.push("small-org", "small-0")
+
+    admitted = [buffer.pop(), buffer.pop()]
+    assert admitted == [("busy-org", "busy-0"), ("small-org", "small-0")]
+
+    capped: FairBuffer[str] = FairBuffer(per_org_limit=1)
+    capped.push("busy-org", "a")
+    capped.push("busy-org", "b")
+    assert capped.pop() == ("busy-org", "a")
+    assert capped.pop() is None
+    capped.release("busy-org")
+    assert capped.pop() == ("busy-org", "b")
+
+
+def test_async_worker_runs_queued_jobs_concurrently():
+    """Test the async worker drains the runs queue and records RQ job results"""
+    import asyncio
+
+    import fakeredis
+    from rq import Queue
+
+    from app.services.async_worker import AsyncRunWorker
+    from app.services.worker_runtime import job_startup_seconds
+
+    conn = fakeredis.FakeRedis()
+    queue = Queue("runs", connection=conn)
+    jobs = [
+        queue.enqueue(job_startup_seconds, None, meta={"org_id": org})
+        for org in ("org-a", "org-a", "org-b")
+    ]
+
+    asyncio.run(AsyncRunWorker(queue, concurrency=2).run(burst=True))
+
+    for job in jobs:
+        job.refresh()
+        assert job.is_finished and job.result == 0.0
+    assert queue.count == 0 and len(queue.started_job_registry) == 0
+
+
+def test_async_worker_admits_small_org_past_capped_backlog():
+    """Test a capped org's backlog does not hold up another org's job queued behind it"""
+    import asyncio
+    import time
+
+    import fakeredis
+    from rq import Queue
+
+    from app.services.async_worker import AsyncRunWorker
+
+    conn = fakeredis.FakeRedis()
+    queue = Queue("runs", connection=conn)
+    busy = [queue.enqueue(time.sleep, 0.1, meta={"org_id": "org-a"}) for _ in range(6)]
+    small = queue.enqueue(time.sleep, 0.1, meta={"org_id": "org-b"})
+
+    asyncio.run(AsyncRunWorker(queue, concurrency=2, per_org_limit=1).run(burst=True))
+
+    for job in busy + [small]:
+        job.refresh()
+        assert job.is_finished
+    assert small.started_at < busy[1].started_at
+    assert queue.count == 0
+
+
+async def _sleep_and_report_loop(seconds: float) -> int:
+    import asyncio
+
+    await asyncio.sleep(seconds)
+    return id(asyncio.get_running_loop())
+
+
+def _run_job_coroutine(seconds: float) -> int:
+    from app.services.worker_runtime import run_job_coroutine
+
+    return run_job_coroutine(_sleep_and_report_loop(seconds))
+
+
+def test_async_worker_runs_job_coroutines_on_its_loop():
+    """Test job coroutines share the worker's event loop, overlap, and are cut off at the job timeout"""
+    import asyncio
+
+    import fakeredis
+    from rq import Queue
+
+    from app.services.async_worker import AsyncRunWorker
+
+    conn = fakeredis.FakeRedis()
+    queue = Queue("runs", connection=conn)
+    jobs = [queue.enqueue(_run_job_coroutine, 0.2, meta={"org_id": "org-a"}) for _ in range(2)]
+    slow = queue.enqueue(_run_job_coroutine, 5, job_timeout=1)
+
+    asyncio.run(AsyncRunWorker(queue, concurrency=3).run(burst=True))
+
+    for job in jobs:
+        job.refresh()
+        assert job.is_finished
+    assert jobs[0].result == jobs[1].result
+    assert jobs[1].started_at < jobs[0].ended_at
+    slow.refresh()
+    assert slow.is_failed and "JobTimeoutException" in slow.exc_info
+    assert len(queue.started_job_registry) == 0
+
+
+def test_job_event_loops_close_their_async_redis_pool(monkeypatch: pytest.MonkeyPatch):
+    """Test run_job_coroutine's fresh loop and the async worker's loop disconnect their asyncio Redis pool"""
+    import asyncio
+
+    import fakeredis
+    from rq import Queue
+
+    from app.infra import redis_client
+    from app.services.async_worker import AsyncRunWorker
+    from app.services.worker_runtime import run_job_coroutine
+
+    closed: list[object] = []
+
+    async def disconnect(self, inuse_connections: bool = True) -> None:
+        closed.append(self)
+
+    monkeypatch.setattr(redis_client.AsyncConnectionPool, "disconnect", disconnect)
+
+    async def use_redis() -> object:
+        return redis_client.get_async_redis().connection_pool
+
+    pool = run_job_coroutine(use_redis())
+    assert closed == [pool]
+
+    async def serve() -> object:
+        pool = await use_redis()
+        await AsyncRunWorker(Queue("runs", connection=fakeredis.FakeRedis()), concurrency=1).run(burst=True)
+        return pool
+
+    assert asyncio.run(serve()) is closed[-1]
+    assert len(closed) == 2
+
+
+def test_run_result_cache_hits_and_evicts_oldest(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """Test the run result cache keys on crew, config, prompt and memory and evicts beyond its size bound"""
+    from app.config import settings
+    from app.infra.redis_client import get_redis
+    from app.services.result_cache import CACHE_INDEX_KEY, CachedRun, result_cache, result_cache_key
+
+    monkeypatch.setattr(settings, "RUN_CACHE_MAX_ENTRIES", 2)
+    redis = get_redis()
+    redis.delete(CACHE_INDEX_KEY)
+    snapshot = {"recipe": {"mission": "m"}, "models": {}, "tools": {}, "org_id": "org-1"}
+    keys = [result_cache_key("crew-1", snapshot, f"prompt {index}", "memory") for index in range(3)]
+    assert result_cache_key("crew-1", snapshot, "prompt 0", "memory") == keys[0]
+    assert result_cache_key("crew-1", {**snapshot, "models": {"llm": "other"}}, "prompt 0", "memory") != keys[0]
+    assert result_cache_key("crew-2", snapshot, "prompt 0", "memory") != keys[0]
+    assert result_cache_key("crew-1", {**snapshot, "org_id": "org-2"}, "prompt 0", "memory") != keys[0]
+    assert result_cache_key("crew-1", snapshot, "prompt 0", "newer memory") != keys[0]
+
+    for index, key in enumerate(keys):
+        result_cache.store(key, CachedRun(text=f"answer {index}", tokens=["answer ", f"{index} "]))
+
+    assert result_cache.lookup(keys[0]) is None  # evicted as the oldest entry
+    hit = result_cache.lookup(keys[2])
+    assert hit is not None and hit.tokens == ["answer ", "2 "]
+    assert redis.zcard(CACHE_INDEX_KEY) == 2
+
+
+def test_orchestrate_run_async_keeps_redis_off_the_loop(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    user_crew_id: str,
+    user_with_credits: None,
+    monkeypatch: pytest.MonkeyPatch
+):
+    """Test the async run pipeline publishes through the asyncio bus and recalls crew memory once"""
+    import asyncio
+    import json
+    import threading
+
+    from app.config import settings
+    from app.infra.redis_client import get_redis
+    from app.services import orchestrator_service, pubsub
+
+    run_id = client.post(f"/runs/crew/{user_crew_id}", headers=auth_headers, json={"prompt": "Ship it"}).json()["id"]
+    monkeypatch.setattr(settings, "RUN_CACHE_ENABLED", True)
+    monkeypatch.setattr(pubsub.RunBus, "publish_many", lambda *args: pytest.fail("sync RunBus used on the event loop"))
+
+    recalls: list[str] = []
+    built_with: list[str | None] = []
+    kv_threads: list[int] = []
+    kv_set = orchestrator_service.kv_set
+
+    def recall(crew_id: str, prompt: str) -> str:
+        recalls.append(prompt)
+        return "Relevant prior memory:\n- shipped last week\n"
+
+    async def orchestration(crew_id, prompt, run_id, *, memory=None):
+        built_with.append(memory)
+        yield ("log", "Crew planning…")
+        for token in ["all ", "done "]:
+            yield ("token", token)
+        yield ("done", "all done")
+
+    def tracking_kv_set(*args) -> None:
+        kv_threads.append(threading.get_ident())
+        kv_set(*args)
+
+    monkeypatch.setattr(orchestrator_service, "memory_context", recall)
+    monkeypatch.setattr(orchestrator_service, "run_orchestration", orchestration)
+    monkeypatch.setattr(orchestrator_service, "kv_set", tracking_kv_set)
+    monkeypatch.setattr(orchestrator_service, "_store_run_memory", lambda *args: None)
+
+    async def run() -> int:
+        await orchestrator_service.orchestrate_run_async(run_id, user_crew_id, "Ship it", {})
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(recalls) == 1
+    assert built_with == ["Relevant prior memory:\n- shipped last week\n"]
+    assert kv_threads and loop_thread not in kv_threads
+    events = [json.loads(fields["e"]) for _, fields in get_redis().xrange(f"run:{run_id}")]
+    assert [event["type"] for event in events] == [
+        "status", "message", "token_batch", "message", "status", "done"
+    ]
+    assert events[2]["data"] == "all done "
+    assert get_redis().ttl(f"run:{run_id}") > 0
+    assert client.get(f"/runs/{run_id}", headers=auth_headers).json()["status"] == "succeeded"
+
+
+def test_llm_cache_replays_llm_and_tool_calls(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """Test models_json.llm_cache wraps agent LLMs and listed read-only tool calls in a cross-run cache"""
+    from crewai import Agent, Crew, Task
+    from crewai.llms.base_llm import BaseLLM
+
+    from app.crewai.llm_cache import CachedLLM, LLMCache, ToolCallCache
+
+    class CountingLLM(BaseLLM):
+        calls = 0
+
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+            CountingLLM.calls += 1
+            return f"answer {CountingLLM.calls}"
+
+    assert LLMCache.from_models({}) is None
+    assert LLMCache.from_models({"llm_cache": {"enabled": False}}) is None
+    with pytest.raises(ValueError):
+        LLMCache.from_models({"llm_cache": {"tools": ["search", "script_run"]}})
+    with pytest.raises(ValueError):
+        LLMCache.from_models({"llm_cache": {"backend": "disk", "max_entries": 10}})
+    assert LLMCache.from_models({"llm_cache": True}).tools == frozenset()
+    cache = LLMCache.from_models(
+        {"llm_cache": {"backend": "redis", "ttl_seconds": 60, "tools": ["search"]}},
+        scope="org-1/crew-1",
+    )
+    assert cache is not None
+
+    agent = Agent(role="Planner", goal="plan", backstory="b", llm=CountingLLM(model="fake-model"))
+    crew = Crew(agents=[agent], tasks=[Task(description="Plan", expected_output="plan", agent=agent)])
+    cache.attach(crew)
+
+    llm = crew.agents[0].llm
+    assert isinstance(llm, CachedLLM) and llm.model == "fake-model"
+    messages = [{"role": "user", "content": "plan the todo app"}]
+    assert llm.call(messages) == llm.call(messages) == "answer 1"
+    assert llm.call([{"role": "user", "content": "something else"}]) == "answer 2"
+    assert CountingLLM.calls == 2
+
+    handler = crew.agents[0].tools_handler.cache
+    handler.add(tool="search", input='{"q": "fastapi"}', output="docs")
+    assert handler.read(tool="search", input='{"q": "fastapi"}') == "docs"
+    assert handler.read(tool="search", input='{"q": "django"}') is None
+    handler.add(tool="pytest_run", input="{}", output="1 passed")
+    assert handler.read(tool="pytest_run", input="{}") is None
+
+    other_crew = ToolCallCache(cache.store, tools=cache.tools, scope="org-1/crew-2")
+    assert other_crew.read(tool="search", input='{"q": "fastapi"}') is None
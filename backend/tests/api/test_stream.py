@@ -4,10 +4,17 @@ Tests for Stream API endpoints (SSE).
 Endpoints: /events
 Router: app.routes.stream
 """
+import asyncio
+import json
+from uuid import uuid4
+
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 
+from app.infra.redis_client import get_redis
+from app.services.pubsub import GROUP, AsyncRunBus, RunStreamHub, RunStreamLifecycle, bus
+
 
 def test_stream_events_run(
     client: TestClient,
@@ -25,15 +32,161 @@ def test_stream_events_run(
     run_id = create_resp.json()["id"]
     
     # Mock the pubsub bus to avoid hanging on stream consumption
-    async def mock_consume(run_id):
-        """Mock consumer that immediately yields a done event"""
-        yield {"type": "boot"}
-        yield {"type": "done"}
+    async def mock_stream(run_id, since=None):
+        """Mock stream that immediately yields a done event"""
+        yield "1-0", {"type": "boot"}
+        yield "2-0", {"type": "done"}
     
     with patch("app.routes.stream.bus") as mock_bus:
-        mock_bus.consume = mock_consume
+        mock_bus.stream = mock_stream
         
         # Test that endpoint returns proper SSE response
         response = client.get(f"/events/runs/{run_id}", headers=auth_headers)
         assert response.status_code == 200
         assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
+
+
+def _publish_run(run_id: str) -> list[str]:
+    """Publish a finished run to the (fake) Redis stream and return entry IDs."""
+    redis = get_redis()
+    return [
+        redis.xadd(f"run:{run_id}", {"e": json.dumps(event)})
+        for event in (
+            {"type": "status", "data": "running"},
+            {"type": "token", "data": "hello "},
+            {"type": "done"},
+        )
+    ]
+
+
+def test_stream_events_replay_for_late_joiner(client: TestClient):
+    """A client connecting after the run started receives the full history."""
+    run_id = str(uuid4())
+    entry_ids = _publish_run(run_id)
+
+    response = client.get(f"/events/runs/{run_id}")
+    assert response.status_code == 200
+    body = response.text
+    for entry_id in entry_ids:
+        assert f"id: {entry_id}" in body
+    assert '"type": "status"' in body
+    assert '"type": "token"' in body
+    assert body.endswith("event: done\ndata: {}\n\n")
+
+
+def test_stream_events_resume_from_last_event_id(client: TestClient):
+    """Last-Event-ID resumes after the given entry, returning only the delta."""
+    run_id = str(uuid4())
+    entry_ids = _publish_run(run_id)
+
+    response = client.get(
+        f"/events/runs/{run_id}",
+        headers={"Last-Event-ID": entry_ids[1]},
+    )
+    assert response.status_code == 200
+    body = response.text
+    assert f"id: {entry_ids[0]}" not in body
+    assert f"id: {entry_ids[1]}" not in body
+    assert f"id: {entry_ids[2]}" in body
+    assert '"type": "token"' not in body
+
+
+def test_stream_events_token_batch(client: TestClient):
+    """Tokens published through RunBus.batch arrive as coalesced token_batch frames."""
+    run_id = uuid4()
+    with bus.batch(run_id, max_bytes=16) as stream:
+        for word in ["alpha ", "beta ", "gamma ", "delta ", "epsilon "]:
+            stream.add_token(word)
+        stream.publish({"type": "done"})
+
+    entries = get_redis().xrange(f"run:{run_id}")
+    events = [json.loads(fields["e"]) for _, fields in entries]
+    assert [event["type"] for event in events] == ["token_batch", "token_batch", "done"]
+    assert "".join(event["data"] for event in events[:2]) == "alpha beta gamma delta epsilon "
+    assert sum(event["count"] for event in events[:2]) == 5
+
+    response = client.get(f"/events/runs/{run_id}")
+    assert '"type": "token_batch"' in response.text
+
+
+def test_token_batch_flushes_trickle_after_max_delay(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """Tokens below max_bytes are still written once the oldest is max_delay old."""
+    from app.services import pubsub
+
+    clock = [100.0]
+    monkeypatch.setattr(pubsub.time, "monotonic", lambda: clock[0])
+    run_id = uuid4()
+    stream = bus.batch(run_id, max_delay=0.05, max_bytes=4096)
+
+    def written() -> list[dict]:
+        return [json.loads(fields["e"]) for _, fields in get_redis().xrange(f"run:{run_id}")]
+
+    stream.add_token("a ")
+    clock[0] += 0.02
+    stream.add_token("b ")
+    assert written() == []
+    clock[0] += 0.04
+    stream.add_token("c ")
+    assert written() == [{"type": "token_batch", "data": "a b c ", "count": 3}]
+    clock[0] += 0.01
+    stream.add_token("d ")
+    assert len(written()) == 1
+    stream.flush()
+    assert written()[-1]["data"] == "d "
+
+
+def test_stream_slow_consumer_backfills_every_entry_in_order(client: TestClient):
+    """A subscriber whose queue overflows still receives every entry, once and in order."""
+    run_id = uuid4()
+    slow_bus = AsyncRunBus(RunStreamHub(queue_size=2))
+
+    async def scenario() -> tuple[list[str], list[str]]:
+        published: list[str] = []
+        received: list[str] = []
+        redis = get_redis()
+
+        async def consume() -> None:
+            async for entry_id, event in slow_bus.stream(run_id):
+                received.append(entry_id)
+                await asyncio.sleep(0.01)  # slower than the publisher
+                if event["type"] == "done":
+                    return
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        for index in range(30):
+            event = {"type": "done"} if index == 29 else {"type": "token", "data": str(index)}
+            published.append(redis.xadd(f"run:{run_id}", {"e": json.dumps(event)}))
+            await asyncio.sleep(0.001)
+        await asyncio.wait_for(consumer, timeout=10)
+        return published, received
+
+    published, received = asyncio.run(scenario())
+    assert received == published
+
+
+def test_run_stream_gc_prunes_consumers_and_sets_retention(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """The lifecycle sweep expires finished streams, deletes empty ones and deletes idle consumers."""
+    monkeypatch.setattr(RunStreamLifecycle, "_memory_usage", lambda self, key: 100)
+    redis = get_redis()
+    finished, live, empty = uuid4(), uuid4(), uuid4()
+    bus.publish(finished, {"type": "token", "data": "x"})
+    redis.persist(f"run:{finished}")
+    redis.xadd(f"run:{finished}", {"e": json.dumps({"type": "done"})})
+    bus.publish(live, {"type": "status", "data": "running"})
+    redis.xgroup_create(f"run:{live}", GROUP, id="0")
+    redis.xreadgroup(GROUP, "c-legacy", {f"run:{live}": ">"})
+    redis.xdel(f"run:{empty}", redis.xadd(f"run:{empty}", {"e": json.dumps({"type": "done"})}))
+
+    stats = RunStreamLifecycle(consumer_idle_ms=0).sweep()
+
+    assert stats.keys_expired == 1
+    assert stats.keys_deleted == 1
+    assert (stats.bytes_expiring, stats.bytes_reclaimed) == (100, 100)  # only the deleted stream is reclaimed
+    assert not redis.exists(f"run:{empty}")
+    assert stats.consumers_deleted == 1
+    assert stats.pending_dropped == 1
+    assert stats.groups_destroyed == 1
+    assert redis.ttl(f"run:{finished}") > 0
+    assert redis.ttl(f"run:{live}") == -1
+    assert redis.hget("metrics:run_stream_gc", "keys_expired") == "1"
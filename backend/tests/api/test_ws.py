@@ -4,9 +4,17 @@ Tests for WebSocket API endpoints.
 Endpoints: /ws
 Router: app.routes.ws
 """
+import asyncio
+import json
+from uuid import uuid4
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.infra.redis_client import get_redis
+from app.services.auth_service import parse_token
+from app.services.graph_bus import graph_bus
+
 
 def test_ws_endpoint_exists(client: TestClient):
     """Test that WebSocket endpoint exists"""
@@ -14,3 +22,48 @@ def test_ws_endpoint_exists(client: TestClient):
     # This is a placeholder to indicate the endpoint exists
     # For full WebSocket testing, use pytest-websocket or similar
     assert True  # Placeholder test
+
+
+def test_ws_run_resume_since(client: TestClient):
+    """Test /ws/runs/{run_id}?since= replays only events after the cursor"""
+    run_id = str(uuid4())
+    redis = get_redis()
+    first = redis.xadd(f"run:{run_id}", {"e": json.dumps({"type": "token", "data": "a "})})
+    second = redis.xadd(f"run:{run_id}", {"e": json.dumps({"type": "done"})})
+
+    with client.websocket_connect(f"/ws/runs/{run_id}?since={first}") as ws:
+        assert ws.receive_json() == {"type": "boot"}
+        assert ws.receive_json() == {"type": "done", "id": second}
+
+
+def test_ws_mission_initial_signal_from_projection(client: TestClient, auth_token: str):
+    """Test /ws/mission seeds and then answers from the Redis status projection"""
+    key = f"mission_signal:{parse_token(auth_token)['org']}"
+    with client.websocket_connect("/ws/mission", subprotocols=["bearer", auth_token]) as ws:
+        first = ws.receive_json()
+    assert first["type"] == "signal"
+    cached = json.loads(get_redis().get(key))
+    assert cached == first
+
+    busy = {"type": "signal", "payload": {"status": "busy", "crewId": "crew-1"}}
+    get_redis().set(key, json.dumps(busy))
+    with client.websocket_connect("/ws/mission", subprotocols=["bearer", auth_token]) as ws:
+        assert ws.receive_json() == busy
+
+
+def test_graph_bus_routes_events_by_crew(client: TestClient):
+    """Test the shared graph subscriber routes events only to matching crews"""
+    async def scenario() -> tuple[dict, int]:
+        watched = await graph_bus.subscribe("crew-a")
+        other = await graph_bus.subscribe("crew-b")
+        try:
+            await graph_bus.publish("crew-a", {"type": "agent_start", "agent": "qa"})
+            event = await asyncio.wait_for(watched.queue.get(), timeout=2.0)
+            return event, other.queue.qsize()
+        finally:
+            graph_bus.unsubscribe(watched)
+            graph_bus.unsubscribe(other)
+
+    event, other_pending = asyncio.run(scenario())
+    assert event == {"type": "agent_start", "agent": "qa"}
+    assert other_pending == 0
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Filtered top-k memory search latency vs collection size, with and without
+payload indexes. Needs a Qdrant server (local mode ignores payload indexes).
+
+usage: bench_memory_filters.py [--url URL] [--sizes 1000,10000,100000]
+                               [--dim 384] [--queries 200] [--top-k 5]
+
+For each size, two collections are filled with the same random points (crew,
+mission, role and type payloads as written by app.services.memory_service):
+one created through ensure_collection (payload indexes) and one without.
+Each query filters on a crew_id plus agent_role, like vec_search does.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.http.models import Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.infra.qdrant_client import ensure_collection  # noqa: E402
+
+ROLES = ["orchestrator", "backend", "frontend", "qa", "devops", "data", "security"]
+TYPES = ["run_output", "decision", "transcript"]
+
+
+def _points(count: int, dim: int, crews: int, rng: random.Random) -> list[PointStruct]:
+    start = datetime(2025, 1, 1)
+    return [
+        PointStruct(
+            id=str(uuid4()),
+            vector=[rng.random() for _ in range(dim)],
+            payload={
+                "content": f"memory {index}",
+                "crew_id": f"crew-{rng.randrange(crews)}",
+                "mission_id": f"mission-{rng.randrange(crews * 10)}",
+                "agent_role": rng.choice(ROLES),
+                "type": rng.choice(TYPES),
+                "timestamp": (start + timedelta(minutes=index)).isoformat(),
+            },
+        )
+        for index in range(count)
+    ]
+
+
+def _fill(client: QdrantClient, name: str, points: list[PointStruct], batch: int = 1000) -> None:
+    for offset in range(0, len(points), batch):
+        client.upsert(collection_name=name, points=points[offset:offset + batch], wait=True)
+
+
+def _latencies(client: QdrantClient, name: str, args: argparse.Namespace, crews: int, rng: random.Random) -> list[float]:
+    timings = []
+    for _ in range(args.queries):
+        query_filter = Filter(must=[
+            FieldCondition(key="crew_id", match=MatchValue(value=f"crew-{rng.randrange(crews)}")),
+            FieldCondition(key="agent_role", match=MatchValue(value=rng.choice(ROLES))),
+        ])
+        vector = [rng.random() for _ in range(args.dim)]
+        started = time.perf_counter()
+        client.search(collection_name=name, query_vector=vector, limit=args.top_k, query_filter=query_filter)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=settings.QDRANT_URL)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--crews", type=int, default=50, help="distinct crew_id values")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url)
+    print(f"{'points':>8} {'indexes':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        points = _points(size, args.dim, args.crews, random.Random(size))
+        suffix = uuid4().hex[:8]
+        indexed, plain = f"bench_indexed_{suffix}", f"bench_plain_{suffix}"
+        ensure_collection(indexed, args.dim, client=client)
+        client.create_collection(plain, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+        try:
+            for name, label in ((indexed, "yes"), (plain, "no")):
+                _fill(client, name, points)
+                timings = _latencies(client, name, args, args.crews, random.Random(1))
+                p95 = statistics.quantiles(timings, n=20)[-1]
+                print(f"{size:>8} {label:>8} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+        finally:
+            client.delete_collection(indexed)
+            client.delete_collection(plain)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Move crew_memory_<crew_id> / mission_memory_<mission_id> collections into the
+shared tenant collections used with CREW7_MEMORY_STORAGE=shared.
+
+usage: migrate_memory_collections.py [--dry-run] [--drop] [--batch-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.memory_migration import migrate_all  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only list collections and point counts")
+    parser.add_argument("--drop", action="store_true", help="delete each source collection once fully copied")
+    parser.add_argument("--batch-size", type=int, default=256, help="points per scroll/upsert (default 256)")
+    args = parser.parse_args()
+
+    results = migrate_all(batch_size=args.batch_size, drop=args.drop, dry_run=args.dry_run)
+    for result in results:
+        action = "would copy" if args.dry_run else "copied"
+        suffix = " (dropped)" if result.dropped else ""
+        print(f"{result.source} -> {result.target}: {action} {result.copied} points{suffix}")
+    total = sum(result.copied for result in results)
+    print(f"{len(results)} collections, {total} points")
+
+
+if __name__ == "__main__":
+    main()
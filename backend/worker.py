@@ -5,6 +5,11 @@ import os
 from rq import Worker, Queue
 from redis import Redis
 
+from app.config import settings
+from app.services.async_worker import run_async_worker
+from app.services.pubsub import schedule_run_stream_gc
+from app.services.worker_runtime import run_preloaded
+
 listen = ["runs"]
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
@@ -15,5 +20,19 @@ def _queues(conn: Redis) -> list[Queue]:
 
 if __name__ == "__main__":
     conn = Redis.from_url(redis_url)
-    worker = Worker(_queues(conn), connection=conn)
-    worker.work(with_scheduler=True)
+    queues = _queues(conn)
+    # Periodic run-stream GC; the job reschedules itself after each sweep
+    schedule_run_stream_gc(queues[0])
+    if settings.WORKER_MODE == "async":
+        # Many runs per process as asyncio tasks, fair across orgs
+        run_async_worker(
+            queues[0],
+            concurrency=settings.WORKER_CONCURRENCY,
+            per_org_limit=settings.WORKER_PER_ORG_LIMIT,
+        )
+    elif settings.WORKER_MODE == "preload":
+        # Jobs run in long-lived processes that keep crewai & clients warm
+        run_preloaded(queues, conn, concurrency=settings.WORKER_CONCURRENCY)
+    else:
+        worker = Worker(queues, connection=conn)
+        worker.work(with_scheduler=True)
@@ -982,7 +982,8 @@ const ApplicationShell: React.FC<ApplicationShellProps> = ({ activeSection, onNa
       }
 
       const close = streamRun(runId, (event: StreamEvent) => {
-        if (event.type === 'token') {
+        // token_batch carries several coalesced tokens in one frame
+        if (event.type === 'token' || event.type === 'token_batch') {
           setMessages((prev) => {
             const index = prev.findIndex((message) => message.id === runId);
             if (index === -1) {
@@ -1000,6 +1001,12 @@ const ApplicationShell: React.FC<ApplicationShellProps> = ({ activeSection, onNa
           return;
         }
 
+        if (event.type === 'task_output') {
+          const { role, task, tokens, duration_s: duration } = event.data ?? {};
+          pushRunEvent('log', `${role} finished "${task}" (${tokens} tokens, ${duration}s)`);
+          return;
+        }
+
         if (event.type === 'tool' || event.type === 'metric' || event.type === 'log') {
           pushRunEvent(event.type, formatEventData(event.data));
           return;